@@ -1,28 +1,146 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify, stream_with_context
 from flask_cors import CORS
 import numpy as np
 import pandas as pd
-import tensorflow as tf
 import joblib
+import csv
+import io
+import itertools
+import json
 import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import TimeoutError as InferenceTimeout
 from datetime import datetime
+from functools import wraps
+
+try:
+    import msgpack
+except ImportError:  # Format msgpack optionnel
+    msgpack = None
+
+from backends import load_backend, read_benchmark_report, read_quantization_report
+from batching import MicroBatcher, SchedulerOverloaded
+from cache import PredictionCache
+from feature_store import CLIPPED_FEATURES, FeatureStore, FeatureStoreError, parse_week
+from jobs import JobNotFound, JobRunner, JobStore
+import metrics
+from metrics import stage
+from model_pool import ModelPool
+import profiling
+from profiling import ProfilerBusy, SamplingProfiler
+from registry import ModelRegistry
+from sessions import RingWindow, SessionLimitReached, SessionNotFound, SessionStore
+from uncertainty import QUANTILES, UncertaintyRequest, confidence_levels, resolve_method, stochastic_passes, summarize
 
 # Configuration du logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PROCESS_STARTED = time.time()
+
 # Initialisation Flask
 app = Flask(__name__)
 CORS(app)  # Active CORS pour toutes les routes (en dev pour que tout le monde est accées a l'api)
 
-# Variables globales pour le modèle
-model = None
-scaler_features = None
-scaler_targets = None
-
 # Configuration
 SEQUENCE_LENGTH = 12  # Le modèle attend 12 semaines d'historique
 NUM_FEATURES = 29  # Le modèle attend 29 features
+MAX_BATCH_SIZE = 1000  # Nombre maximal d'éléments par requête /predict/batch
+MAX_ROLLING_WINDOWS = 5000  # Nombre maximal de fenêtres par requête /predict/rolling
+TARGET_ORDER = ["mortality_rate", "transmission_rate", "spatial_spread"]
+LOW_CONFIDENCE = "low - modèle entraîné uniquement sur COVID-19"
+
+# Moteur d'inférence: "keras", "tf_function", "tflite", "numpy" (sans TensorFlow)
+# ou "auto" (le plus rapide d'après models/backend_benchmark.json)
+INFERENCE_BACKEND = os.environ.get("INFERENCE_BACKEND", "auto").lower()
+MODELS_DIR = "models"
+
+# Rechargement à chaud: surveillance du dossier des modèles (0 = désactivée)
+# et jeton requis par les endpoints d'administration (non défini = désactivés)
+MODEL_WATCH_INTERVAL_S = float(os.environ.get("MODEL_WATCH_INTERVAL_S", "0"))
+# Mémoire (estimée) des modèles dédiés par maladie chargés simultanément, par processus
+MODEL_MEMORY_BUDGET_MB = float(os.environ.get("MODEL_MEMORY_BUDGET_MB", "512"))
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+# Mode incertitude (?uncertainty=K): nombre de passes stochastiques par
+# défaut et maximal, méthode (auto, dropout, perturbation), écart-type du
+# bruit de perturbation (unités du scaler) et taille maximale d'un appel au
+# modèle (K·N séquences; au-delà, le lot est découpé)
+UNCERTAINTY_SAMPLES = int(os.environ.get("UNCERTAINTY_SAMPLES", "30"))
+UNCERTAINTY_MAX_SAMPLES = int(os.environ.get("UNCERTAINTY_MAX_SAMPLES", "200"))
+UNCERTAINTY_METHOD = os.environ.get("UNCERTAINTY_METHOD", "auto").lower()
+UNCERTAINTY_NOISE = float(os.environ.get("UNCERTAINTY_NOISE", "0.05"))
+UNCERTAINTY_MAX_SEQUENCES = int(os.environ.get("UNCERTAINTY_MAX_SEQUENCES", "8192"))
+# Profilage à la demande (administration): dossier des traces TensorFlow et
+# durée maximale d'un profil par échantillonnage
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+
+# Contrôle de charge: inférences simultanées (0 = illimitées), attente
+# maximale d'une place, et délai maximal d'une inférence
+MAX_CONCURRENT_REQUESTS = int(os.environ.get("MAX_CONCURRENT_REQUESTS", "0"))
+QUEUE_TIMEOUT_S = float(os.environ.get("QUEUE_TIMEOUT_S", "1"))
+REQUEST_TIMEOUT_S = float(os.environ.get("REQUEST_TIMEOUT_S", "30"))
+# Défini par gunicorn.conf.py: les threads de fond démarrent après le fork
+PREFORK_SERVER = os.environ.get("API_PREFORK_SERVER") == "1"
+# Chargement du modèle dans un thread de fond, serveur déjà à l'écoute
+# (false: chargement bloquant à l'import, dans le maître avant le fork sous
+# gunicorn avec preload_app, qui fixe false par défaut)
+MODEL_BACKGROUND_LOAD = os.environ.get("MODEL_BACKGROUND_LOAD", "true").lower() == "true"
+
+# Micro-batching des requêtes concurrentes
+MICRO_BATCH_ENABLED = os.environ.get("MICRO_BATCH_ENABLED", "true").lower() == "true"
+MICRO_BATCH_MAX_SIZE = int(os.environ.get("MICRO_BATCH_MAX_SIZE", "32"))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get("MICRO_BATCH_MAX_WAIT_MS", "5"))
+MICRO_BATCH_MAX_QUEUE = int(os.environ.get("MICRO_BATCH_MAX_QUEUE", "1024"))
+
+# Cache des prédictions (fenêtre d'entrée + maladie)
+PREDICTION_CACHE_ENABLED = os.environ.get("PREDICTION_CACHE_ENABLED", "true").lower() == "true"
+PREDICTION_CACHE_MAX_MB = float(os.environ.get("PREDICTION_CACHE_MAX_MB", "16"))
+PREDICTION_CACHE_TTL_S = float(os.environ.get("PREDICTION_CACHE_TTL_S", "3600"))
+
+# Fenêtres glissantes par passe avant pour /predict/rolling
+ROLLING_CHUNK_SIZE = int(os.environ.get("ROLLING_CHUNK_SIZE", "256"))
+
+# Éléments prédits et envoyés par paquet dans les réponses NDJSON de /predict/batch
+BATCH_STREAM_CHUNK_SIZE = int(os.environ.get("BATCH_STREAM_CHUNK_SIZE", "256"))
+
+# Table hebdomadaire des features précalculée (ML/Model/etl.py), pour les
+# requêtes {disease, location, as_of_week} sans historique
+FEATURE_STORE_DIR = os.environ.get("FEATURE_STORE_DIR", "feature_store")
+
+# Sessions de prédiction en continu (une semaine poussée par appel): base
+# partagée par les workers, nombre maximal de sessions et expiration
+SESSION_DB_PATH = os.environ.get(
+    "SESSION_DB_PATH", os.path.join(tempfile.gettempdir(), "epidemic_sessions.db")
+)
+SESSION_MAX_COUNT = int(os.environ.get("SESSION_MAX_COUNT", "1000"))
+SESSION_IDLE_TIMEOUT_S = float(os.environ.get("SESSION_IDLE_TIMEOUT_S", "3600"))
+# Connexions /predict/stream simultanées par processus (chacune occupe un thread)
+STREAM_MAX_CONNECTIONS = int(os.environ.get("STREAM_MAX_CONNECTIONS", "2"))
+
+# Travaux de prédiction en masse (/jobs): état, résultats et entrées reçues
+# dans JOB_DIR; fichiers référencés par nom dans JOB_INPUT_DIR
+JOB_DIR = os.environ.get("JOB_DIR", "jobs")
+JOB_INPUT_DIR = os.environ.get("JOB_INPUT_DIR", "job_inputs")
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "1"))  # Threads de traitement par processus (0 = aucun)
+JOB_CHUNK_SIZE = int(os.environ.get("JOB_CHUNK_SIZE", "256"))
+JOB_MAX_ITEMS = int(os.environ.get("JOB_MAX_ITEMS", "1000000"))
+JOB_RETENTION_S = float(os.environ.get("JOB_RETENTION_S", str(7 * 24 * 3600)))
+JOB_LEASE_S = 30  # Bail d'un travail en cours, renouvelé à chaque paquet
+
+prediction_cache = (
+    PredictionCache(
+        max_bytes=int(PREDICTION_CACHE_MAX_MB * 1024 * 1024),
+        ttl_seconds=PREDICTION_CACHE_TTL_S,
+    )
+    if PREDICTION_CACHE_ENABLED
+    else None
+)
 
 # Liste des features dans l'ordre exact attendu par le modèle
 FEATURE_ORDER = [
@@ -56,79 +174,408 @@ FEATURE_ORDER = [
     "cases_growth_rate_was_missing",
     "avg_mortality_rate_was_missing",
 ]
+FEATURE_SET = frozenset(FEATURE_ORDER)
+
+
+
+class ModelUnavailable(RuntimeError):
+    """Aucune version du modèle n'est chargée"""
+
+
+class FeatureStoreUnavailable(RuntimeError):
+    """Le feature store n'est pas chargé"""
+
+
+# Formats de requête binaires acceptés en plus de JSON
+NPY_MIMETYPES = {"application/x-npy", "application/octet-stream"}
+MSGPACK_MIMETYPES = {"application/msgpack", "application/x-msgpack"}
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+
+def on_model_swap(previous, current):
+    """Appelé à chaque substitution de la version active du modèle"""
+    # Les prédictions en cache ne sont plus valides avec un nouveau modèle
+    if prediction_cache is not None:
+        prediction_cache.clear()
+    # Les modèles dédiés sont relus avec le modèle principal
+    disease_models.reload()
+    metrics.MODEL_LOAD_SECONDS.set(current.load_time)
+    metrics.MODEL_INFO.clear()
+    metrics.MODEL_INFO.set(1, version=current.version, backend=current.model.name)
+
+
+# Modèles dédiés par maladie (models/diseases.json), chargés à la demande
+disease_models = ModelPool(
+    MODELS_DIR,
+    INFERENCE_BACKEND,
+    (SEQUENCE_LENGTH, NUM_FEATURES),
+    memory_budget_bytes=int(MODEL_MEMORY_BUDGET_MB * 1024 * 1024),
+    family=lambda disease: disease_family(disease),
+)
+
+# Registre versionné: chaque requête garde la version active à son arrivée
+model_registry = ModelRegistry(
+    MODELS_DIR,
+    INFERENCE_BACKEND,
+    (SEQUENCE_LENGTH, NUM_FEATURES),
+    on_swap=on_model_swap,
+)
 
 
 def load_models():
-    global model, scaler_features, scaler_targets
-    try:
-        logger.info("Chargement du modèle")
-        model = tf.keras.models.load_model("models/model.keras")
-        logger.info("Chargement des scalers")
-        scaler_features = joblib.load("models/scaler_features.pkl")
-        logger.info(f"scaler_features loaded: {scaler_features is not None}")
-        scaler_targets = joblib.load("models/scaler_targets.pkl")
-        logger.info(f"scaler_targets loaded: {scaler_targets is not None}")
+    """Charge (ou recharge à chaud) le modèle et les scalers"""
+    if model_registry.load():
         logger.info(" Modèles chargés avec succès")
         return True
-    except Exception as e:
-        logger.error(f" Erreur lors du chargement des modèles: {str(e)}")
-        return False
+    return False
 
-# Chargement des modèles au lancement du conteneur
-if load_models():
-    logger.info("✅ Modèles chargés avec succès")
-else:
-    logger.error("❌ Impossible de charger les modèles")
 
-def prepare_sequence(history_data):
-    """Prépare une séquence de données pour le modèle"""
+def active_model():
+    """Version du modèle à utiliser pour une nouvelle requête"""
+    current = model_registry.current
+    if current is None:
+        raise ModelUnavailable("Modèle non chargé")
+    return current
+
+
+def resolve_model(disease, version=None):
+    """Modèle qui sert une maladie: son modèle dédié s'il existe, sinon le modèle principal"""
+    return disease_models.model_for(disease) or version or active_model()
+
+
+# Premier chargement du modèle: état et durées exposés par /health/ready
+startup = {"state": "pending", "load_s": None, "warmup_s": None, "ready_after_s": None, "error": None}
+
+
+def initial_load():
+    """Premier chargement du modèle, préchauffé par une passe avant sur un lot (1, 12, 29)"""
+    startup["state"] = "loading"
+    if load_models():
+        current = model_registry.current
+        startup.update(
+            state="ready",
+            load_s=round(current.load_time - current.warmup_time, 3),
+            warmup_s=round(current.warmup_time, 3),
+            ready_after_s=round(time.time() - PROCESS_STARTED, 3),
+        )
+        logger.info("✅ Modèles chargés avec succès")
+    else:
+        startup.update(state="failed", error=model_registry.last_error)
+        logger.error("❌ Impossible de charger les modèles")
+
+
+def load_in_background():
+    initial_load()
+    # Surveillance démarrée après le premier chargement (pas de chargement concurrent)
+    model_registry.start_watcher(MODEL_WATCH_INTERVAL_S)
+
+
+def start_background_tasks():
+    """Démarre les threads de fond du processus qui sert les requêtes"""
+    if startup["state"] == "pending":
+        threading.Thread(target=load_in_background, name="model-loader", daemon=True).start()
+    else:
+        model_registry.start_watcher(MODEL_WATCH_INTERVAL_S)
+    job_runner.start()
+
+
+# Sans chargement en arrière-plan, le modèle est chargé ici (dans le maître
+# gunicorn avec preload_app: sa mémoire est partagée par les workers)
+if not MODEL_BACKGROUND_LOAD:
+    initial_load()
+
+def load_feature_store():
+    """Ouvre le feature store (projeté en mémoire, partagé entre workers); None s'il est absent ou invalide"""
     try:
-        # Vérifier qu'on a assez de données
-        if len(history_data) < SEQUENCE_LENGTH:
+        store = FeatureStore(FEATURE_STORE_DIR, FEATURE_ORDER, SEQUENCE_LENGTH, CLIPPED_FEATURES)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Feature store non disponible ({FEATURE_STORE_DIR}): {e}")
+        return None
+    logger.info(f"✅ Feature store chargé: {len(store.series)} séries, {len(store.weeks)} semaines")
+    return store
+
+
+feature_store = load_feature_store()
+
+
+def store_disease(disease):
+    """Série du feature store d'une maladie: libellé exact, sinon sa famille (variantes)"""
+    if feature_store is None:
+        raise FeatureStoreUnavailable("Feature store non chargé")
+    return disease if disease in feature_store.locations else disease_family(disease)
+
+
+def lookup_window(disease, location, as_of_week):
+    """Fenêtre brute (12, 29) lue dans le feature store, et le lundi de la semaine demandée"""
+    series = store_disease(disease)
+    week = parse_week(as_of_week)
+    return np.array(feature_store.window(series, location, week), dtype=np.float64), week
+
+# Places d'inférence du processus (contrôle de charge)
+request_slots = (
+    threading.BoundedSemaphore(MAX_CONCURRENT_REQUESTS) if MAX_CONCURRENT_REQUESTS > 0 else None
+)
+
+
+def limit_concurrency(view):
+    """
+    Borne le nombre d'inférences simultanées: une requête attend au plus
+    QUEUE_TIMEOUT_S qu'une place se libère, sinon elle est rejetée (503)
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request_slots is None:
+            return view(*args, **kwargs)
+        if not request_slots.acquire(timeout=QUEUE_TIMEOUT_S):
+            response = jsonify(
+                {"status": "error", "error": "Serveur saturé, réessayez plus tard", "type": "overloaded"}
+            )
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        try:
+            return view(*args, **kwargs)
+        finally:
+            request_slots.release()
+
+    return wrapper
+
+
+def profile_on_demand(view):
+    """
+    Avec ?profile=1 et le jeton d'administration, ajoute à la réponse JSON la
+    durée de chaque étape et le résumé cProfile de la requête (clé "profile")
+    """
+
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.args.get("profile", "0").lower() not in ("1", "true"):
+            return view(*args, **kwargs)
+        if not is_admin_request():
+            return jsonify({"status": "error", "error": "Accès refusé"}), 403
+        with profiling.profile_request() as profile:
+            response = app.make_response(view(*args, **kwargs))
+        # Réponse en continu: le calcul a lieu après la vue, pas de profil
+        if response.is_json and not response.is_streamed:
+            body = response.get_json()
+            body["profile"] = profile.summary()
+            response.set_data(app.json.dumps(body))
+        return response
+
+    return wrapper
+
+
+def _as_float64(values, label):
+    """Conversion NumPy des valeurs reçues: une valeur non numérique (objet, liste imbriquée) est une erreur de validation"""
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except TypeError:
+        raise ValueError(f"{label}: valeurs numériques attendues") from None
+
+
+def _rows_to_matrix(history_data, weeks=SEQUENCE_LENGTH):
+    """Historique au format lignes: liste de semaines {feature: valeur}"""
+    sequence_data = history_data[-weeks:] if weeks else history_data
+    missing = set()
+    for week_data in sequence_data:
+        if not isinstance(week_data, dict):
+            raise ValueError("Semaine invalide: objet JSON attendu")
+        missing.update(FEATURE_SET.difference(week_data))
+    # Valeur par défaut 0.0 si la feature manque; la conversion est faite par NumPy
+    matrix = _as_float64(
+        [[week_data.get(feature, 0.0) for feature in FEATURE_ORDER] for week_data in sequence_data],
+        "Historique invalide",
+    )
+    return matrix, missing
+
+
+def _columns_to_matrix(history_data, weeks=SEQUENCE_LENGTH):
+    """Historique au format colonnes: {feature: [valeurs des semaines]}"""
+    matrix = None
+    missing = set()
+    for column, feature in enumerate(FEATURE_ORDER):
+        values = history_data.get(feature)
+        if values is None:
+            missing.add(feature)
+            continue
+        if isinstance(values, (bytes, bytearray)):
+            values = np.frombuffer(values, dtype="<f4")
+        else:
+            values = _as_float64(values, f"Colonne invalide pour {feature}")
+        if values.ndim != 1:
+            raise ValueError(f"Colonne invalide pour {feature}: liste de valeurs attendue")
+        if matrix is None:
+            if len(values) < SEQUENCE_LENGTH:
+                raise ValueError(
+                    f"Historique insuffisant: {len(values)} semaines, minimum requis: {SEQUENCE_LENGTH}"
+                )
+            n_weeks = len(values)
+            # Valeur par défaut 0.0 pour les features manquantes
+            matrix = np.zeros((min(weeks or n_weeks, n_weeks), NUM_FEATURES), dtype=np.float64)
+        elif len(values) != n_weeks:
+            raise ValueError(f"Colonne {feature}: {len(values)} valeurs, {n_weeks} attendues")
+        matrix[:, column] = values[-len(matrix):]
+    if matrix is None:
+        raise ValueError("Aucune feature reconnue dans l'historique")
+    return matrix, missing
+
+
+def build_feature_matrix(history_data, shape=None, weeks=SEQUENCE_LENGTH):
+    """
+    Construit la matrice brute (SEQUENCE_LENGTH, NUM_FEATURES) d'un historique
+    et la liste des features manquantes. Avec weeks=None, l'historique est
+    conservé en entier (semaines, NUM_FEATURES).
+
+    L'historique peut être une liste de semaines, un dictionnaire colonnes
+    (feature -> valeurs), un tableau NumPy (semaines, 29) ou des octets float32
+    bruts accompagnés de leur forme (msgpack).
+    """
+    if isinstance(history_data, (bytes, bytearray)):
+        try:
+            history_data = np.frombuffer(history_data, dtype="<f4").reshape(shape or (-1, NUM_FEATURES))
+        except TypeError:
+            raise ValueError("Forme invalide: liste d'entiers attendue") from None
+
+    if isinstance(history_data, np.ndarray):
+        if history_data.ndim != 2 or history_data.shape[1] != NUM_FEATURES:
             raise ValueError(
-                f"Historique insuffisant: {len(history_data)} semaines, minimum requis: {SEQUENCE_LENGTH}"
+                f"Forme invalide: {history_data.shape}, attendu (semaines, {NUM_FEATURES})"
             )
+        matrix, missing = history_data.astype(np.float64), set()
+    elif isinstance(history_data, dict):
+        matrix, missing = _columns_to_matrix(history_data, weeks)
+    elif isinstance(history_data, list):
+        matrix, missing = _rows_to_matrix(history_data, weeks)
+    else:
+        raise ValueError("Historique invalide: liste de semaines ou colonnes attendues")
 
-        # Prendre les dernières SEQUENCE_LENGTH semaines
-        sequence_data = history_data[-SEQUENCE_LENGTH:]
+    # Vérifier qu'on a assez de données
+    if len(matrix) < SEQUENCE_LENGTH:
+        raise ValueError(
+            f"Historique insuffisant: {len(matrix)} semaines, minimum requis: {SEQUENCE_LENGTH}"
+        )
 
-        # Créer un DataFrame avec les features dans le bon ordre
-        sequence_features = []
-        for week_data in sequence_data:
-            week_features = []
-            for feature in FEATURE_ORDER:
-                if feature in week_data:
-                    week_features.append(float(week_data[feature]))
-                else:
-                    # Valeur par défaut si la feature manque
-                    logger.warning(f"Feature manquante: {feature}")
-                    week_features.append(0.0)
-            sequence_features.append(week_features)
+    # Prendre les dernières SEQUENCE_LENGTH semaines
+    if weeks:
+        matrix = matrix[-weeks:]
+    if not np.isfinite(matrix).all():
+        raise ValueError("Historique invalide: valeurs manquantes ou non numériques")
+
+    missing_features = [feature for feature in FEATURE_ORDER if feature in missing]
+    if missing_features:
+        # Un seul avertissement par historique, et non par cellule
+        logger.warning(f"Features manquantes ({len(missing_features)}): {', '.join(missing_features)}")
+    return matrix, missing_features
 
-        # Convertir en array numpy
-        sequence_array = np.array(sequence_features)
 
-        # Normaliser avec le scaler
-        sequence_normalized = scaler_features.transform(sequence_array)
+def read_request_payload():
+    """
+    Décode le corps de la requête selon son Content-Type: JSON (défaut),
+    msgpack, ou tableau .npy float32 (semaines, 29) ou (N, semaines, 29).
+    Pour un tableau .npy, maladie et localisation sont passées en paramètres
+    d'URL (?disease=...&location=..., répétables pour un lot).
+    """
+    with stage("parse"):
+        return _decode_request_body(request.mimetype)
+
+
+def _decode_request_body(mimetype):
+    if mimetype in NPY_MIMETYPES:
+        try:
+            sequences = np.load(io.BytesIO(request.get_data()), allow_pickle=False)
+        except Exception:
+            raise ValueError("Corps .npy invalide")
+        return {
+            "sequences": sequences,
+            "diseases": request.args.getlist("disease"),
+            "locations": request.args.getlist("location"),
+        }
+    if mimetype in MSGPACK_MIMETYPES:
+        if msgpack is None:
+            raise ValueError("Format msgpack non disponible sur ce serveur")
+        try:
+            return msgpack.unpackb(request.get_data(), raw=False)
+        except Exception:
+            raise ValueError("Corps msgpack invalide")
+    return request.get_json()
+
+
+def scale_features(rows, version):
+    """Normalise des semaines brutes (k, 29) avec le scaler de la version"""
+    with stage("scaler"):
+        return version.scaler_features.transform(rows)
 
-        # Reshape pour le modèle (1, 12, 29)
-        sequence_final = sequence_normalized.reshape(1, SEQUENCE_LENGTH, NUM_FEATURES)
 
-        return sequence_final
+def normalize_sequences(raw_sequences, version=None):
+    """Normalise un tenseur (N, 12, 29) en un seul appel au scaler"""
+    version = version or active_model()
+    n_sequences = raw_sequences.shape[0]
+    flat = raw_sequences.reshape(n_sequences * SEQUENCE_LENGTH, NUM_FEATURES)
+    normalized = scale_features(flat, version)
+    return normalized.reshape(n_sequences, SEQUENCE_LENGTH, NUM_FEATURES)
+
+
+def prepare_sequence(history_data):
+    """Prépare une séquence de données pour le modèle"""
+    try:
+        sequence_array, _ = build_feature_matrix(history_data)
+
+        # Normaliser et reshape pour le modèle (1, 12, 29)
+        return normalize_sequences(sequence_array[np.newaxis, ...])
 
     except Exception as e:
         logger.error(f"Erreur dans la préparation des données: {str(e)}")
         raise
 
 
+def prepare_sequences(histories):
+    """Prépare un lot d'historiques en un seul tenseur normalisé (N, 12, 29)"""
+    raw_sequences = np.stack([build_feature_matrix(history)[0] for history in histories])
+    return normalize_sequences(raw_sequences)
+
+
+def run_inference(sequences, version):
+    """Prédit un lot (N, 12, 29) en une passe et renvoie un tableau (N, 3) dénormalisé"""
+    metrics.INFERENCE_BATCH_SIZE.observe(len(sequences))
+
+    # Une seule passe avant pour tout le lot (résultat normalisé)
+    with stage("model"):
+        prediction_normalized = version.model.predict(sequences, verbose=0)
+
+    # Dénormaliser les prédictions en un seul appel
+    with stage("inverse_transform"):
+        prediction_real = version.scaler_targets.inverse_transform(prediction_normalized)
+
+    return np.round(prediction_real.astype(np.float64), 4)
+
+
+# Ordonnanceur partagé par tous les threads Flask
+inference_scheduler = (
+    MicroBatcher(
+        run_inference,
+        max_batch_size=MICRO_BATCH_MAX_SIZE,
+        max_wait_ms=MICRO_BATCH_MAX_WAIT_MS,
+        max_queue_size=MICRO_BATCH_MAX_QUEUE,
+    )
+    if MICRO_BATCH_ENABLED
+    else None
+)
+
+
+def make_predictions(sequences, version=None):
+    """Prédit un lot (N, 12, 29), via l'ordonnanceur de micro-batching s'il est actif"""
+    version = version or active_model()
+    # Une requête profilée est servie hors micro-batching: sa passe avant est
+    # exécutée (et profilée) dans le thread de la requête
+    if inference_scheduler is not None and profiling.active() is None:
+        return inference_scheduler.submit(sequences, group=version, timeout=REQUEST_TIMEOUT_S)
+    return run_inference(sequences, version)
+
+
 def make_prediction(sequence):
     """Fait une prédiction avec le modèle"""
     try:
-        # Prédiction (résultat normalisé)
-        prediction_normalized = model.predict(sequence, verbose=0)
-
-        # Dénormaliser la prédiction
-        prediction_real = scaler_targets.inverse_transform(prediction_normalized)
+        prediction_real = make_predictions(sequence)
 
         # Extraire les valeurs
         mortality_rate = float(prediction_real[0, 0])
@@ -136,9 +583,9 @@ def make_prediction(sequence):
         spatial_spread = float(prediction_real[0, 2])
 
         return {
-            "mortality_rate": round(mortality_rate, 4),
-            "transmission_rate": round(transmission_rate, 4),
-            "spatial_spread": round(spatial_spread, 4),
+            "mortality_rate": mortality_rate,
+            "transmission_rate": transmission_rate,
+            "spatial_spread": spatial_spread,
         }
 
     except Exception as e:
@@ -146,6 +593,105 @@ def make_prediction(sequence):
         raise
 
 
+def disease_correction_factors(diseases):
+    """
+    Facteurs de correction (mortalité, transmission) par maladie, sous forme
+    de tableau (N, 2), pour les maladies hors du domaine d'entraînement COVID-19
+    """
+    factors = np.ones((len(diseases), 2))
+    for i, disease in enumerate(diseases):
+        if "COVID" in disease.upper():
+            continue
+        if "MonkeyPox" in disease:
+            factors[i] = (0.1, 0.6)  # Moins mortel, moins transmissible
+        elif "Influenza" in disease:
+            if "H5N1" in disease:
+                factors[i] = (10, 0.3)  # H5N1 très mortel, peu transmissible
+            else:
+                factors[i] = (0.2, 0.5)  # Grippe normale
+    return factors
+
+
+def disease_family(disease):
+    """
+    Famille de maladie utilisée comme label des métriques: ensemble borné,
+    quel que soit le libellé envoyé par le client
+    """
+    disease = str(disease)
+    if "COVID" in disease.upper():
+        return "COVID-19"
+    if "MonkeyPox" in disease:
+        return "MonkeyPox"
+    if "Influenza" in disease:
+        return "Influenza-H5N1" if "H5N1" in disease else "Influenza"
+    return "other"
+
+
+def requested_disease(data, index):
+    """Maladie demandée pour l'élément index d'un lot (pour les métriques d'erreur)"""
+    if "sequences" in data:
+        diseases = data["diseases"]
+        if len(diseases) == 1:
+            return diseases[0]
+        return diseases[index] if index < len(diseases) else "Unknown"
+    entry = data["predictions"][index]
+    return entry.get("disease", "Unknown") if isinstance(entry, dict) else "Unknown"
+
+
+def build_prediction_response(
+    disease, location, predictions, in_domain, confidence, missing_features=None, model_version=None, compact=False
+):
+    """
+    Construit la réponse JSON d'une prédiction. En schéma compact, chaque
+    prédiction est sa seule valeur (sans unité ni description, constantes)
+    """
+    return {
+        "status": "success",
+        "disease": disease,
+        "location": location,
+        "predictions": dict(predictions) if compact else {
+            "mortality_rate": {
+                "value": predictions["mortality_rate"],
+                "unit": "percentage",
+                "description": "Taux de mortalité prédit",
+            },
+            "transmission_rate": {
+                "value": predictions["transmission_rate"],
+                "unit": "R0",
+                "description": "Taux de transmission prédit",
+            },
+            "spatial_spread": {
+                "value": predictions["spatial_spread"],
+                "unit": "correlation",
+                "description": "Propagation spatiale (peu fiable)",
+            },
+        },
+        "metadata": {
+            "model_version": model_version,
+            "prediction_horizon": "4 weeks",
+            "confidence": confidence,
+            "warning": "Modèle optimisé pour COVID-19" if not in_domain else None,
+            "missing_features": missing_features or [],
+        },
+    }
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response):
+    """Durée totale et code de statut de chaque requête, par route"""
+    started = g.pop("request_started", None)
+    endpoint = request.url_rule.rule if request.url_rule is not None else "unmatched"
+    if started is not None:
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - started, endpoint=endpoint)
+    metrics.REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+    return response
+
+
 @app.route("/", methods=["GET"])
 def home():
     """Route d'accueil"""
@@ -156,8 +702,19 @@ def home():
             "endpoints": {
                 "/": "Cette page",
                 "/health": "Vérification de l'état de l'API",
+                "/health/live": "Sonde de vivacité (le processus répond)",
+                "/health/ready": "Sonde de disponibilité (modèle chargé et préchauffé, sinon 503)",
                 "/predict": "Prédiction épidémique (POST)",
                 "/predict/batch": "Prédictions multiples (POST)",
+                "/predict/rolling": "Prédiction sur chaque fenêtre glissante d'un long historique (POST)",
+                "/predict/week": "Prédiction de toutes les localisations à une semaine, depuis le feature store (POST)",
+                "/predict/stream": "Prédiction en continu sur une connexion, une semaine par ligne NDJSON (POST)",
+                "/sessions": "Sessions de prédiction mises à jour une semaine à la fois (POST, GET, DELETE)",
+                "/jobs": "Travaux de prédiction en masse traités en arrière-plan (POST, GET, DELETE)",
+                "/backends": "Comparaison de latence des moteurs d'inférence et des variantes quantifiées",
+                "/metrics": "Métriques Prometheus (latence par étape, volumes, erreurs)",
+                "/admin/reload": "Rechargement à chaud du modèle (POST, administration)",
+                "/admin/profile": "Profil par échantillonnage du processus, format flame graph (POST, administration)",
             },
         }
     )
@@ -166,99 +723,1353 @@ def home():
 @app.route("/health", methods=["GET"])
 def health_check():
     """Vérification de l'état de l'API"""
+    current = model_registry.current
     return jsonify(
         {
             "status": "healthy",
-            "model_loaded": model is not None,
-            "scaler_features_loaded": scaler_features is not None,
-            "scaler_targets_loaded": scaler_targets is not None,
+            "model_loaded": current is not None,
+            "inference_backend": current.model.name if current is not None else None,
+            "scaler_features_loaded": current is not None and current.scaler_features is not None,
+            "scaler_targets_loaded": current is not None and current.scaler_targets is not None,
+            "model": model_registry.describe(),
+            "startup": startup,
+            "prediction_cache": (
+                prediction_cache.stats() if prediction_cache is not None else None
+            ),
+            "inference_scheduler": (
+                inference_scheduler.stats() if inference_scheduler is not None else None
+            ),
+            "feature_store": feature_store.describe() if feature_store is not None else None,
+            "disease_models": disease_models.describe(),
+            "sessions": session_store.stats(),
+            "jobs": job_store.stats(),
             "timestamp": datetime.now().isoformat(),
         }
     )
 
 
+@app.route("/health/live", methods=["GET"])
+def liveness():
+    """Sonde de vivacité: le processus répond, modèle chargé ou non"""
+    return jsonify({"status": "alive", "uptime_s": round(time.time() - PROCESS_STARTED, 3)})
+
+
+@app.route("/health/ready", methods=["GET"])
+def readiness():
+    """
+    Sonde de disponibilité: HTTP 200 quand le modèle est chargé et préchauffé,
+    503 pendant le chargement ou après un échec
+    """
+    current = model_registry.current
+    state = "ready" if current is not None else startup["state"]
+    response = jsonify(
+        {
+            "status": state,
+            "model_version": current.version if current is not None else None,
+            "inference_backend": current.model.name if current is not None else None,
+            "startup": startup,
+            "uptime_s": round(time.time() - PROCESS_STARTED, 3),
+        }
+    )
+    if current is None:
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    return response
+
+
+@app.route("/backends", methods=["GET"])
+def backends_report():
+    """Moteur d'inférence actif, comparaison de latence par moteur et précision des variantes quantifiées"""
+    current = model_registry.current
+    return jsonify(
+        {
+            "active_backend": current.model.name if current is not None else None,
+            "requested_backend": INFERENCE_BACKEND,
+            "benchmark": read_benchmark_report(MODELS_DIR),
+            "quantization": read_quantization_report(MODELS_DIR),
+        }
+    )
+
+
 @app.route("/predict", methods=["POST"])
+@limit_concurrency
+@profile_on_demand
 def predict():
     """
     Endpoint principal de prédiction
     """
+    disease = "Unknown"
     try:
-        data = request.get_json()
-        if not data:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
             return jsonify({"error": "Aucune donnée reçue"}), 400
 
-        if "history" not in data:
+        if "sequences" in data:
+            # Tableau .npy: une seule séquence (semaines, 29) ou (1, semaines, 29)
+            history = data["sequences"]
+            if history.ndim == 3 and history.shape[0] == 1:
+                history = history[0]
+            disease = data["diseases"][0] if data["diseases"] else "Unknown"
+            location = data["locations"][0] if data["locations"] else "Unknown"
+        elif "history" in data:
+            history = data["history"]
+            disease = str(data.get("disease", "Unknown"))
+            location = data.get("location", "Unknown")
+        elif "as_of_week" in data:
+            # Historique lu côté serveur dans le feature store
+            history = None
+            disease = str(data.get("disease", "Unknown"))
+            location = data.get("location", "Unknown")
+        else:
             return jsonify({"error": "Historique manquant"}), 400
 
-        history = data["history"]
-        disease = data.get("disease", "Unknown")
+        # Préparer la séquence
+        week = None
+        with stage("prepare"):
+            if history is None:
+                raw_sequence, week = lookup_window(disease, location, data["as_of_week"])
+                missing_features = []
+            else:
+                raw_sequence, missing_features = build_feature_matrix(history, data.get("shape"))
+        metrics.REQUEST_BATCH_SIZE.observe(1, endpoint="/predict")
 
-        # IMPORTANT: Vérifier si c'est une maladie COVID-19
-        is_covid = "COVID" in disease.upper()
+        uncertainty = requested_uncertainty()
 
-        # Préparer la séquence
-        sequence = prepare_sequence(history)
-
-        # Faire la prédiction
-        predictions = make_prediction(sequence)
-
-        # Ajuster les prédictions selon la maladie
-        if not is_covid:
-            # Appliquer des facteurs de correction pour les autres maladies
-            # basés sur les caractéristiques connues
-            if "MonkeyPox" in disease:
-                predictions["mortality_rate"] *= 0.1  # MonkeyPox est moins mortel
-                predictions["transmission_rate"] *= 0.6  # Moins transmissible
-            elif "Influenza" in disease:
-                if "H5N1" in disease:
-                    predictions["mortality_rate"] *= 10  # H5N1 très mortel
-                    predictions["transmission_rate"] *= 0.3  # Peu transmissible
-                else:
-                    predictions["mortality_rate"] *= 0.2  # Grippe normale
-                    predictions["transmission_rate"] *= 0.5
+        # La requête est servie de bout en bout par la version active à son arrivée
+        version = active_model()
 
-            confidence = "low - modèle entraîné uniquement sur COVID-19"
-        else:
-            confidence = "high" if predictions["transmission_rate"] < 3 else "medium"
+        # Faire la prédiction, par le modèle dédié de la maladie ou ajustée
+        # (facteurs de correction pour les maladies autres que la COVID-19)
+        values, in_domain, confidence, model_versions = predict_raw_sequences(
+            raw_sequence[np.newaxis, ...], [disease], version
+        )
+        if uncertainty is not None:
+            mean, std, quantiles, confidence = score_uncertainty(
+                raw_sequence[np.newaxis, ...], [disease], version, uncertainty
+            )
+        predictions = dict(zip(TARGET_ORDER, values[0].tolist()))
+        in_domain = bool(in_domain[0])
+        confidence = str(confidence[0])
 
         # Préparer la réponse
-        response = {
-            "status": "success",
-            "disease": disease,
-            "location": data.get("location", "Unknown"),
-            "predictions": {
-                "mortality_rate": {
-                    "value": predictions["mortality_rate"],
-                    "unit": "percentage",
-                    "description": "Taux de mortalité prédit",
-                },
-                "transmission_rate": {
-                    "value": predictions["transmission_rate"],
-                    "unit": "R0",
-                    "description": "Taux de transmission prédit",
-                },
-                "spatial_spread": {
-                    "value": predictions["spatial_spread"],
-                    "unit": "correlation",
-                    "description": "Propagation spatiale (peu fiable)",
-                },
-            },
-            "metadata": {
-                "model_version": "1.0",
-                "prediction_horizon": "4 weeks",
-                "confidence": confidence,
-                "warning": "Modèle optimisé pour COVID-19" if not is_covid else None,
+        response = build_prediction_response(
+            disease, location, predictions, in_domain, confidence, missing_features, model_versions[0]
+        )
+        if uncertainty is not None:
+            response["uncertainty"] = uncertainty_fields(mean, std, quantiles, 0)
+            response["metadata"]["uncertainty"] = uncertainty.describe()
+        if week is not None:
+            response["metadata"]["as_of_week"] = week.isoformat()
+        metrics.PREDICTIONS.inc(endpoint="/predict", disease=disease_family(disease))
+
+        with stage("jsonify"):
+            return jsonify(response), 200
+
+    except (ValueError, TypeError) as e:
+        metrics.PREDICTION_ERRORS.inc(
+            endpoint="/predict", disease=disease_family(disease), type="validation_error"
+        )
+        return (
+            jsonify({"status": "error", "error": str(e), "type": "validation_error"}),
+            400,
+        )
+
+
+def validation_error(message, index=None):
+    """Erreur de validation, rapportée pour la requête entière ou pour un élément"""
+    error = {"status": "error", "error": message, "type": "validation_error"}
+    return error if index is None else {"index": index, **error}
+
+
+def broadcast_labels(values, n_items, label):
+    """Associe une maladie/localisation à chaque séquence d'un tableau .npy"""
+    if not values:
+        return ["Unknown"] * n_items
+    if len(values) == 1:
+        return values * n_items
+    if len(values) != n_items:
+        raise ValueError(f"{len(values)} valeurs pour '{label}', 1 ou {n_items} attendues")
+    return list(values)
+
+
+def check_tensor_shape(shape):
+    """Forme d'un lot reçu en tableau: (N, semaines, 29) avec au moins 12 semaines"""
+    if len(shape) != 3 or shape[2] != NUM_FEATURES:
+        raise ValueError(f"Forme invalide: {shape}, attendu (N, semaines, {NUM_FEATURES})")
+    if shape[1] < SEQUENCE_LENGTH:
+        raise ValueError(f"Historique insuffisant: {shape[1]} semaines, minimum requis: {SEQUENCE_LENGTH}")
+
+
+def collect_tensor_batch(data):
+    """
+    Lot reçu sous forme de tableau .npy (N, semaines, 29): validation vectorisée,
+    sans traitement par élément
+    """
+    sequences = data["sequences"]
+    check_tensor_shape(sequences.shape)
+    n_items = sequences.shape[0]
+    diseases = broadcast_labels(data["diseases"], n_items, "disease")
+    locations = broadcast_labels(data["locations"], n_items, "location")
+
+    raw_sequences = sequences[:, -SEQUENCE_LENGTH:, :].astype(np.float64)
+    finite = np.isfinite(raw_sequences).all(axis=(1, 2))
+    errors = {
+        int(index): validation_error("Historique invalide: valeurs manquantes ou non numériques", int(index))
+        for index in np.flatnonzero(~finite)
+    }
+    valid_indices = np.flatnonzero(finite).tolist()
+    items = [
+        {"disease": diseases[i], "location": locations[i], "missing_features": []}
+        for i in valid_indices
+    ]
+    return n_items, errors, valid_indices, raw_sequences[finite], items
+
+
+def collect_item_batch(entries):
+    """Lot reçu sous forme de liste d'objets (JSON ou msgpack): validation par élément"""
+    errors = {}
+    valid_indices = []
+    raw_sequences = []
+    items = []
+    for index, entry in enumerate(entries):
+        try:
+            if not isinstance(entry, dict):
+                raise ValueError("Élément invalide: objet JSON attendu")
+            if "history" not in entry:
+                raise ValueError("Historique manquant")
+            matrix, missing_features = build_feature_matrix(entry["history"], entry.get("shape"))
+        except (ValueError, TypeError) as e:
+            errors[index] = validation_error(str(e), index)
+            continue
+        raw_sequences.append(matrix)
+        valid_indices.append(index)
+        items.append(
+            {
+                "disease": str(entry.get("disease", "Unknown")),
+                "location": entry.get("location", "Unknown"),
+                "missing_features": missing_features,
+            }
+        )
+    raw_sequences = np.stack(raw_sequences) if raw_sequences else None
+    return len(entries), errors, valid_indices, raw_sequences, items
+
+
+def group_by_model(diseases, version):
+    """
+    Éléments d'un lot regroupés par modèle: modèle dédié de leur maladie
+    s'il existe, sinon le modèle principal. Renvoie {modèle: indices}.
+    """
+    models = {disease: resolve_model(disease, version) for disease in set(diseases)}
+    groups = {}
+    for index, disease in enumerate(diseases):
+        groups.setdefault(models[disease], []).append(index)
+    return groups
+
+
+def score_raw_sequences(raw_sequences, diseases, version):
+    """
+    Normalisation, prédiction et dénormalisation d'un tenseur brut (N, 12, 29)
+    en un seul passage par modèle, puis corrections par maladie sous forme
+    d'opérations sur tableaux. Renvoie les valeurs (N, 3), l'indicateur de
+    domaine, la confiance et la version du modèle de chaque élément.
+    """
+    n_sequences = len(raw_sequences)
+    values = np.empty((n_sequences, len(TARGET_ORDER)))
+    dedicated = np.zeros(n_sequences, dtype=bool)
+    model_versions = np.empty(n_sequences, dtype=object)
+    groups = group_by_model(diseases, version)
+    for model, indices in groups.items():
+        rows = slice(None) if len(groups) == 1 else indices
+        sequences = normalize_sequences(raw_sequences[rows], model)
+        values[rows] = make_predictions(sequences, model)
+        dedicated[rows] = model.dedicated_to is not None
+        model_versions[rows] = model.version
+    return (*apply_disease_corrections(values, diseases, dedicated), model_versions)
+
+
+def apply_disease_corrections(values, diseases, dedicated=False):
+    """
+    Corrections par maladie appliquées en place aux prédictions dénormalisées
+    (N, 3), sauf pour les éléments servis par un modèle dédié (`dedicated`,
+    booléen ou masque). Renvoie les valeurs, l'indicateur de domaine (COVID-19
+    ou modèle dédié) et la confiance.
+    """
+    dedicated = np.broadcast_to(np.asarray(dedicated, dtype=bool), (len(values),))
+    values[:, :2] *= np.where(dedicated[:, np.newaxis], 1.0, disease_correction_factors(diseases))
+    in_domain = np.array(["COVID" in disease.upper() for disease in diseases]) | dedicated
+    confidence = np.where(
+        in_domain,
+        np.where(values[:, 1] < 3, "high", "medium"),
+        LOW_CONFIDENCE,
+    )
+    return values, in_domain, confidence
+
+
+def predict_raw_sequences(raw_sequences, diseases, version=None):
+    """
+    Comme score_raw_sequences, en servant depuis le cache les fenêtres déjà
+    prédites: seules les fenêtres absentes du cache passent par le modèle
+    """
+    version = version or active_model()
+    if prediction_cache is None:
+        return score_raw_sequences(raw_sequences, diseases, version)
+
+    n_sequences = len(raw_sequences)
+    values = np.empty((n_sequences, len(TARGET_ORDER)))
+    in_domain = np.empty(n_sequences, dtype=bool)
+    confidence = np.empty(n_sequences, dtype=object)
+    model_versions = np.empty(n_sequences, dtype=object)
+
+    keys = [
+        prediction_cache.make_key(raw_sequences[i], diseases[i], version.version)
+        for i in range(n_sequences)
+    ]
+    misses = []
+    for i, key in enumerate(keys):
+        cached = prediction_cache.get(key)
+        if cached is None:
+            misses.append(i)
+        else:
+            values[i], in_domain[i], confidence[i], model_versions[i] = cached
+
+    if misses:
+        miss_values, miss_in_domain, miss_confidence, miss_versions = score_raw_sequences(
+            raw_sequences[misses], [diseases[i] for i in misses], version
+        )
+        for row, i in enumerate(misses):
+            values[i], in_domain[i], confidence[i] = miss_values[row], miss_in_domain[row], miss_confidence[row]
+            model_versions[i] = miss_versions[row]
+            prediction_cache.put(
+                keys[i],
+                (miss_values[row].copy(), bool(miss_in_domain[row]), str(miss_confidence[row]), miss_versions[row]),
+            )
+
+    return values, in_domain, confidence, model_versions
+
+
+def requested_uncertainty():
+    """
+    Mode incertitude demandé: ?uncertainty=K passes (ou ?uncertainty=1 pour
+    UNCERTAINTY_SAMPLES) et ?uncertainty_method; None s'il n'est pas demandé
+    """
+    value = request.args.get("uncertainty", "").lower()
+    if value in ("", "0", "false"):
+        return None
+    if value in ("1", "true"):
+        samples = UNCERTAINTY_SAMPLES
+    else:
+        try:
+            samples = int(value)
+        except ValueError:
+            raise ValueError(f"uncertainty doit être un nombre de passes: '{value}'")
+    if not 2 <= samples <= UNCERTAINTY_MAX_SAMPLES:
+        raise ValueError(f"Nombre de passes invalide: {samples} (entre 2 et {UNCERTAINTY_MAX_SAMPLES})")
+    return UncertaintyRequest(samples, request.args.get("uncertainty_method", UNCERTAINTY_METHOD).lower())
+
+
+def score_uncertainty(raw_sequences, diseases, version, spec):
+    """
+    Intervalles de prédiction d'un tenseur brut (N, 12, 29): K passes
+    stochastiques par modèle en un seul appel (K·N, 12, 29), dénormalisées,
+    corrigées par maladie, puis résumées. Renvoie moyenne et écart-type
+    (N, 3), quantiles (Q, N, 3) et confiance tirée de la dispersion.
+    Les passes ne sont ni mises en cache ni micro-batchées.
+    """
+    n_sequences = len(raw_sequences)
+    samples = np.empty((spec.samples, n_sequences, len(TARGET_ORDER)))
+    dedicated = np.zeros(n_sequences, dtype=bool)
+    methods = set()
+    # Éléments par appel au modèle: K·paquet <= UNCERTAINTY_MAX_SEQUENCES
+    step = max(1, UNCERTAINTY_MAX_SEQUENCES // spec.samples)
+    started = time.perf_counter()
+    groups = group_by_model(diseases, version)
+    for model, indices in groups.items():
+        rows = slice(None) if len(groups) == 1 else indices
+        method = resolve_method(spec.method, model.model)
+        sequences = normalize_sequences(raw_sequences[rows], model)
+        outputs = []
+        for start in range(0, len(sequences), step):
+            chunk = sequences[start:start + step]
+            metrics.INFERENCE_BATCH_SIZE.observe(spec.samples * len(chunk))
+            with stage("model"):
+                normalized = stochastic_passes(model.model, chunk, spec.samples, method, UNCERTAINTY_NOISE)
+            with stage("inverse_transform"):
+                real = model.scaler_targets.inverse_transform(normalized)
+            outputs.append(real.reshape(spec.samples, len(chunk), -1))
+        samples[:, rows] = np.concatenate(outputs, axis=1)
+        dedicated[rows] = model.dedicated_to is not None
+        methods.add(method)
+    duration = time.perf_counter() - started
+    spec.record(duration, n_sequences, methods)
+    metrics.UNCERTAINTY_DURATION.observe(duration, samples=str(spec.samples))
+
+    # Mêmes corrections par maladie que la prédiction, sur chaque passe
+    samples[:, :, :2] *= np.where(dedicated[:, np.newaxis], 1.0, disease_correction_factors(diseases))
+    mean, std, quantiles = summarize(samples)
+    in_domain = np.array(["COVID" in disease.upper() for disease in diseases]) | dedicated
+    # Confiance: dispersion de la mortalité et de la transmission
+    confidence = confidence_levels(mean[:, :2], std[:, :2], in_domain)
+    return mean, std, quantiles, confidence
+
+
+def uncertainty_fields(mean, std, quantiles, row):
+    """Intervalles d'un élément: moyenne, écart-type et quantiles (p05, p50, p95) par cible"""
+    return {
+        target: {
+            "mean": round(float(mean[row, column]), 4),
+            "std": round(float(std[row, column]), 4),
+            "quantiles": {
+                f"p{round(q * 100):02d}": round(float(quantiles[k, row, column]), 4)
+                for k, q in enumerate(QUANTILES)
             },
         }
+        for column, target in enumerate(TARGET_ORDER)
+    }
+
+
+def score_items(
+    n_items, errors, valid_indices, raw_sequences, items, endpoint, offset=0, compact=False, uncertainty=None
+):
+    """
+    Résultats d'un lot validé (collect_tensor_batch ou collect_item_batch),
+    dans l'ordre des éléments: erreur de validation ou prédiction. Les index
+    rapportés sont décalés de `offset` (paquet d'un lot plus grand). Avec
+    `uncertainty` (UncertaintyRequest), chaque prédiction a ses intervalles.
+    """
+    results = [
+        validation_error(errors[index]["error"], offset + index) if index in errors else None
+        for index in range(n_items)
+    ]
+    if valid_indices:
+        diseases = [item["disease"] for item in items]
+        version = active_model()
+        values, in_domain, confidence, model_versions = predict_raw_sequences(raw_sequences, diseases, version)
+        if uncertainty is not None:
+            mean, std, quantiles, confidence = score_uncertainty(raw_sequences, diseases, version, uncertainty)
+
+        for row, index in enumerate(valid_indices):
+            item = items[row]
+            predictions = dict(zip(TARGET_ORDER, values[row].tolist()))
+            response = build_prediction_response(
+                item["disease"],
+                item["location"],
+                predictions,
+                bool(in_domain[row]),
+                str(confidence[row]),
+                item["missing_features"],
+                model_versions[row],
+                compact,
+            )
+            if uncertainty is not None:
+                response["uncertainty"] = uncertainty_fields(mean, std, quantiles, row)
+            results[index] = {"index": offset + index, **response}
+
+        for family, count in Counter(disease_family(disease) for disease in diseases).items():
+            metrics.PREDICTIONS.inc(count, endpoint=endpoint, disease=family)
+    return results
+
+
+def wants_ndjson():
+    """Réponse NDJSON demandée: corps NDJSON, Accept: application/x-ndjson ou ?format=ndjson"""
+    return (
+        request.mimetype == NDJSON_MIMETYPE
+        or request.args.get("format") == "ndjson"
+        or request.accept_mimetypes.best == NDJSON_MIMETYPE
+    )
+
+
+def payload_chunks(data, size):
+    """
+    Découpe un lot décodé (.npy, JSON ou msgpack) en paquets de `size`
+    éléments. La forme du lot est vérifiée tout de suite; chaque paquet est
+    validé au fil de l'itération: générateur de (décalage, lot validé).
+    """
+    if not isinstance(data, dict) or not data:
+        raise ValueError("Aucune donnée reçue")
+    if "sequences" in data:
+        sequences = data["sequences"]
+        check_tensor_shape(sequences.shape)
+        n_items = len(sequences)
+        diseases = broadcast_labels(data["diseases"], n_items, "disease")
+        locations = broadcast_labels(data["locations"], n_items, "location")
+
+        def collect(offset):
+            return collect_tensor_batch(
+                {
+                    "sequences": sequences[offset:offset + size],
+                    "diseases": diseases[offset:offset + size],
+                    "locations": locations[offset:offset + size],
+                }
+            )
+
+    else:
+        entries = data.get("predictions")
+        if not isinstance(entries, list) or not entries:
+            raise ValueError("Liste 'predictions' manquante ou vide")
+        n_items = len(entries)
+
+        def collect(offset):
+            return collect_item_batch(entries[offset:offset + size])
+
+    return ((offset, collect(offset)) for offset in range(0, n_items, size))
+
+
+def ndjson_chunks(size):
+    """Paquets (décalage, lot validé) d'un corps NDJSON (un élément par ligne), lus au fil de la réception"""
+    lines = (line for line in iter_request_lines() if line.strip())
+    offset = 0
+    while True:
+        entries = [parse_ndjson_line(line) for line in itertools.islice(lines, size)]
+        if not entries:
+            return
+        yield offset, collect_item_batch(entries)
+        offset += len(entries)
+
+
+def stream_batch(chunks, compact, uncertainty=None):
+    """
+    Réponse NDJSON d'un lot: chaque paquet est prédit puis envoyé dès qu'il
+    est prêt, une ligne par élément (format des `results` de /predict/batch),
+    suivie d'une ligne de synthèse. Seul le paquet en cours est en mémoire.
+    """
+
+    def generate():
+        count = succeeded = 0
+        status = None
+        try:
+            for offset, (n_items, errors, valid_indices, raw_sequences, items) in chunks:
+                if errors:
+                    metrics.PREDICTION_ERRORS.inc(
+                        len(errors), endpoint="/predict/batch", disease="other", type="validation_error"
+                    )
+                results = score_items(
+                    n_items, errors, valid_indices, raw_sequences, items, "/predict/batch", offset, compact,
+                    uncertainty,
+                )
+                count += n_items
+                succeeded += len(valid_indices)
+                yield "".join(json.dumps(result, ensure_ascii=False) + "\n" for result in results)
+        except (ModelUnavailable, SchedulerOverloaded, InferenceTimeout) as e:
+            status = "error"
+            error = {"status": "error", "error": str(e) or "Délai d'inférence dépassé", "type": "unavailable"}
+            yield json.dumps(error, ensure_ascii=False) + "\n"
+        metrics.REQUEST_BATCH_SIZE.observe(count, endpoint="/predict/batch")
+        summary = {
+            "status": status or ("success" if succeeded == count else "partial"),
+            "count": count,
+            "succeeded": succeeded,
+            "failed": count - succeeded,
+        }
+        if uncertainty is not None:
+            summary["uncertainty"] = uncertainty.describe()
+        yield json.dumps({"summary": summary}) + "\n"
+
+    return streaming_response(generate)
 
+
+@app.route("/predict/batch", methods=["POST"])
+@limit_concurrency
+@profile_on_demand
+def predict_batch():
+    """
+    Prédictions multiples vectorisées: un seul tenseur (N, 12, 29), une seule
+    normalisation, une seule passe avant et une seule dénormalisation.
+    Les erreurs de validation sont rapportées par élément. En NDJSON, le lot
+    est traité et envoyé par paquets (voir stream_batch), sans MAX_BATCH_SIZE.
+    """
+    compact = request.args.get("compact", "").lower() in ("1", "true")
+    try:
+        uncertainty = requested_uncertainty()
+        if uncertainty is not None:
+            # Méthode vérifiée avant la réponse (en continu, elle ne peut plus être une 400)
+            resolve_method(uncertainty.method, active_model().model)
+    except ValueError as e:
+        return jsonify(validation_error(str(e))), 400
+    if wants_ndjson():
+        try:
+            if request.mimetype == NDJSON_MIMETYPE:
+                chunks = ndjson_chunks(BATCH_STREAM_CHUNK_SIZE)
+            else:
+                chunks = payload_chunks(read_request_payload(), BATCH_STREAM_CHUNK_SIZE)
+        except ValueError as e:
+            metrics.PREDICTION_ERRORS.inc(endpoint="/predict/batch", disease="other", type="validation_error")
+            return jsonify(validation_error(str(e))), 400
+        return stream_batch(chunks, compact, uncertainty)
+
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
+            return jsonify({"error": "Aucune donnée reçue"}), 400
+
+        if "sequences" in data:
+            with stage("prepare"):
+                n_items, errors, valid_indices, raw_sequences, items = collect_tensor_batch(data)
+        else:
+            entries = data.get("predictions")
+            if not isinstance(entries, list) or not entries:
+                return jsonify({"error": "Liste 'predictions' manquante ou vide"}), 400
+            if len(entries) > MAX_BATCH_SIZE:
+                raise ValueError(f"Trop d'éléments: {len(entries)}, maximum autorisé: {MAX_BATCH_SIZE}")
+            with stage("prepare"):
+                n_items, errors, valid_indices, raw_sequences, items = collect_item_batch(entries)
+    except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint="/predict/batch", disease="other", type="validation_error")
+        return jsonify(validation_error(str(e))), 400
+
+    if n_items > MAX_BATCH_SIZE:
+        return (
+            jsonify(validation_error(f"Trop d'éléments: {n_items}, maximum autorisé: {MAX_BATCH_SIZE}")),
+            400,
+        )
+
+    metrics.REQUEST_BATCH_SIZE.observe(n_items, endpoint="/predict/batch")
+    for index in errors:
+        metrics.PREDICTION_ERRORS.inc(
+            endpoint="/predict/batch",
+            disease=disease_family(requested_disease(data, index)),
+            type="validation_error",
+        )
+
+    results = score_items(
+        n_items, errors, valid_indices, raw_sequences, items, "/predict/batch",
+        compact=compact, uncertainty=uncertainty,
+    )
+    n_errors = n_items - len(valid_indices)
+    response = {
+        "status": "success" if n_errors == 0 else "partial",
+        "count": n_items,
+        "succeeded": len(valid_indices),
+        "failed": n_errors,
+        "results": results,
+    }
+    if uncertainty is not None:
+        response["uncertainty"] = uncertainty.describe()
+    with stage("jsonify"):
         return jsonify(response), 200
 
+
+@app.route("/predict/week", methods=["POST"])
+@limit_concurrency
+def predict_week():
+    """
+    Prédiction de toutes les localisations d'une maladie (ou de `locations`)
+    à une semaine donnée: les fenêtres sont lues dans le feature store et
+    prédites en un seul passage
+    """
+    disease = "Unknown"
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
+            return jsonify({"error": "Aucune donnée reçue"}), 400
+        disease = str(data.get("disease", "Unknown"))
+        if "as_of_week" not in data:
+            raise ValueError("Champ 'as_of_week' manquant")
+        locations = data.get("locations")
+        if locations is not None:
+            if not isinstance(locations, list) or not locations:
+                raise ValueError("'locations' doit être une liste non vide")
+            if len(locations) > MAX_BATCH_SIZE:
+                raise ValueError(f"Trop de localisations: {len(locations)}, maximum autorisé: {MAX_BATCH_SIZE}")
+
+        series = store_disease(disease)
+        week = parse_week(data["as_of_week"])
+        with stage("prepare"):
+            served, raw_sequences, errors = feature_store.windows_for_week(series, week, locations)
+        metrics.REQUEST_BATCH_SIZE.observe(len(served), endpoint="/predict/week")
     except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(
+            endpoint="/predict/week", disease=disease_family(disease), type="validation_error"
+        )
+        return jsonify(validation_error(str(e))), 400
+
+    version = active_model()
+    results = []
+    if served:
+        values, in_domain, confidence, model_versions = predict_raw_sequences(
+            np.asarray(raw_sequences, dtype=np.float64), [disease] * len(served), version
+        )
+        for row, location in enumerate(served):
+            predictions = dict(zip(TARGET_ORDER, values[row].tolist()))
+            results.append(
+                build_prediction_response(
+                    disease, location, predictions, bool(in_domain[row]), str(confidence[row]), [],
+                    model_versions[row],
+                )
+            )
+        metrics.PREDICTIONS.inc(len(served), endpoint="/predict/week", disease=disease_family(disease))
+    if errors:
+        metrics.PREDICTION_ERRORS.inc(
+            len(errors), endpoint="/predict/week", disease=disease_family(disease), type="validation_error"
+        )
+
+    with stage("jsonify"):
         return (
-            jsonify({"status": "error", "error": str(e), "type": "validation_error"}),
+            jsonify(
+                {
+                    "status": "success" if not errors else "partial",
+                    "disease": disease,
+                    "as_of_week": week.isoformat(),
+                    "count": len(served) + len(errors),
+                    "succeeded": len(served),
+                    "failed": len(errors),
+                    "results": results,
+                    "errors": [
+                        {"location": location, **validation_error(message)} for location, message in errors.items()
+                    ],
+                }
+            ),
+            200,
+        )
+
+
+session_store = SessionStore(
+    SESSION_DB_PATH,
+    max_sessions=SESSION_MAX_COUNT,
+    idle_timeout_s=SESSION_IDLE_TIMEOUT_S,
+    window_shape=(SEQUENCE_LENGTH, NUM_FEATURES),
+)
+stream_slots = threading.BoundedSemaphore(STREAM_MAX_CONNECTIONS) if STREAM_MAX_CONNECTIONS > 0 else None
+
+
+def parse_week_features(week):
+    """Semaine poussée dans une session: objet {feature: valeur} ou liste des 29 valeurs dans l'ordre FEATURE_ORDER"""
+    if isinstance(week, dict):
+        matrix, missing = _rows_to_matrix([week], weeks=1)
+        missing_features = [feature for feature in FEATURE_ORDER if feature in missing]
+    elif isinstance(week, list):
+        if len(week) != NUM_FEATURES:
+            raise ValueError(f"Semaine invalide: {len(week)} valeurs, {NUM_FEATURES} attendues")
+        matrix, missing_features = _as_float64([week], "Semaine invalide"), []
+    else:
+        raise ValueError(f"Semaine invalide: objet {{feature: valeur}} ou liste de {NUM_FEATURES} valeurs attendu")
+    if not np.isfinite(matrix).all():
+        raise ValueError("Semaine invalide: valeurs manquantes ou non numériques")
+    return matrix[0], missing_features
+
+
+def open_window(data, version):
+    """
+    Tampon initial d'une session: l'historique envoyé (mêmes formats que
+    /predict) ou la fenêtre du feature store à `as_of_week`
+    """
+    if "history" in data:
+        raw, missing_features = build_feature_matrix(data["history"], data.get("shape"))
+    elif "as_of_week" in data:
+        raw, _ = lookup_window(str(data.get("disease", "Unknown")), data.get("location", "Unknown"), data["as_of_week"])
+        missing_features = []
+    else:
+        raise ValueError("Historique manquant")
+    normalized = normalize_sequences(raw[np.newaxis, ...], version)[0]
+    return RingWindow(raw, normalized, version.version), missing_features
+
+
+def predict_session_window(ring, disease, location, missing_features, version):
+    """Prédiction de la fenêtre courante d'une session, au format de /predict"""
+    values = make_predictions(ring.window()[np.newaxis, ...], version)
+    values, in_domain, confidence = apply_disease_corrections(values, [disease], version.dedicated_to is not None)
+    response = build_prediction_response(
+        disease,
+        location,
+        dict(zip(TARGET_ORDER, values[0].tolist())),
+        bool(in_domain[0]),
+        str(confidence[0]),
+        missing_features,
+        version.version,
+    )
+    response["session"] = {"weeks": ring.weeks}
+    return response
+
+
+@app.route("/sessions", methods=["POST"])
+@limit_concurrency
+def open_session():
+    """
+    Ouvre une session sur une fenêtre initiale de 12 semaines et renvoie sa
+    première prédiction; les semaines suivantes sont poussées une par une
+    """
+    disease = "Unknown"
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
+            return jsonify({"error": "Aucune donnée reçue"}), 400
+        disease = str(data.get("disease", "Unknown"))
+        location = str(data.get("location", "Unknown"))
+        version = resolve_model(disease)
+        with stage("prepare"):
+            ring, missing_features = open_window(data, version)
+    except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint="/sessions", disease=disease_family(disease), type="validation_error")
+        return jsonify(validation_error(str(e))), 400
+
+    session_id = session_store.create(disease, location, ring.raw, ring.normalized, version.version)
+    response = predict_session_window(ring, disease, location, missing_features, version)
+    response["session"].update(session_id=session_id, idle_timeout_s=SESSION_IDLE_TIMEOUT_S)
+    metrics.PREDICTIONS.inc(endpoint="/sessions", disease=disease_family(disease))
+    with stage("jsonify"):
+        return jsonify(response), 201
+
+
+@app.route("/sessions/<session_id>/weeks", methods=["POST"])
+@limit_concurrency
+def push_session_week(session_id):
+    """
+    Pousse une semaine ({"week": {feature: valeur}} ou {"week": [29 valeurs]})
+    et renvoie la prédiction sur la fenêtre mise à jour
+    """
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or "week" not in data:
+            raise ValueError("Champ 'week' manquant")
+        with stage("prepare"):
+            raw_week, missing_features = parse_week_features(data["week"])
+    except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint="/sessions/weeks", disease="other", type="validation_error")
+        return jsonify(validation_error(str(e))), 400
+
+    version = None
+
+    def scaler_for(disease):
+        # Appelé dans la transaction de la session: maladie lue et scaler choisi ensemble
+        nonlocal version
+        version = resolve_model(disease)
+        return version.version, lambda rows: scale_features(rows, version)
+
+    disease, location, ring = session_store.push(session_id, raw_week, scaler_for)
+    response = predict_session_window(ring, disease, location, missing_features, version)
+    response["session"]["session_id"] = session_id
+    metrics.PREDICTIONS.inc(endpoint="/sessions/weeks", disease=disease_family(disease))
+    with stage("jsonify"):
+        return jsonify(response), 200
+
+
+@app.route("/sessions/<session_id>", methods=["GET"])
+def describe_session(session_id):
+    """État d'une session (sans la fenêtre)"""
+    return jsonify({"status": "success", **session_store.get(session_id)})
+
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+def close_session(session_id):
+    """Ferme une session"""
+    session_store.close(session_id)
+    return jsonify({"status": "success", "session_id": session_id})
+
+
+def streaming_response(generate):
+    """
+    Réponse NDJSON produite au fil de l'eau par generate(). Chaque réponse en
+    cours occupe un thread: au plus STREAM_MAX_CONNECTIONS par processus (503 au-delà)
+    """
+    if stream_slots is not None and not stream_slots.acquire(blocking=False):
+        response = jsonify(
+            {"status": "error", "error": "Trop de connexions en continu, réessayez plus tard", "type": "overloaded"}
+        )
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    response = Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+    if stream_slots is not None:
+        response.call_on_close(stream_slots.release)
+    return response
+
+
+def iter_request_lines():
+    """
+    Lignes du corps de la requête, lues par readline() sur le flux WSGI.
+    Elles arrivent au fil de la réception si le serveur transmet le corps
+    en continu (voir readme, POST /predict/stream)
+    """
+    yield from iter(request.stream.readline, b"")
+
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """
+    Variante en continu sur une seule connexion, en NDJSON: la première ligne
+    ouvre la fenêtre (comme POST /sessions), chaque ligne suivante pousse une
+    semaine ({"week": ...}). Une ligne de prédiction est renvoyée pour chaque
+    ligne reçue. Le tampon circulaire vit en mémoire le temps de la connexion.
+    """
+
+    def generate():
+        ring = None
+        disease = location = "Unknown"
+        for line in iter_request_lines():
+            if not line.strip():
+                continue
+            try:
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    raise ValueError("Ligne invalide: JSON attendu")
+                if not isinstance(message, dict):
+                    raise ValueError("Ligne invalide: objet JSON attendu")
+                if ring is None:
+                    disease = str(message.get("disease", "Unknown"))
+                    location = str(message.get("location", "Unknown"))
+                    version = resolve_model(disease)
+                    ring, missing_features = open_window(message, version)
+                else:
+                    version = resolve_model(disease)
+                    if "week" not in message:
+                        raise ValueError("Champ 'week' manquant")
+                    raw_week, missing_features = parse_week_features(message["week"])
+                    ring.push(raw_week, version.version, lambda rows: scale_features(rows, version))
+                result = predict_session_window(ring, disease, location, missing_features, version)
+                metrics.PREDICTIONS.inc(endpoint="/predict/stream", disease=disease_family(disease))
+            except ValueError as e:
+                metrics.PREDICTION_ERRORS.inc(
+                    endpoint="/predict/stream", disease=disease_family(disease), type="validation_error"
+                )
+                result = validation_error(str(e))
+            except (ModelUnavailable, FeatureStoreUnavailable, SchedulerOverloaded, InferenceTimeout) as e:
+                result = {"status": "error", "error": str(e) or "Délai d'inférence dépassé", "type": "unavailable"}
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+
+    return streaming_response(generate)
+
+
+job_store = JobStore(JOB_DIR, retention_s=JOB_RETENTION_S)
+
+
+def job_input_path(name):
+    """Fichier d'entrée référencé par un travail: uniquement sous JOB_INPUT_DIR"""
+    root = os.path.realpath(JOB_INPUT_DIR)
+    path = os.path.realpath(os.path.join(root, str(name)))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise ValueError(f"Fichier introuvable dans {JOB_INPUT_DIR}: '{name}'")
+    return path
+
+
+def write_job_labels(path, diseases, locations, n_items):
+    """Maladie et localisation de chaque séquence d'un .npy reçu, au format <nom>_scenarios.csv du générateur"""
+    diseases = broadcast_labels(diseases, n_items, "disease")
+    locations = broadcast_labels(locations, n_items, "location")
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["scenario", "disease", "location"])
+        writer.writerows(zip(range(n_items), diseases, locations))
+
+
+def count_lines(path):
+    with open(path, "rb") as f:
+        return sum(1 for line in f if line.strip())
+
+
+def build_job_source(data, directory):
+    """
+    Entrée d'un travail: tableau .npy reçu ou liste 'predictions' (écrits
+    dans le dossier du travail), ou fichier de JOB_INPUT_DIR ({"file": ...},
+    .npy du générateur avec son <nom>_scenarios.csv, ou .jsonl). Renvoie la
+    description de l'entrée et le nombre d'éléments.
+    """
+    if "sequences" in data:
+        sequences = data["sequences"]
+        check_tensor_shape(sequences.shape)
+        path = os.path.join(directory, "input.npy")
+        np.save(path, sequences)
+        labels = os.path.join(directory, "input_scenarios.csv")
+        write_job_labels(labels, data["diseases"], data["locations"], sequences.shape[0])
+        return {"format": "npy", "path": path, "labels": labels}, sequences.shape[0]
+
+    if "file" in data:
+        path = job_input_path(data["file"])
+        if path.endswith(".jsonl"):
+            return {"format": "jsonl", "path": path}, count_lines(path)
+        if not path.endswith(".npy"):
+            raise ValueError("Format de fichier non supporté (attendu: .npy ou .jsonl)")
+        try:
+            sequences = np.load(path, mmap_mode="r", allow_pickle=False)
+        except Exception:
+            raise ValueError(f"Fichier .npy invalide: '{data['file']}'")
+        check_tensor_shape(sequences.shape)
+        labels = os.path.splitext(path)[0] + "_scenarios.csv"
+        if os.path.isfile(labels):
+            if count_lines(labels) - 1 != sequences.shape[0]:
+                raise ValueError(f"{os.path.basename(labels)} ne décrit pas les {sequences.shape[0]} séquences")
+        else:
+            labels = os.path.join(directory, "input_scenarios.csv")
+            write_job_labels(
+                labels, [str(data.get("disease", "Unknown"))], [str(data.get("location", "Unknown"))],
+                sequences.shape[0],
+            )
+        return {"format": "npy", "path": path, "labels": labels}, sequences.shape[0]
+
+    entries = data.get("predictions")
+    if not isinstance(entries, list) or not entries:
+        raise ValueError("Liste 'predictions' ou champ 'file' manquant")
+    path = os.path.join(directory, "input.jsonl")
+    with open(path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    return {"format": "jsonl", "path": path}, len(entries)
+
+
+def parse_ndjson_line(line):
+    """Élément d'un lot JSON Lines (None si la ligne n'est pas du JSON: rapporté comme élément invalide)"""
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def iter_job_chunks(job, first_chunk):
+    """
+    Résultats des paquets d'un travail à partir de first_chunk. Chaque paquet
+    est lu depuis l'entrée (.npy projeté en mémoire, ou JSON Lines lu ligne
+    par ligne), validé et prédit comme un lot /predict/batch: la mémoire ne
+    dépend que de la taille des paquets.
+    """
+    source, size, total = job["source"], job["chunk_size"], job["total"]
+    start = first_chunk * size
+    if source["format"] == "npy":
+        sequences = np.load(source["path"], mmap_mode="r", allow_pickle=False)
+        with open(source["labels"], newline="", encoding="utf-8") as f:
+            scenarios = itertools.islice(csv.DictReader(f), start, None)
+            for offset in range(start, total, size):
+                labels = list(itertools.islice(scenarios, size))
+                data = {
+                    "sequences": sequences[offset:offset + size],
+                    "diseases": [row["disease"] for row in labels],
+                    "locations": [row["location"] for row in labels],
+                }
+                yield score_items(*collect_tensor_batch(data), "/jobs", offset)
+    else:
+        with open(source["path"], "rb") as f:
+            lines = itertools.islice((line for line in f if line.strip()), start, None)
+            for offset in range(start, total, size):
+                entries = [parse_ndjson_line(line) for line in itertools.islice(lines, size)]
+                yield score_items(*collect_item_batch(entries), "/jobs", offset)
+
+
+# Threads de traitement des travaux (démarrés par start_background_tasks);
+# un travail est remis en file si le modèle n'est pas disponible
+job_runner = JobRunner(
+    job_store,
+    iter_job_chunks,
+    workers=JOB_WORKERS,
+    lease_s=JOB_LEASE_S,
+    retry_on=(ModelUnavailable, SchedulerOverloaded, InferenceTimeout),
+)
+
+
+def describe_job(job):
+    """État d'un travail: progression, compteurs et premier paquet de résultats"""
+    processed = min(job["chunks_done"] * job["chunk_size"], job["total"])
+    elapsed = (job["finished_at"] or time.time()) - job["started_at"] if job["started_at"] else None
+    return {
+        "job_id": job["id"],
+        "state": job["state"],
+        "total": job["total"],
+        "processed": processed,
+        "progress": round(processed / job["total"], 4),
+        "succeeded": job["succeeded"],
+        "failed": job["failed"],
+        "chunk_size": job["chunk_size"],
+        "chunks": job["chunks"],
+        "chunks_done": job["chunks_done"],
+        "items_per_s": round(processed / elapsed, 1) if elapsed else None,
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "results": f"/jobs/{job['id']}/results?chunk=0",
+    }
+
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    Soumet un travail de prédiction en masse (mêmes formats que
+    /predict/batch, sans limite de MAX_BATCH_SIZE, ou {"file": ...}) et
+    renvoie son identifiant (HTTP 202) sans attendre les prédictions
+    """
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
+            return jsonify({"error": "Aucune donnée reçue"}), 400
+        job_id, directory = job_store.new_job()
+        try:
+            with stage("prepare"):
+                source, total = build_job_source(data, directory)
+            if total == 0:
+                raise ValueError("Aucun élément à prédire")
+            if total > JOB_MAX_ITEMS:
+                raise ValueError(f"Trop d'éléments: {total}, maximum autorisé: {JOB_MAX_ITEMS}")
+        except BaseException:
+            shutil.rmtree(directory, ignore_errors=True)
+            raise
+    except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(endpoint="/jobs", disease="other", type="validation_error")
+        return jsonify(validation_error(str(e))), 400
+
+    job_store.create(job_id, source, total, JOB_CHUNK_SIZE)
+    metrics.REQUEST_BATCH_SIZE.observe(total, endpoint="/jobs")
+    job_runner.notify()
+    response = jsonify({"status": "accepted", "job": describe_job(job_store.get(job_id))})
+    response.headers["Location"] = f"/jobs/{job_id}"
+    return response, 202
+
+
+@app.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """Progression d'un travail"""
+    return jsonify({"status": "success", "job": describe_job(job_store.get(job_id))})
+
+
+@app.route("/jobs/<job_id>/results", methods=["GET"])
+def job_results(job_id):
+    """Résultats d'un paquet (?chunk=k, à partir de 0), au format des résultats de /predict/batch"""
+    chunk = request.args.get("chunk", default=0, type=int)
+    job = job_store.get(job_id)
+    if not 0 <= chunk < job["chunks"]:
+        return jsonify(validation_error(f"Paquet {chunk} inexistant (0 à {job['chunks'] - 1})")), 400
+    results = job_store.chunk_results(job_id, chunk)
+    if results is None:
+        response = jsonify(
+            {"status": "error", "error": "Paquet pas encore traité", "type": "not_ready", "job": describe_job(job)}
+        )
+        response.headers["Retry-After"] = "1"
+        return response, 409
+    with stage("jsonify"):
+        return jsonify(
+            {
+                "status": "success",
+                "job_id": job_id,
+                "chunk": chunk,
+                "chunks": job["chunks"],
+                "count": len(results),
+                "results": results,
+                "next_chunk": chunk + 1 if chunk + 1 < job["chunks"] else None,
+            }
+        )
+
+
+@app.route("/jobs/<job_id>", methods=["DELETE"])
+def delete_job(job_id):
+    """Annule un travail et supprime ses résultats"""
+    job_store.delete(job_id)
+    return jsonify({"status": "success", "job_id": job_id})
+
+
+@app.route("/metrics", methods=["GET"])
+def metrics_endpoint():
+    """Métriques au format d'exposition Prometheus (propres à ce processus)"""
+    return Response(metrics.registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def rolling_windows(normalized_history, stride=1):
+    """
+    Fenêtres glissantes (W, 12, 29) d'un historique (semaines, 29): vue
+    à pas mémoire (strides), sans copie, une fenêtre sur `stride`
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(
+        normalized_history, (SEQUENCE_LENGTH, NUM_FEATURES)
+    )[:, 0]
+    return windows[::stride]
+
+
+def score_rolling_windows(raw_history, disease, stride, version):
+    """
+    Prédit chaque fenêtre de 12 semaines d'un historique brut. L'historique
+    entier est normalisé en un seul appel au scaler (transformation par
+    feature, donc identique à la normalisation de chaque fenêtre), puis les
+    fenêtres sont prédites par tranches de ROLLING_CHUNK_SIZE.
+    """
+    with stage("scaler"):
+        normalized = version.scaler_features.transform(raw_history)
+    windows = rolling_windows(normalized, stride)
+
+    # Seule la tranche en cours est copiée en mémoire contiguë pour le modèle
+    values = np.concatenate(
+        [
+            make_predictions(np.ascontiguousarray(windows[start:start + ROLLING_CHUNK_SIZE]), version)
+            for start in range(0, len(windows), ROLLING_CHUNK_SIZE)
+        ]
+    )
+    return apply_disease_corrections(values, [disease] * len(values), version.dedicated_to is not None)
+
+
+@app.route("/predict/rolling", methods=["POST"])
+@limit_concurrency
+def predict_rolling():
+    """
+    Prédiction sur toutes les fenêtres glissantes de 12 semaines d'un long
+    historique (ou une sur `stride`), pour le backtesting en une requête
+    """
+    disease = "Unknown"
+    try:
+        data = read_request_payload()
+        if not isinstance(data, dict) or not data:
+            return jsonify({"error": "Aucune donnée reçue"}), 400
+
+        if "sequences" in data:
+            # Tableau .npy (semaines, 29); maladie, localisation et pas dans l'URL
+            history = data["sequences"]
+            if history.ndim == 3 and history.shape[0] == 1:
+                history = history[0]
+            disease = data["diseases"][0] if data["diseases"] else "Unknown"
+            location = data["locations"][0] if data["locations"] else "Unknown"
+            stride = request.args.get("stride", 1)
+        elif "history" in data:
+            history = data["history"]
+            disease = str(data.get("disease", "Unknown"))
+            location = data.get("location", "Unknown")
+            stride = data.get("stride", 1)
+        else:
+            return jsonify({"error": "Historique manquant"}), 400
+
+        try:
+            stride = int(stride)
+        except (TypeError, ValueError):
+            raise ValueError("'stride' doit être un entier")
+        if stride < 1:
+            raise ValueError("'stride' doit être supérieur ou égal à 1")
+
+        with stage("prepare"):
+            raw_history, missing_features = build_feature_matrix(history, data.get("shape"), weeks=None)
+        n_weeks = len(raw_history)
+        window_ends = np.arange(SEQUENCE_LENGTH - 1, n_weeks, stride)
+        if len(window_ends) > MAX_ROLLING_WINDOWS:
+            raise ValueError(
+                f"Trop de fenêtres: {len(window_ends)}, maximum autorisé: {MAX_ROLLING_WINDOWS} "
+                f"(augmenter 'stride')"
+            )
+        metrics.REQUEST_BATCH_SIZE.observe(len(window_ends), endpoint="/predict/rolling")
+    except ValueError as e:
+        metrics.PREDICTION_ERRORS.inc(
+            endpoint="/predict/rolling", disease=disease_family(disease), type="validation_error"
+        )
+        return jsonify(validation_error(str(e))), 400
+
+    version = resolve_model(disease)
+    values, in_domain, confidence = score_rolling_windows(raw_history, disease, stride, version)
+    metrics.PREDICTIONS.inc(len(values), endpoint="/predict/rolling", disease=disease_family(disease))
+
+    windows = [
+        {
+            "window_start": int(end) - SEQUENCE_LENGTH + 1,
+            "window_end": int(end),
+            "predictions": dict(zip(TARGET_ORDER, row)),
+            "confidence": str(level),
+        }
+        for end, row, level in zip(window_ends.tolist(), values.tolist(), confidence)
+    ]
+    with stage("jsonify"):
+        return jsonify(
+            {
+                "status": "success",
+                "disease": disease,
+                "location": location,
+                "history_weeks": n_weeks,
+                "stride": stride,
+                "window_count": len(windows),
+                "windows": windows,
+                "metadata": {
+                    "model_version": version.version,
+                    "prediction_horizon": "4 weeks",
+                    "warning": "Modèle optimisé pour COVID-19" if not bool(in_domain[0]) else None,
+                    "missing_features": missing_features,
+                },
+            }
+        )
+
+
+def is_admin_request():
+    """Vérifie le jeton d'administration (endpoints désactivés sans ADMIN_TOKEN)"""
+    return ADMIN_TOKEN is not None and request.headers.get("X-Admin-Token") == ADMIN_TOKEN
+
+
+@app.route("/admin/reload", methods=["POST"])
+def admin_reload():
+    """Recharge à chaud le modèle et les scalers depuis le dossier des modèles"""
+    if not is_admin_request():
+        return jsonify({"status": "error", "error": "Accès refusé"}), 403
+
+    previous = model_registry.current
+    if not load_models():
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": f"Échec du rechargement: {model_registry.last_error}",
+                    "active_version": previous.version if previous is not None else None,
+                }
+            ),
+            500,
+        )
+    return jsonify(
+        {
+            "status": "success",
+            "previous_version": previous.version if previous is not None else None,
+            "active": model_registry.current.describe(),
+        }
+    )
+
+
+sampling_profiler = SamplingProfiler()
+
+
+@app.route("/admin/profile", methods=["POST"])
+def admin_profile():
+    """
+    Profil par échantillonnage de tous les threads du processus pendant
+    ?seconds=N (5 par défaut), au format des piles repliées (flame graph).
+    ?interval_ms: période d'échantillonnage (5 ms par défaut).
+    ?tf_trace=1: trace des opérations TensorFlow pendant la même fenêtre
+    (moteurs keras et tf_function), écrite dans PROFILE_DIR.
+    """
+    if not is_admin_request():
+        return jsonify({"status": "error", "error": "Accès refusé"}), 403
+    try:
+        seconds = float(request.args.get("seconds", "5"))
+        interval_s = float(request.args.get("interval_ms", "5")) / 1000
+    except ValueError:
+        return jsonify({"status": "error", "error": "seconds et interval_ms doivent être des nombres"}), 400
+    if not 0 < seconds <= PROFILE_MAX_SECONDS or not 0 < interval_s <= 1:
+        return (
+            jsonify(
+                {
+                    "status": "error",
+                    "error": f"seconds doit être dans ]0, {PROFILE_MAX_SECONDS:g}] et interval_ms dans ]0, 1000]",
+                }
+            ),
             400,
         )
 
+    trace_dir = None
+    if request.args.get("tf_trace", "0").lower() in ("1", "true"):
+        backend_name = active_model().model.name
+        if backend_name not in ("keras", "tf_function"):
+            return (
+                jsonify(
+                    {
+                        "status": "error",
+                        "error": f"Trace TensorFlow indisponible avec le moteur {backend_name}",
+                    }
+                ),
+                400,
+            )
+        trace_dir = os.path.join(PROFILE_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+
+    if trace_dir is None:
+        stacks, samples = sampling_profiler.sample(seconds, interval_s)
+    else:
+        with profiling.tensorflow_trace(trace_dir):
+            stacks, samples = sampling_profiler.sample(seconds, interval_s)
+
+    response = Response(profiling.render_collapsed(stacks), mimetype="text/plain")
+    response.headers["X-Profile-Samples"] = str(samples)
+    response.headers["X-Profile-Pid"] = str(os.getpid())
+    if trace_dir is not None:
+        response.headers["X-TF-Trace-Dir"] = os.path.abspath(trace_dir)
+    return response
+
+
+@app.errorhandler(ProfilerBusy)
+def profiler_busy(error):
+    """Un profil par échantillonnage est déjà en cours dans ce processus"""
+    return jsonify({"status": "error", "error": str(error), "type": "busy"}), 409
+
 
 @app.errorhandler(404)
 def not_found(error):
@@ -268,33 +2079,106 @@ def not_found(error):
             {
                 "status": "error",
                 "error": "Endpoint non trouvé",
-                "available_endpoints": ["/", "/health", "/predict", "/predict/batch"],
+                "available_endpoints": [
+                    "/",
+                    "/health",
+                    "/health/live",
+                    "/health/ready",
+                    "/backends",
+                    "/metrics",
+                    "/predict",
+                    "/predict/batch",
+                    "/predict/rolling",
+                    "/predict/week",
+                    "/predict/stream",
+                    "/sessions",
+                    "/jobs",
+                    "/admin/reload",
+                    "/admin/profile",
+                ],
             }
         ),
         404,
     )
 
 
+@app.errorhandler(SchedulerOverloaded)
+def scheduler_overloaded(error):
+    """Gestion de la saturation de l'ordonnanceur d'inférence"""
+    return jsonify({"status": "error", "error": str(error), "type": "overloaded"}), 503
+
+
+@app.errorhandler(ModelUnavailable)
+def model_unavailable(error):
+    """Aucune version du modèle n'est chargée (chargement en cours ou échoué)"""
+    response = jsonify({"status": "error", "error": str(error), "type": "unavailable"})
+    if startup["state"] == "loading":
+        response.headers["Retry-After"] = "1"
+    return response, 503
+
+
+@app.errorhandler(FeatureStoreUnavailable)
+def feature_store_unavailable(error):
+    """Requête par semaine sans feature store chargé"""
+    return jsonify({"status": "error", "error": str(error), "type": "unavailable"}), 503
+
+
+@app.errorhandler(SessionNotFound)
+def session_not_found(error):
+    """Session inconnue, fermée ou expirée"""
+    return jsonify({"status": "error", "error": "Session inconnue ou expirée", "type": "not_found"}), 404
+
+
+@app.errorhandler(JobNotFound)
+def job_not_found(error):
+    """Travail inconnu ou supprimé"""
+    return jsonify({"status": "error", "error": "Travail inconnu ou supprimé", "type": "not_found"}), 404
+
+
+@app.errorhandler(SessionLimitReached)
+def session_limit_reached(error):
+    """Nombre maximal de sessions atteint"""
+    response = jsonify({"status": "error", "error": str(error), "type": "overloaded"})
+    response.headers["Retry-After"] = "60"
+    return response, 503
+
+
+@app.errorhandler(InferenceTimeout)
+def inference_timeout(error):
+    """Inférence non terminée dans le délai REQUEST_TIMEOUT_S"""
+    return (
+        jsonify({"status": "error", "error": "Délai d'inférence dépassé", "type": "timeout"}),
+        504,
+    )
+
+
 @app.errorhandler(500)
 def internal_error(error):
     """Gestion des erreurs 500"""
     return jsonify({"status": "error", "error": "Erreur interne du serveur"}), 500
 
 
+# Threads de fond démarrés ici, sauf sous gunicorn (après le fork, voir post_fork)
+if not PREFORK_SERVER:
+    start_background_tasks()
+
+
 if __name__ == "__main__":
-    # Charger les modèles au démarrage
-    if load_models():
+    # Le modèle est déjà chargé (ou en cours de chargement) par l'import du module
+    if startup["state"] == "failed":
+        logger.error(" Impossible de démarrer l'API : modèles non chargés")
+    else:
         logger.info(" API démarrée sur http://localhost:5000")
         logger.info(" Endpoints disponibles:")
         logger.info("   - POST /predict : Prédiction unique")
         logger.info("   - POST /predict/batch : Prédictions multiples")
         logger.info("   - GET /health : Vérification de l'état")
+        logger.info("   - GET /health/ready : Modèle chargé et préchauffé")
 
-        # Lancer l'API
+        # Lancer l'API (serveur de développement; en production: gunicorn -c gunicorn.conf.py api:app)
         app.run(
             host="0.0.0.0",  # Accessible depuis n'importe quelle IP
             port=5000,
-            debug=True,
+            debug=os.environ.get("FLASK_DEBUG", "0") == "1",
+            threaded=True,
         )
-    else:
-        logger.error(" Impossible de démarrer l'API : modèles non chargés")
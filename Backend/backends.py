@@ -0,0 +1,358 @@
+"""
+Moteurs d'inférence interchangeables derrière make_prediction.
+
+Chaque moteur charge un artefact du dossier models/ et expose la même méthode
+predict(sequences) -> tableau (N, 3) normalisé :
+
+- keras       : models/model.keras, appel direct du modèle (sans model.predict)
+- tf_function : models/model_tf_function/, fonction tracée à signature fixe (SavedModel)
+- tflite      : models/model.tflite, interpréteur TFLite (délégué CPU XNNPACK)
+- numpy       : models/model.keras, passe avant en NumPy pur (voir numpy_lstm.py)
+- tflite_float16, tflite_int8_dynamic, tflite_int8 : variantes quantifiées
+  (models/model_<variante>.tflite, voir quantize.py)
+
+Les artefacts optimisés et la comparaison de latence sont produits par
+export_model.py, les variantes quantifiées et leur précision par quantize.py.
+Avec INFERENCE_BACKEND=auto, l'API choisit au chargement le moteur le plus
+rapide de ces rapports parmi les artefacts disponibles; une variante
+quantifiée n'est retenue que si l'écart de ses prédictions à celles du
+modèle float32, relatif à la MAE de test, ne dépasse pas
+QUANTIZATION_MAX_DEVIATION.
+"""
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SEQUENCE_LENGTH = 12
+NUM_FEATURES = 29
+
+ARTIFACTS = {
+    "keras": "model.keras",
+    "tf_function": "model_tf_function",
+    "tflite": "model.tflite",
+    "numpy": "model.keras",
+    "tflite_float16": "model_float16.tflite",
+    "tflite_int8_dynamic": "model_int8_dynamic.tflite",
+    "tflite_int8": "model_int8.tflite",
+}
+BENCHMARK_REPORT = "backend_benchmark.json"
+QUANTIZATION_REPORT = "quantization_report.json"
+# Moteur -> variante quantifiée servie
+QUANTIZED_BACKENDS = {
+    "tflite_float16": "float16",
+    "tflite_int8_dynamic": "int8_dynamic",
+    "tflite_int8": "int8",
+}
+# Ordre de repli quand aucun rapport de latence n'est disponible
+FALLBACK_ORDER = ["keras", "numpy"]
+# Threads de calcul de l'interpréteur TFLite (défaut: choix de TFLite)
+INFERENCE_THREADS = int(os.environ["INFERENCE_THREADS"]) if os.environ.get("INFERENCE_THREADS") else None
+# Écart maximal aux prédictions float32, relatif à la MAE de test (rapport de quantize.py),
+# d'une variante quantifiée choisie par auto
+MAX_DEVIATION = float(os.environ.get("QUANTIZATION_MAX_DEVIATION", "0.05"))
+
+
+class InferenceBackend:
+    """Interface commune des moteurs d'inférence"""
+
+    name = None
+    # Passes stochastiques (MC dropout) possibles: le modèle a des dropouts
+    supports_dropout = False
+
+    def predict(self, sequences, verbose=0):
+        raise NotImplementedError
+
+    def predict_stochastic(self, sequences):
+        """Passe avant avec les dropouts actifs, comme à l'entraînement (MC dropout)"""
+        raise NotImplementedError(f"Passes stochastiques non supportées par le moteur {self.name}")
+
+    def release(self):
+        """État global libéré quand le modèle est déchargé; une référence encore tenue reste utilisable"""
+
+
+class KerasBackend(InferenceBackend):
+    """Modèle Keras appelé directement, sans la boucle de model.predict"""
+
+    name = "keras"
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self.model = tf.keras.models.load_model(path)
+        self.supports_dropout = any(
+            isinstance(layer, tf.keras.layers.Dropout)
+            or getattr(layer, "dropout", 0) > 0
+            or getattr(layer, "recurrent_dropout", 0) > 0
+            for layer in self.model.layers
+        )
+
+    def predict(self, sequences, verbose=0):
+        return self.model(np.asarray(sequences, dtype=np.float32), training=False).numpy()
+
+    def predict_stochastic(self, sequences):
+        return self.model(np.asarray(sequences, dtype=np.float32), training=True).numpy()
+
+    def release(self):
+        import tensorflow as tf
+
+        # Graphe global de Keras, compteurs de noms des couches et cache des noyaux eager:
+        # les poids eux-mêmes sont libérés avec la dernière référence au modèle
+        tf.keras.backend.clear_session()
+
+
+class TFFunctionBackend(InferenceBackend):
+    """Fonction concrète tracée avec une signature d'entrée fixe (None, 12, 29)"""
+
+    name = "tf_function"
+
+    def __init__(self, path):
+        import tensorflow as tf
+
+        self._tf = tf
+        self.function = tf.saved_model.load(path).signatures["serving_default"]
+        self.output_key = list(self.function.structured_outputs.keys())[0]
+
+    def predict(self, sequences, verbose=0):
+        inputs = self._tf.constant(np.asarray(sequences, dtype=np.float32))
+        return self.function(inputs)[self.output_key].numpy()
+
+
+class TFLiteBackend(InferenceBackend):
+    """Interpréteur TFLite; tflite_runtime est utilisé s'il est installé (sans TensorFlow)"""
+
+    name = "tflite"
+
+    def __init__(self, path, num_threads=INFERENCE_THREADS):
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+
+            Interpreter = tf.lite.Interpreter
+
+        # Les modèles float utilisent le délégué XNNPACK par défaut
+        self.interpreter = Interpreter(model_path=path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.input_index = input_details["index"]
+        self.output_index = output_details["index"]
+        # Modèle entièrement entier: entrée et sortie quantifiées (échelle, zéro)
+        self.input_dtype = input_details["dtype"]
+        self.input_quantization = input_details["quantization"] if self.input_dtype != np.float32 else None
+        self.output_quantization = output_details["quantization"] if output_details["dtype"] != np.float32 else None
+        # Taille de lot figée à l'export (LSTM fusionnée): les lots sont découpés
+        self.fixed_batch_size = (
+            int(input_details["shape"][0]) if input_details["shape_signature"][0] != -1 else None
+        )
+        self.batch_size = None
+        # L'interpréteur n'est pas utilisable depuis plusieurs threads à la fois
+        self._lock = threading.Lock()
+
+    def _invoke(self, sequences):
+        if self.fixed_batch_size is None and sequences.shape[0] != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, sequences.shape)
+            self.interpreter.allocate_tensors()
+            self.batch_size = sequences.shape[0]
+        if self.input_quantization is not None:
+            scale, zero_point = self.input_quantization
+            limits = np.iinfo(self.input_dtype)
+            sequences = np.clip(np.round(sequences / scale) + zero_point, limits.min, limits.max).astype(self.input_dtype)
+        self.interpreter.set_tensor(self.input_index, sequences)
+        # La LSTM fusionnée garde son état dans des tenseurs variables d'un appel à l'autre
+        self.interpreter.reset_all_variables()
+        self.interpreter.invoke()
+        outputs = self.interpreter.get_tensor(self.output_index)
+        if self.output_quantization is not None:
+            scale, zero_point = self.output_quantization
+            return (outputs.astype(np.float32) - zero_point) * scale
+        return outputs.copy()
+
+    def predict(self, sequences, verbose=0):
+        sequences = np.asarray(sequences, dtype=np.float32)
+        with self._lock:
+            if self.fixed_batch_size is None:
+                return self._invoke(sequences)
+
+            n_sequences = sequences.shape[0]
+            size = self.fixed_batch_size
+            outputs = []
+            for start in range(0, n_sequences, size):
+                chunk = sequences[start:start + size]
+                n_rows = chunk.shape[0]
+                if n_rows < size:
+                    # Compléter le dernier morceau jusqu'à la taille figée
+                    padding = np.zeros((size - n_rows, *chunk.shape[1:]), dtype=np.float32)
+                    chunk = np.concatenate([chunk, padding])
+                outputs.append(self._invoke(chunk)[:n_rows])
+            return np.concatenate(outputs)
+
+
+class TFLiteFloat16Backend(TFLiteBackend):
+    """Variante aux poids float16"""
+
+    name = "tflite_float16"
+
+
+class TFLiteInt8DynamicBackend(TFLiteBackend):
+    """Variante aux poids int8, activations quantifiées à la volée (dynamic range)"""
+
+    name = "tflite_int8_dynamic"
+
+
+class TFLiteInt8Backend(TFLiteBackend):
+    """Variante entièrement entière (poids, activations, entrée et sortie int8)"""
+
+    name = "tflite_int8"
+
+
+class NumpyBackend(InferenceBackend):
+    """Passe avant LSTM/Dense en NumPy pur"""
+
+    name = "numpy"
+
+    def __init__(self, path):
+        from numpy_lstm import NumpyLSTMModel
+
+        self.model = NumpyLSTMModel.from_keras_archive(path)
+        self.supports_dropout = self.model.has_dropout
+
+    def predict(self, sequences, verbose=0):
+        return self.model.predict(sequences)
+
+    def predict_stochastic(self, sequences):
+        return self.model.predict(sequences, rng=np.random.default_rng())
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (
+        KerasBackend, TFFunctionBackend, TFLiteBackend, NumpyBackend,
+        TFLiteFloat16Backend, TFLiteInt8DynamicBackend, TFLiteInt8Backend,
+    )
+}
+
+
+def artifact_path(models_dir, name):
+    return os.path.join(models_dir, ARTIFACTS[name])
+
+
+def available_backends(models_dir):
+    """Moteurs dont l'artefact est présent dans le dossier des modèles"""
+    return [name for name in BACKENDS if os.path.exists(artifact_path(models_dir, name))]
+
+
+def read_report(models_dir, name):
+    path = os.path.join(models_dir, name)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def read_benchmark_report(models_dir):
+    """Lit la comparaison de latence produite par export_model.py"""
+    return read_report(models_dir, BENCHMARK_REPORT)
+
+
+def read_quantization_report(models_dir):
+    """Lit la précision et la latence des variantes quantifiées produites par quantize.py"""
+    return read_report(models_dir, QUANTIZATION_REPORT)
+
+
+def eligible_backends(models_dir, max_deviation=MAX_DEVIATION):
+    """
+    Moteurs disponibles que auto peut choisir: une variante quantifiée n'en
+    fait partie que si le rapport de quantize.py mesure une deviation
+    (écart aux prédictions float32 / MAE de test) inférieure ou égale à
+    max_deviation
+    """
+    report = read_quantization_report(models_dir)
+    deviations = {entry["backend"]: entry.get("deviation") for entry in (report or {}).get("backends", [])}
+    return [
+        name for name in available_backends(models_dir)
+        if name not in QUANTIZED_BACKENDS
+        or (deviations.get(name) is not None and deviations[name] <= max_deviation)
+    ]
+
+
+def resolve_backend_name(name, models_dir):
+    """Résout 'auto' en le moteur le plus rapide disponible (variantes quantifiées assez précises comprises)"""
+    if name != "auto":
+        if name not in BACKENDS:
+            raise ValueError(f"Moteur d'inférence inconnu: {name}")
+        return name
+
+    eligible = eligible_backends(models_dir)
+    # Latences des deux rapports; celles de quantize.py, mesurées après, priment
+    latencies = {}
+    for report in (read_benchmark_report(models_dir), read_quantization_report(models_dir)):
+        for entry in (report or {}).get("backends", []):
+            if "error" not in entry and "selection_latency_ms" in entry:
+                latencies[entry["backend"]] = entry["selection_latency_ms"]
+    ranked = sorted((name for name in eligible if name in latencies), key=latencies.get)
+    if ranked:
+        return ranked[0]
+    return next(name for name in FALLBACK_ORDER if name in eligible)
+
+
+def load_backend(name, models_dir):
+    """Charge le moteur demandé (ou le plus rapide si 'auto')"""
+    resolved = resolve_backend_name(name, models_dir)
+    return BACKENDS[resolved](artifact_path(models_dir, resolved))
+
+
+def benchmark_backend(backend, batch_sizes=(1, 32), repeats=50, warmup=5, seed=0):
+    """Mesure la latence d'un moteur pour plusieurs tailles de lot"""
+    rng = np.random.default_rng(seed)
+    results = {}
+    for batch_size in batch_sizes:
+        sequences = rng.normal(size=(batch_size, SEQUENCE_LENGTH, NUM_FEATURES)).astype(np.float32)
+        for _ in range(warmup):
+            backend.predict(sequences)
+        timings = []
+        for _ in range(repeats):
+            started = time.perf_counter()
+            backend.predict(sequences)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings = np.array(timings)
+        results[str(batch_size)] = {
+            "p50_ms": round(float(np.percentile(timings, 50)), 4),
+            "p95_ms": round(float(np.percentile(timings, 95)), 4),
+            "mean_ms": round(float(timings.mean()), 4),
+            "per_sequence_ms": round(float(timings.mean()) / batch_size, 4),
+        }
+    return results
+
+
+def benchmark_backends(models_dir, batch_sizes=(1, 32), repeats=50):
+    """Compare la latence de tous les moteurs disponibles"""
+    entries = []
+    for name in available_backends(models_dir):
+        entry = {"backend": name, "artifact": ARTIFACTS[name]}
+        try:
+            started = time.perf_counter()
+            backend = BACKENDS[name](artifact_path(models_dir, name))
+            entry["load_time_s"] = round(time.perf_counter() - started, 3)
+            entry["latency"] = benchmark_backend(backend, batch_sizes, repeats)
+            # Critère de sélection: latence médiane pour la plus petite taille de lot
+            entry["selection_latency_ms"] = entry["latency"][str(min(batch_sizes))]["p50_ms"]
+        except Exception as e:
+            logger.error(f"Échec du benchmark du moteur {name}: {str(e)}")
+            entry["error"] = str(e)
+        entries.append(entry)
+
+    measured = [entry for entry in entries if "error" not in entry]
+    fastest = min(measured, key=lambda entry: entry["selection_latency_ms"])["backend"] if measured else None
+    return {
+        "batch_sizes": list(batch_sizes),
+        "repeats": repeats,
+        "backends": entries,
+        "fastest": fastest,
+    }
@@ -0,0 +1,194 @@
+"""
+Ordonnanceur de micro-batching pour les prédictions concurrentes.
+
+Chaque requête /predict soumet sa séquence normalisée à l'ordonnanceur, qui
+regroupe les requêtes arrivées en même temps (dans la limite d'une taille de
+lot et d'une attente maximale de quelques millisecondes) et les exécute en une
+seule passe avant. Chaque appelant récupère ensuite ses propres lignes.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from concurrent.futures import TimeoutError as FutureTimeout
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class SchedulerOverloaded(RuntimeError):
+    """La file d'attente de l'ordonnanceur est pleine"""
+
+
+class _PendingRequest:
+    __slots__ = ("sequences", "group", "future", "enqueued_at")
+
+    def __init__(self, sequences, group):
+        self.sequences = sequences
+        self.group = group
+        self.future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class MicroBatcher:
+    """Regroupe les requêtes concurrentes en lots exécutés en une seule passe"""
+
+    def __init__(self, predict_fn, max_batch_size=32, max_wait_ms=5.0, max_queue_size=1024):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.max_queue_size = max_queue_size
+
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+
+        # Statistiques exposées dans /health
+        self._requests = 0
+        self._rows = 0
+        self._batches = 0
+        self._rejected = 0
+        self._cancelled = 0
+        self._errors = 0
+        self._total_wait = 0.0
+        self._max_wait_seen = 0.0
+        self._total_inference = 0.0
+        self._batch_sizes = {}
+
+    def submit(self, sequences, group=None, timeout=None):
+        """
+        Soumet un tenseur normalisé (n, 12, 29) et bloque jusqu'à obtenir
+        les n lignes de prédiction correspondantes. Les requêtes de groupes
+        différents (par exemple deux versions du modèle) ne partagent jamais
+        une passe avant. Une requête dont l'attente dépasse timeout est
+        annulée: elle est retirée de son lot si celui-ci n'a pas commencé.
+        """
+        self._ensure_worker()
+        pending = _PendingRequest(sequences, group)
+        try:
+            self._queue.put_nowait(pending)
+        except queue.Full:
+            with self._stats_lock:
+                self._rejected += 1
+            raise SchedulerOverloaded(
+                f"File d'attente pleine ({self.max_queue_size} requêtes en attente)"
+            )
+        try:
+            return pending.future.result(timeout=timeout)
+        except FutureTimeout:
+            # Sans effet si le lot est déjà en cours d'exécution
+            pending.future.cancel()
+            raise
+
+    def _ensure_worker(self):
+        # Démarrage paresseux: le thread ne survit pas à un fork, on le
+        # (re)crée dans le processus qui sert réellement les requêtes
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(
+                    target=self._run, name="micro-batcher", daemon=True
+                )
+                self._worker.start()
+
+    def _collect_batch(self):
+        """Attend une première requête puis complète le lot jusqu'à la limite"""
+        batch = [self._queue.get()]
+        rows = len(batch[0].sequences)
+        deadline = time.perf_counter() + self.max_wait
+        while rows < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    pending = self._queue.get(timeout=remaining)
+                else:
+                    pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            batch.append(pending)
+            rows += len(pending.sequences)
+        return batch, rows
+
+    def _run(self):
+        while True:
+            batch, rows = self._collect_batch()
+            # Requêtes abandonnées par leur appelant (délai dépassé): jamais exécutées.
+            # Les autres passent à l'état "en cours" et ne peuvent plus être annulées.
+            live = [pending for pending in batch if pending.future.set_running_or_notify_cancel()]
+            if len(live) < len(batch):
+                with self._stats_lock:
+                    self._cancelled += len(batch) - len(live)
+                if not live:
+                    continue
+                batch, rows = live, sum(len(pending.sequences) for pending in live)
+            started = time.perf_counter()
+            waits = [started - pending.enqueued_at for pending in batch]
+            try:
+                for group, pendings in self._split_by_group(batch):
+                    self._execute(group, pendings)
+            except Exception as e:
+                logger.error(f"Erreur lors de l'exécution d'un lot: {str(e)}")
+                with self._stats_lock:
+                    self._errors += 1
+                for pending in batch:
+                    if not pending.future.done():
+                        pending.future.set_exception(e)
+                continue
+            inference_time = time.perf_counter() - started
+
+            with self._stats_lock:
+                self._requests += len(batch)
+                self._rows += rows
+                self._batches += 1
+                self._total_wait += sum(waits)
+                self._max_wait_seen = max(self._max_wait_seen, max(waits))
+                self._total_inference += inference_time
+                self._batch_sizes[rows] = self._batch_sizes.get(rows, 0) + 1
+
+    @staticmethod
+    def _split_by_group(batch):
+        groups = {}
+        for pending in batch:
+            groups.setdefault(id(pending.group), (pending.group, []))[1].append(pending)
+        return groups.values()
+
+    def _execute(self, group, pendings):
+        """Une passe avant pour les requêtes d'un même groupe, puis redistribution des lignes"""
+        if len(pendings) == 1:
+            sequences = pendings[0].sequences
+        else:
+            sequences = np.concatenate([pending.sequences for pending in pendings])
+        predictions = self.predict_fn(sequences, group)
+
+        # Redistribuer à chaque appelant ses propres lignes
+        offset = 0
+        for pending in pendings:
+            size = len(pending.sequences)
+            pending.future.set_result(predictions[offset:offset + size])
+            offset += size
+
+    def stats(self):
+        """Statistiques de l'ordonnanceur"""
+        with self._stats_lock:
+            batches = self._batches or 1
+            requests = self._requests or 1
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "max_queue_size": self.max_queue_size,
+                "queue_depth": self._queue.qsize(),
+                "requests": self._requests,
+                "batches": self._batches,
+                "rejected": self._rejected,
+                "cancelled": self._cancelled,
+                "errors": self._errors,
+                "avg_batch_size": round(self._rows / batches, 3),
+                "avg_wait_ms": round(self._total_wait / requests * 1000, 3),
+                "max_wait_seen_ms": round(self._max_wait_seen * 1000, 3),
+                "avg_inference_ms": round(self._total_inference / batches * 1000, 3),
+                "batch_size_distribution": dict(sorted(self._batch_sizes.items())),
+            }
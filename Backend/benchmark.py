@@ -0,0 +1,598 @@
+"""
+Banc d'essai reproductible de l'API de prédiction.
+
+Rejoue les scénarios de ML/Model/disease.json contre l'API, en processus
+(client de test Flask) et/ou en HTTP, et mesure :
+- le démarrage à froid (import et chargement du modèle, première requête) ;
+- les latences p50/p95/p99 et le débit à plusieurs niveaux de concurrence ;
+- la mémoire résidente maximale ;
+pour des requêtes /predict unitaires et des lots /predict/batch.
+
+Le rapport est écrit en JSON. Avec --baseline, le script échoue (code 1) si
+une mesure régresse au-delà de la tolérance par rapport aux références de la
+même machine (clé --environment, par défaut système-architecture-CPU) ; sans
+référence pour cette machine, ou avec --warn-only, les écarts sont seulement
+journalisés.
+
+Utilisation :
+    python benchmark.py --mode inprocess
+    python benchmark.py --mode http --url http://localhost:5000
+    python benchmark.py --mode http --start-server "gunicorn -c gunicorn.conf.py api:app"
+    python benchmark.py --mode inprocess --baseline
+    python benchmark.py --mode inprocess --baseline --update-baseline
+    python benchmark.py --mode http --baseline --environment github-actions --warn-only
+
+Le mode HTTP n'utilise que la bibliothèque standard (psutil, optionnel, sert
+à mesurer la mémoire d'un serveur lancé avec --start-server).
+"""
+import argparse
+import copy
+import http.client
+import json
+import logging
+import os
+import platform
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SCENARIOS = os.path.join(BACKEND_DIR, "..", "ML", "Model", "disease.json")
+DEFAULT_BASELINE = os.path.join(BACKEND_DIR, "benchmark_baseline.json")
+
+# Sens de comparaison des mesures avec les références
+LOWER_IS_BETTER = {"p50_ms", "p95_ms", "p99_ms", "cold_start_s", "first_request_ms", "peak_rss_mb"}
+HIGHER_IS_BETTER = {"throughput_rps"}
+
+# Démarrage à froid mesuré dans un processus neuf
+COLD_START_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import api
+imported = time.perf_counter()
+# Modèle chargé et préchauffé en arrière-plan (MODEL_BACKGROUND_LOAD)
+while api.model_registry.current is None and api.startup["state"] != "failed":
+    time.sleep(0.01)
+ready = time.perf_counter()
+client = api.app.test_client()
+payload = json.loads(sys.stdin.read())
+response = client.post("/predict", json=payload)
+first_request = time.perf_counter()
+print(json.dumps({
+    "import_s": imported - started,
+    "ready_s": ready - started,
+    "first_request_ms": (first_request - ready) * 1000,
+    "status": response.status_code,
+    "inference_backend": api.model_registry.current.model.name if api.model_registry.current else None,
+}))
+"""
+
+
+def load_scenarios(path):
+    """Scénarios (maladie, localisation, historique) de disease.json"""
+    with open(path, encoding="utf-8") as f:
+        scenarios = json.load(f)
+    return [
+        {"disease": s["disease"], "location": s["location"], "history": s["history"]}
+        for s in scenarios
+    ]
+
+
+class Payloads:
+    """
+    Corps de requête rejoués en boucle sur les scénarios. Avec cache_busting,
+    chaque requête modifie très légèrement la dernière semaine pour que le
+    cache des prédictions ne serve pas la réponse à la place du modèle.
+    """
+
+    def __init__(self, scenarios, batch_size, cache_busting=True):
+        self.scenarios = scenarios
+        self.batch_size = batch_size
+        self.cache_busting = cache_busting
+
+    def _entry(self, index):
+        scenario = self.scenarios[index % len(self.scenarios)]
+        if not self.cache_busting:
+            return scenario
+        entry = dict(scenario)
+        last_week = copy.copy(scenario["history"][-1])
+        last_week["weeks_since_start"] = last_week.get("weeks_since_start", 0.0) + index * 1e-6
+        entry["history"] = scenario["history"][:-1] + [last_week]
+        return entry
+
+    def single(self, index):
+        return json.dumps(self._entry(index)).encode("utf-8")
+
+    def batch(self, index):
+        start = index * self.batch_size
+        entries = [self._entry(start + offset) for offset in range(self.batch_size)]
+        return json.dumps({"predictions": entries}).encode("utf-8")
+
+
+class InProcessClient:
+    """Client de test Flask (pas de réseau ni de sérialisation HTTP)"""
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, path, body):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        response = client.post(path, data=body, content_type="application/json")
+        response.get_data()
+        return response.status_code
+
+
+class HttpClient:
+    """Client HTTP avec une connexion persistante par thread"""
+
+    def __init__(self, url, timeout=60):
+        parsed = urlparse(url)
+        self.host = parsed.hostname
+        self.port = parsed.port or 80
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(
+                self.host, self.port, timeout=self.timeout
+            )
+        return connection
+
+    def request(self, method, path, body=None):
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request(method, path, body=body, headers=headers)
+                response = connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # Connexion fermée par le serveur (keep-alive expiré): on la rouvre une fois
+                connection.close()
+                self._local.connection = None
+                if attempt == 1:
+                    raise
+
+    def post(self, path, body):
+        return self.request("POST", path, body)[0]
+
+    def get_json(self, path):
+        status, body = self.request("GET", path)
+        return status, json.loads(body) if body else None
+
+
+def percentile(sorted_values, q):
+    """Percentile par interpolation linéaire (comme numpy.percentile)"""
+    if not sorted_values:
+        return None
+    position = (len(sorted_values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+
+def summarize(latencies, statuses, wall_time, sequences_per_request):
+    latencies = sorted(latencies)
+    n_requests = len(statuses)
+    errors = sum(1 for status in statuses if status != 200)
+    return {
+        "requests": n_requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "max_ms": round(latencies[-1] * 1000, 3),
+        "throughput_rps": round(n_requests / wall_time, 2),
+        "sequences_per_s": round(n_requests * sequences_per_request / wall_time, 2),
+    }
+
+
+def run_load(client, path, make_body, n_requests, concurrency, warmup=5, offset=0):
+    """
+    Envoie n_requests requêtes avec `concurrency` clients simultanés.
+    Les corps sont construits hors de la mesure.
+    """
+    for index in range(warmup):
+        client.post(path, make_body(offset + index))
+
+    bodies = [make_body(offset + warmup + index) for index in range(n_requests)]
+    latencies = [None] * n_requests
+    statuses = [None] * n_requests
+    next_index = iter(range(n_requests))
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                index = next(next_index, None)
+            if index is None:
+                return
+            started = time.perf_counter()
+            try:
+                statuses[index] = client.post(path, bodies[index])
+            except Exception as e:
+                logger.error(f"Requête en échec: {str(e)}")
+                statuses[index] = 0
+            latencies[index] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return latencies, statuses, time.perf_counter() - started
+
+
+def run_scenarios(client, payloads, args):
+    """Requêtes unitaires et lots, à chaque niveau de concurrence"""
+    results = {"single": {}, "batch": {}}
+    offset = 0
+    for concurrency in args.concurrency:
+        logger.info(f"/predict, concurrence {concurrency}")
+        latencies, statuses, wall_time = run_load(
+            client, "/predict", payloads.single, args.requests, concurrency, args.warmup, offset
+        )
+        results["single"][str(concurrency)] = summarize(latencies, statuses, wall_time, 1)
+        offset += args.requests + args.warmup
+
+        logger.info(f"/predict/batch ({args.batch_size} séquences), concurrence {concurrency}")
+        latencies, statuses, wall_time = run_load(
+            client, "/predict/batch", payloads.batch, args.batch_requests, concurrency, args.warmup, offset
+        )
+        results["batch"][str(concurrency)] = summarize(latencies, statuses, wall_time, args.batch_size)
+        offset += args.batch_requests + args.warmup
+
+    # Mode incertitude: K passes stochastiques groupées, un client à la fois
+    if args.uncertainty_samples:
+        results["uncertainty"] = {}
+        for n_samples in args.uncertainty_samples:
+            logger.info(f"/predict/batch ({args.batch_size} séquences), incertitude K={n_samples}")
+            latencies, statuses, wall_time = run_load(
+                client, f"/predict/batch?uncertainty={n_samples}", payloads.batch,
+                args.batch_requests, 1, args.warmup, offset,
+            )
+            results["uncertainty"][str(n_samples)] = summarize(latencies, statuses, wall_time, args.batch_size)
+            offset += args.batch_requests + args.warmup
+    return results
+
+
+def benchmark_cold_start(scenario, env):
+    """Import de l'API, chargement et préchauffage du modèle, puis première requête, dans un processus neuf"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-c", COLD_START_SCRIPT],
+        input=json.dumps(scenario),
+        capture_output=True,
+        text=True,
+        cwd=BACKEND_DIR,
+        env=env,
+        check=True,
+    )
+    total = time.perf_counter() - started
+    measures = json.loads(completed.stdout.strip().splitlines()[-1])
+    return {
+        "cold_start_s": round(total, 3),
+        "import_s": round(measures["import_s"], 3),
+        "ready_s": round(measures["ready_s"], 3),
+        "first_request_ms": round(measures["first_request_ms"], 3),
+        "first_request_status": measures["status"],
+        "inference_backend": measures["inference_backend"],
+    }
+
+
+def peak_rss_mb():
+    """Mémoire résidente maximale du processus courant"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Octets sous macOS, kilo-octets sous Linux
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def benchmark_inprocess(scenarios, args, env):
+    logger.info("Démarrage à froid (processus neuf)")
+    result = benchmark_cold_start(scenarios[0], env)
+
+    os.environ.update(env)
+    sys.path.insert(0, BACKEND_DIR)
+    os.chdir(BACKEND_DIR)
+    import api
+
+    while api.model_registry.current is None:
+        if api.startup["state"] == "failed":
+            raise RuntimeError(f"Modèle non chargé: {api.startup['error']}")
+        time.sleep(0.05)
+
+    payloads = Payloads(scenarios, args.batch_size, not args.keep_cache)
+    result.update(run_scenarios(InProcessClient(api.app), payloads, args))
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+class RssSampler:
+    """Mémoire résidente maximale d'un arbre de processus (serveur et workers)"""
+
+    def __init__(self, pid, interval=0.1):
+        self.process = psutil.Process(pid)
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                processes = [self.process] + self.process.children(recursive=True)
+                rss = sum(process.memory_info().rss for process in processes)
+                self.peak = max(self.peak, rss)
+            except psutil.Error:
+                pass
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return round(self.peak / (1024 * 1024), 1)
+
+
+def wait_until_ready(client, timeout):
+    """Attend que /health/ready indique un modèle chargé et préchauffé"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            status, health = client.get_json("/health/ready")
+            if status == 200:
+                return health
+        except (OSError, http.client.HTTPException, ValueError):
+            pass
+        time.sleep(0.1)
+    raise TimeoutError(f"API non prête après {timeout} s")
+
+
+def benchmark_http(scenarios, args, env):
+    client = HttpClient(args.url)
+    server = sampler = None
+    result = {"url": args.url}
+
+    if args.start_server:
+        logger.info(f"Démarrage du serveur: {args.start_server}")
+        started = time.perf_counter()
+        server = subprocess.Popen(shlex.split(args.start_server), cwd=BACKEND_DIR, env=env)
+        if psutil is not None:
+            sampler = RssSampler(server.pid).start()
+
+    try:
+        health = wait_until_ready(client, args.startup_timeout)
+        if server is not None:
+            result["cold_start_s"] = round(time.perf_counter() - started, 3)
+            first = time.perf_counter()
+            result["first_request_status"] = client.post("/predict", Payloads(scenarios, 1).single(0))
+            result["first_request_ms"] = round((time.perf_counter() - first) * 1000, 3)
+        result["inference_backend"] = health.get("inference_backend")
+
+        payloads = Payloads(scenarios, args.batch_size, not args.keep_cache)
+        result.update(run_scenarios(client, payloads, args))
+
+        _, health = client.get_json("/health")
+        result["prediction_cache"] = health.get("prediction_cache")
+    finally:
+        if sampler is not None:
+            result["peak_rss_mb"] = sampler.stop()
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=30)
+    return result
+
+
+def flatten_metrics(results, prefix=""):
+    """{chemin: valeur} des mesures comparables aux références"""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else key
+        if isinstance(value, dict):
+            flat.update(flatten_metrics(value, path))
+        elif key in LOWER_IS_BETTER | HIGHER_IS_BETTER and isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def environment_key():
+    """Clé des références: les mesures ne se comparent qu'à machine égale"""
+    return f"{platform.system()}-{platform.machine()}-{os.cpu_count()}cpu".lower()
+
+
+def load_baselines(path):
+    """{environnement: références} du fichier de références"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f).get("environments", {})
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Liste des régressions au-delà de la tolérance relative"""
+    regressions = []
+    for mode, current in results.items():
+        reference = baseline.get(mode)
+        if reference is None:
+            continue
+        if reference.get("inference_backend") != current.get("inference_backend"):
+            logger.warning(
+                f"{mode}: moteur {current.get('inference_backend')} différent de la référence "
+                f"({reference.get('inference_backend')}), comparaison ignorée"
+            )
+            continue
+        current_metrics = flatten_metrics(current)
+        for path, expected in flatten_metrics(reference).items():
+            measured = current_metrics.get(path)
+            if measured is None or expected <= 0:
+                continue
+            metric = path.rsplit(".", 1)[-1]
+            if metric in LOWER_IS_BETTER:
+                regressed = measured > expected * (1 + tolerance)
+            else:
+                regressed = measured < expected / (1 + tolerance)
+            if regressed:
+                regressions.append({"metric": f"{mode}.{path}", "baseline": expected, "measured": measured})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Banc d'essai de latence et de charge de l'API")
+    parser.add_argument("--mode", choices=["inprocess", "http", "both"], default="inprocess")
+    parser.add_argument("--url", default="http://localhost:5000", help="API testée en mode HTTP")
+    parser.add_argument("--start-server", help="Commande qui démarre le serveur testé (depuis Backend/)")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS, help="Fichier disease.json")
+    parser.add_argument("--concurrency", default="1,4,16", help="Niveaux de concurrence")
+    parser.add_argument("--requests", type=int, default=300, help="Requêtes /predict par niveau")
+    parser.add_argument("--batch-requests", type=int, default=30, help="Requêtes /predict/batch par niveau")
+    parser.add_argument("--batch-size", type=int, default=32, help="Séquences par requête /predict/batch")
+    parser.add_argument("--warmup", type=int, default=5, help="Requêtes non mesurées par série")
+    parser.add_argument(
+        "--uncertainty-samples", default="",
+        help="Nombres de passes K du mode incertitude mesurés sur /predict/batch (ex. 10,30,100)",
+    )
+    parser.add_argument("--keep-cache", action="store_true", help="Laisse le cache des prédictions servir les réponses")
+    parser.add_argument("--report", default="benchmark_report.json")
+    parser.add_argument(
+        "--baseline", nargs="?", const=DEFAULT_BASELINE,
+        help="Références (défaut: benchmark_baseline.json): échec si une mesure régresse au-delà de la tolérance "
+        "par rapport aux références de cet environnement",
+    )
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Régression relative tolérée (0.5 = +50%%)")
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Remplace les références de cet environnement par ce rapport"
+    )
+    parser.add_argument(
+        "--environment", default=environment_key(),
+        help="Clé des références (défaut: système-architecture-CPU de la machine)",
+    )
+    parser.add_argument("--warn-only", action="store_true", help="Journalise les régressions sans échouer")
+    args = parser.parse_args()
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+    args.uncertainty_samples = [int(k) for k in args.uncertainty_samples.split(",") if k]
+    # Le mode en processus se place dans Backend/: chemins résolus avant
+    args.report = os.path.abspath(args.report)
+    args.scenarios = os.path.abspath(args.scenarios)
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+
+    scenarios = load_scenarios(args.scenarios)
+    logger.info(f"{len(scenarios)} scénarios chargés depuis {args.scenarios}")
+
+    # Environnement de l'API testée: le cache est désactivé pour mesurer le modèle
+    env = dict(os.environ)
+    if not args.keep_cache:
+        env["PREDICTION_CACHE_ENABLED"] = "false"
+
+    results = {}
+    if args.mode in ("http", "both"):
+        results["http"] = benchmark_http(scenarios, args, env)
+    if args.mode in ("inprocess", "both"):
+        results["inprocess"] = benchmark_inprocess(scenarios, args, env)
+
+    report = {
+        "generated_at": datetime.now().isoformat(),
+        "environment": {
+            "key": args.environment,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "config": {
+            "scenarios": len(scenarios),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "batch_requests": args.batch_requests,
+            "batch_size": args.batch_size,
+            "cache_busting": not args.keep_cache,
+            "uncertainty_samples": args.uncertainty_samples,
+        },
+        "results": results,
+    }
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Rapport écrit dans {args.report}")
+
+    for mode, result in results.items():
+        for kind in ("single", "batch", "uncertainty"):
+            # Mode incertitude: clé K (nombre de passes), un client à la fois
+            for concurrency, values in result.get(kind, {}).items():
+                label = f"K={concurrency:<4}" if kind == "uncertainty" else f"c={concurrency:<3}"
+                logger.info(
+                    f"  {mode:<9} {kind:<11} {label} p50 {values['p50_ms']:.2f} ms  "
+                    f"p95 {values['p95_ms']:.2f} ms  p99 {values['p99_ms']:.2f} ms  "
+                    f"{values['throughput_rps']:.1f} req/s  erreurs {values['errors']}"
+                )
+
+    if not args.baseline:
+        return 0
+
+    baselines = load_baselines(args.baseline)
+    if args.update_baseline:
+        baselines[args.environment] = {
+            **baselines.get(args.environment, {}), **results, "environment": report["environment"]
+        }
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({"environments": baselines}, f, indent=2)
+        logger.info(f"Références {args.environment} mises à jour dans {args.baseline}")
+        return 0
+
+    baseline = baselines.get(args.environment)
+    if baseline is None:
+        logger.warning(
+            f"Aucune référence pour l'environnement {args.environment} dans {args.baseline} "
+            f"(disponibles: {', '.join(baselines) or 'aucune'}), comparaison ignorée"
+        )
+        baseline = {}
+    regressions = compare_to_baseline(results, baseline, args.tolerance)
+    failed_requests = sum(
+        values["errors"] for result in results.values()
+        for kind in ("single", "batch", "uncertainty") for values in result.get(kind, {}).values()
+    )
+    for regression in regressions:
+        logger.error(
+            f"Régression {regression['metric']}: {regression['measured']} "
+            f"(référence {regression['baseline']}, tolérance {args.tolerance:.0%})"
+        )
+    if failed_requests:
+        logger.error(f"{failed_requests} requêtes en échec")
+    if failed_requests:
+        return 1
+    if regressions:
+        return 0 if args.warn_only else 1
+    if baseline:
+        logger.info("Aucune régression par rapport aux références")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
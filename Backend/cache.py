@@ -0,0 +1,107 @@
+"""
+Cache LRU/TTL des prédictions, placé devant le modèle.
+
+La clé est une empreinte de la fenêtre brute (12, 29), de la maladie (qui
+détermine les facteurs de correction) et de la version du modèle. La mémoire
+occupée est bornée: les entrées les moins récemment utilisées sont évincées
+au-delà du budget.
+Le cache doit être vidé à chaque rechargement du modèle ou des scalers.
+"""
+import hashlib
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Surcoût approximatif d'une entrée (OrderedDict, tuple, horodatage)
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class PredictionCache:
+    """Cache LRU borné en mémoire, avec expiration des entrées"""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, ttl_seconds=3600.0):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._clears = 0
+
+    @staticmethod
+    def make_key(raw_sequence, disease, model_version=""):
+        """Empreinte de la fenêtre brute (12, 29), de la maladie et de la version du modèle"""
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(np.ascontiguousarray(raw_sequence, dtype=np.float64).tobytes())
+        digest.update(disease.encode("utf-8"))
+        digest.update(b"\0" + model_version.encode("utf-8"))
+        return digest.digest()
+
+    @staticmethod
+    def _entry_size(key, value):
+        return ENTRY_OVERHEAD_BYTES + len(key) + sum(
+            item.nbytes if isinstance(item, np.ndarray) else sys.getsizeof(item) for item in value
+        )
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            value, size, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self._bytes -= size
+                self._expirations += 1
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return value
+
+    def put(self, key, value):
+        size = self._entry_size(key, value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+            self._bytes += size
+            # Évincer les entrées les moins récemment utilisées au-delà du budget
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size, _) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._clears += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / lookups, 4) if lookups else 0.0,
+                "miss_rate": round(self._misses / lookups, 4) if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "clears": self._clears,
+            }
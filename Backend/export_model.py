@@ -0,0 +1,108 @@
+"""
+Export de models/model.keras en artefacts d'inférence optimisés, puis
+comparaison de latence de tous les moteurs disponibles.
+
+Produit dans le dossier des modèles :
+- model_tf_function/     : SavedModel avec une fonction tracée de signature (None, 12, 29)
+- model.tflite           : flatbuffer TFLite (exécuté avec le délégué XNNPACK)
+- backend_benchmark.json : latences par moteur, lu par l'API avec INFERENCE_BACKEND=auto
+
+Utilisation :
+    python export_model.py --models-dir models
+"""
+import argparse
+import json
+import logging
+import os
+
+from backends import (
+    ARTIFACTS,
+    BENCHMARK_REPORT,
+    NUM_FEATURES,
+    SEQUENCE_LENGTH,
+    benchmark_backends,
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def export_tf_function(model, output_path):
+    """Trace le modèle avec une signature d'entrée fixe et l'exporte en SavedModel"""
+    import tensorflow as tf
+
+    @tf.function(
+        input_signature=[tf.TensorSpec([None, SEQUENCE_LENGTH, NUM_FEATURES], tf.float32, name="sequences")]
+    )
+    def serve(sequences):
+        return {"predictions": model(sequences, training=False)}
+
+    module = tf.Module()
+    module.model = model
+    module.serve = serve
+    tf.saved_model.save(module, output_path, signatures={"serving_default": serve})
+
+
+def tflite_converter(model, batch_size=1):
+    """Convertisseur TFLite du modèle, avec une forme d'entrée statique"""
+    import tensorflow as tf
+
+    # Une forme d'entrée statique permet la fusion de la LSTM en un seul
+    # opérateur TFLite; les lots plus grands sont découpés à l'exécution
+    run_model = tf.function(lambda sequences: model(sequences, training=False))
+    concrete_function = run_model.get_concrete_function(
+        tf.TensorSpec([batch_size, SEQUENCE_LENGTH, NUM_FEATURES], tf.float32)
+    )
+    return tf.lite.TFLiteConverter.from_concrete_functions([concrete_function], model)
+
+
+def export_tflite(model, output_path, batch_size=1):
+    """Convertit le modèle en flatbuffer TFLite (opérateurs natifs uniquement)"""
+    import tensorflow as tf
+
+    converter = tflite_converter(model, batch_size)
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export et benchmark des moteurs d'inférence")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--batch-sizes", default="1,32", help="Tailles de lot mesurées")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--tflite-batch-size", type=int, default=1, help="Taille de lot figée du modèle TFLite")
+    parser.add_argument("--skip-export", action="store_true", help="Benchmark seulement")
+    args = parser.parse_args()
+
+    if not args.skip_export:
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(os.path.join(args.models_dir, ARTIFACTS["keras"]))
+
+        logger.info("Export de la fonction tracée (SavedModel)")
+        export_tf_function(model, os.path.join(args.models_dir, ARTIFACTS["tf_function"]))
+
+        logger.info("Conversion TFLite")
+        export_tflite(model, os.path.join(args.models_dir, ARTIFACTS["tflite"]), args.tflite_batch_size)
+
+    batch_sizes = tuple(int(size) for size in args.batch_sizes.split(","))
+    logger.info(f"Benchmark des moteurs (lots {batch_sizes}, {args.repeats} répétitions)")
+    report = benchmark_backends(args.models_dir, batch_sizes, args.repeats)
+
+    with open(os.path.join(args.models_dir, BENCHMARK_REPORT), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    for entry in report["backends"]:
+        if "error" in entry:
+            logger.info(f"  {entry['backend']:<12} erreur: {entry['error']}")
+            continue
+        latencies = ", ".join(
+            f"lot {size}: {values['p50_ms']:.3f} ms" for size, values in entry["latency"].items()
+        )
+        logger.info(f"  {entry['backend']:<12} {latencies}")
+    logger.info(f"Moteur le plus rapide: {report['fastest']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Table hebdomadaire des features précalculée (feature store), projetée en mémoire.
+
+Le dossier est produit par ML/Model/etl.py: features.npy (lignes, 29) dans
+l'ordre FEATURE_ORDER, weeks.npy (lundi de chaque ligne), index.csv (première
+ligne et nombre de semaines de chaque couple maladie/localisation) et
+manifest.json. Les tableaux sont ouverts avec mmap_mode="r": rien n'est copié
+au démarrage et les pages sont partagées entre les workers gunicorn.
+
+Les semaines d'une localisation étant contiguës, la fenêtre de 12 semaines
+qui se termine à une semaine donnée est une tranche de lignes calculée
+directement depuis l'index, sans recherche.
+
+Les features capées à l'entraînement (taux de croissance à ±10) le sont par
+etl.py, qui l'indique dans le manifeste. Un feature store construit sans ce
+capage (ancienne version de l'ETL) est capé à la lecture de chaque fenêtre.
+"""
+import csv
+import json
+import os
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+# Features capées avant l'entraînement (LSTM.ipynb, cellule 5; train.py): les
+# fenêtres du feature store le sont aussi, comme les historiques du notebook
+CLIPPED_FEATURES = {"cases_growth_rate": 10, "deaths_growth_rate": 10}
+
+
+class FeatureStoreError(ValueError):
+    """Requête impossible à servir depuis le feature store (série ou semaine inconnue)"""
+
+
+def parse_week(value):
+    """
+    Lundi de la semaine demandée: date ISO ("2023-05-17", n'importe quel jour
+    de la semaine) ou semaine ISO ("2023-W20")
+    """
+    text = str(value).strip()
+    try:
+        if "W" in text.upper():
+            day = datetime.strptime(text.upper() + "-1", "%G-W%V-%u").date()
+        else:
+            day = date.fromisoformat(text[:10])
+    except ValueError:
+        raise FeatureStoreError(
+            f"Semaine invalide: '{value}' (attendu: date AAAA-MM-JJ ou semaine ISO AAAA-Www)"
+        )
+    return day - timedelta(days=day.weekday())
+
+
+class FeatureStore:
+    """Fenêtres (12, 29) servies par tranche de lignes depuis la table projetée en mémoire"""
+
+    def __init__(self, path, feature_order, sequence_length, clipped_features=None):
+        self.path = path
+        self.sequence_length = sequence_length
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        if self.manifest.get("feature_order") != list(feature_order):
+            raise ValueError("Le feature store n'est pas dans l'ordre FEATURE_ORDER de l'API")
+
+        # Capages {feature: borne} attendus par le modèle et absents du feature store
+        done = self.manifest.get("clipped_features") or {}
+        self._clip = [
+            (list(feature_order).index(feature), bound)
+            for feature, bound in (clipped_features or {}).items()
+            if done.get(feature) != bound
+        ]
+
+        self.features = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+        self.weeks = np.load(os.path.join(path, "weeks.npy"), mmap_mode="r")
+        if self.features.shape != (len(self.weeks), len(feature_order)):
+            raise ValueError(f"Forme du feature store invalide: {self.features.shape}")
+
+        # (maladie, localisation) -> (première ligne, nombre de semaines, première semaine)
+        self.series = {}
+        with open(os.path.join(path, "index.csv"), newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                self.series[(row["disease"], row["location"])] = (
+                    int(row["start_row"]),
+                    int(row["n_weeks"]),
+                    date.fromisoformat(row["first_week"]),
+                )
+        self.locations = {}
+        for disease, location in self.series:
+            self.locations.setdefault(disease, []).append(location)
+
+    @property
+    def diseases(self):
+        return list(self.locations)
+
+    def end_row(self, disease, location, week):
+        """Ligne de la semaine `week` (lundi) et première ligne de la fenêtre qui s'y termine"""
+        entry = self.series.get((disease, location))
+        if entry is None:
+            raise FeatureStoreError(f"Aucune donnée hebdomadaire pour {disease} / {location}")
+        start_row, n_weeks, first_week = entry
+        offset = (week - first_week).days // 7
+        if offset < 0 or offset >= n_weeks:
+            last_week = first_week + timedelta(weeks=n_weeks - 1)
+            raise FeatureStoreError(
+                f"Semaine {week.isoformat()} hors de l'historique de {location} "
+                f"({first_week.isoformat()} - {last_week.isoformat()})"
+            )
+        if offset < self.sequence_length - 1:
+            raise FeatureStoreError(
+                f"Historique insuffisant pour {location} au {week.isoformat()}: {offset + 1} semaines, "
+                f"minimum requis: {self.sequence_length}"
+            )
+        return start_row + offset
+
+    def clip(self, windows):
+        """Applique les capages manquants (copie); sans capage à faire, renvoie windows tel quel"""
+        if not self._clip:
+            return windows
+        windows = np.array(windows, dtype=np.float64)
+        for column, bound in self._clip:
+            np.clip(windows[..., column], -bound, bound, out=windows[..., column])
+        return windows
+
+    def window(self, disease, location, week):
+        """
+        Fenêtre brute (12, 29) qui se termine à la semaine `week` (vue sur la
+        table, sans copie, si le feature store est déjà capé)
+        """
+        end = self.end_row(disease, location, week)
+        return self.clip(self.features[end - self.sequence_length + 1:end + 1])
+
+    def windows_for_week(self, disease, week, locations=None):
+        """
+        Fenêtres de toutes les localisations (ou de `locations`) à la semaine
+        `week`, rassemblées en un seul tenseur (N, 12, 29). Renvoie les
+        localisations servies, le tenseur et les erreurs {localisation: message}.
+        """
+        if disease not in self.locations:
+            raise FeatureStoreError(f"Aucune donnée hebdomadaire pour la maladie {disease}")
+        served, ends, errors = [], [], {}
+        for location in self.locations[disease] if locations is None else locations:
+            try:
+                ends.append(self.end_row(disease, location, week))
+            except FeatureStoreError as e:
+                errors[location] = str(e)
+                continue
+            served.append(location)
+        rows = np.asarray(ends, dtype=np.intp)[:, np.newaxis] + np.arange(1 - self.sequence_length, 1)
+        return served, self.clip(self.features[rows]), errors
+
+    def describe(self):
+        return {
+            "path": self.path,
+            "rows": int(len(self.weeks)),
+            "series": len(self.series),
+            "diseases": {disease: len(locations) for disease, locations in self.locations.items()},
+            "first_week": str(self.weeks.min()) if len(self.weeks) else None,
+            "last_week": str(self.weeks.max()) if len(self.weeks) else None,
+            "created_at": self.manifest.get("created_at"),
+        }
@@ -0,0 +1,54 @@
+"""
+Configuration gunicorn du mode production.
+
+    gunicorn -c gunicorn.conf.py api:app
+
+Par défaut (preload_app), le modèle est chargé une seule fois, dans le
+processus maître avant le fork: les workers partagent sa mémoire (import de
+TensorFlow et poids compris) et sont prêts dès leur création. Avec
+MODEL_BACKGROUND_LOAD=true, chaque worker charge au contraire son propre
+modèle dans un thread de fond après le fork: il accepte les connexions
+aussitôt (/health/ready répond HTTP 503 jusqu'à la fin du chargement), au
+prix d'une mémoire multipliée par le nombre de workers. Chaque worker sert les
+requêtes avec un nombre borné de threads et limite les inférences
+simultanées (MAX_CONCURRENT_REQUESTS): au-delà, les requêtes attendent au plus
+QUEUE_TIMEOUT_S puis sont rejetées en HTTP 503.
+"""
+import multiprocessing
+import os
+
+bind = f"{os.environ.get('API_HOST', '0.0.0.0')}:{os.environ.get('API_PORT', '5000')}"
+workers = int(os.environ.get("GUNICORN_WORKERS", multiprocessing.cpu_count()))
+worker_class = "gthread"
+threads = int(os.environ.get("GUNICORN_THREADS", "8"))
+timeout = int(os.environ.get("REQUEST_TIMEOUT_S", "30"))
+graceful_timeout = timeout
+keepalive = 5
+preload_app = os.environ.get("GUNICORN_PRELOAD", "true").lower() == "true"
+accesslog = "-"
+
+# Chargement bloquant dans le maître (mémoire partagée) si l'application est préchargée
+os.environ.setdefault("MODEL_BACKGROUND_LOAD", "false" if preload_app else "true")
+
+# Chaque worker borne ses threads de calcul pour que les workers ne se
+# disputent pas les cœurs (à fixer avant l'import de NumPy/TensorFlow)
+inference_threads = os.environ.setdefault("INFERENCE_THREADS", "1")
+for variable in ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS",
+                 "TF_NUM_INTRAOP_THREADS", "TF_NUM_INTEROP_THREADS"):
+    os.environ.setdefault(variable, inference_threads)
+
+# Limite d'inférences simultanées par worker (0 = illimitée): la moitié des
+# threads, pour que la file se forme ici plutôt que sur les cœurs et que les
+# autres threads restent libres (santé, métriques, flux). Plusieurs requêtes
+# en vol restent nécessaires pour que le micro-batching forme des lots.
+os.environ.setdefault("MAX_CONCURRENT_REQUESTS", str(max(int(inference_threads), threads // 2)))
+# Les threads de fond (chargement du modèle, surveillance du dossier des modèles,
+# travaux) sont démarrés dans chaque worker après le fork, pas dans le maître
+os.environ["API_PREFORK_SERVER"] = "1"
+os.environ.setdefault("MODEL_WATCH_INTERVAL_S", "10")
+
+
+def post_fork(server, worker):
+    import api
+
+    api.start_background_tasks()
@@ -0,0 +1,277 @@
+"""
+Travaux de prédiction en masse, traités en arrière-plan.
+
+Un travail est soumis en une requête (lot JSON/msgpack, tableau .npy ou
+référence à un fichier produit par le générateur), puis traité par paquets de
+chunk_size éléments par les threads de JobRunner. L'état des travaux et les
+résultats de chaque paquet sont enregistrés dans une base SQLite (mode WAL)
+partagée par les workers gunicorn: ils survivent à un redémarrage et se
+téléchargent paquet par paquet.
+
+Un travail en cours est réservé par un thread pour lease_s secondes, bail
+renouvelé à chaque paquet enregistré: si le processus s'arrête, le travail
+est repris (par un autre worker, ou après redémarrage) au premier paquet non
+enregistré.
+"""
+import json
+import logging
+import os
+import shutil
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class JobNotFound(KeyError):
+    """Travail inconnu ou supprimé"""
+
+
+class JobStore:
+    """État des travaux et résultats par paquet, partagés entre processus via SQLite"""
+
+    def __init__(self, root, retention_s=7 * 24 * 3600.0):
+        self.root = root
+        self.retention_s = retention_s
+        self._local = threading.local()
+        with self._connection() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    state TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    total INTEGER NOT NULL,
+                    chunk_size INTEGER NOT NULL,
+                    chunks INTEGER NOT NULL,
+                    chunks_done INTEGER NOT NULL DEFAULT 0,
+                    succeeded INTEGER NOT NULL DEFAULT 0,
+                    failed INTEGER NOT NULL DEFAULT 0,
+                    error TEXT,
+                    owner TEXT,
+                    lease_until REAL,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, created_at)")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS job_chunks (
+                    job_id TEXT NOT NULL,
+                    chunk INTEGER NOT NULL,
+                    results TEXT NOT NULL,
+                    PRIMARY KEY (job_id, chunk)
+                )
+                """
+            )
+
+    def _connection(self):
+        # Une connexion par thread et par processus (une connexion SQLite ne survit pas à un fork)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            os.makedirs(self.root, exist_ok=True)
+            connection = sqlite3.connect(os.path.join(self.root, "jobs.db"), timeout=5.0, isolation_level=None)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def new_job(self):
+        """Identifiant d'un nouveau travail et son dossier (fichiers d'entrée reçus avec la requête)"""
+        job_id = uuid.uuid4().hex
+        directory = self.job_dir(job_id)
+        os.makedirs(directory)
+        return job_id, directory
+
+    def job_dir(self, job_id):
+        return os.path.join(self.root, job_id)
+
+    def create(self, job_id, source, total, chunk_size):
+        """Met en file un travail de `total` éléments; source décrit l'entrée (voir api.iter_job_chunks)"""
+        self._purge_expired()
+        now = time.time()
+        self._connection().execute(
+            "INSERT INTO jobs (id, state, source, total, chunk_size, chunks, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (job_id, QUEUED, json.dumps(source), total, chunk_size, -(-total // chunk_size), now),
+        )
+
+    def _purge_expired(self):
+        rows = self._connection().execute(
+            "SELECT id FROM jobs WHERE state IN (?, ?) AND finished_at < ?",
+            (DONE, FAILED, time.time() - self.retention_s),
+        ).fetchall()
+        for row in rows:
+            self.delete(row["id"])
+
+    def claim(self, owner, lease_s):
+        """Réserve le plus ancien travail en attente (ou dont le bail a expiré); None s'il n'y en a pas"""
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute(
+                "SELECT id FROM jobs WHERE state = ? OR (state = ? AND lease_until < ?) ORDER BY created_at LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is not None:
+                connection.execute(
+                    "UPDATE jobs SET state = ?, owner = ?, lease_until = ?, started_at = COALESCE(started_at, ?) "
+                    "WHERE id = ?",
+                    (RUNNING, owner, now + lease_s, now, row["id"]),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return None if row is None else self.get(row["id"])
+
+    def save_chunk(self, job_id, owner, chunk, results, succeeded, lease_s):
+        """
+        Enregistre les résultats d'un paquet et renouvelle le bail. Renvoie
+        False si le travail a été supprimé ou repris par un autre thread.
+        """
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = connection.execute("SELECT owner, state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            owned = row is not None and row["owner"] == owner and row["state"] == RUNNING
+            if owned:
+                connection.execute(
+                    "INSERT OR REPLACE INTO job_chunks VALUES (?, ?, ?)",
+                    (job_id, chunk, json.dumps(results, ensure_ascii=False)),
+                )
+                connection.execute(
+                    "UPDATE jobs SET chunks_done = ?, succeeded = succeeded + ?, failed = failed + ?, "
+                    "lease_until = ? WHERE id = ?",
+                    (chunk + 1, succeeded, len(results) - succeeded, time.time() + lease_s, job_id),
+                )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return owned
+
+    def finish(self, job_id, owner, error=None):
+        self._connection().execute(
+            "UPDATE jobs SET state = ?, error = ?, owner = NULL, lease_until = NULL, finished_at = ? "
+            "WHERE id = ? AND owner = ?",
+            (DONE if error is None else FAILED, error, time.time(), job_id, owner),
+        )
+
+    def release(self, job_id, owner):
+        """Remet un travail en file (erreur passagère: modèle non chargé, serveur saturé)"""
+        self._connection().execute(
+            "UPDATE jobs SET state = ?, owner = NULL, lease_until = NULL WHERE id = ? AND owner = ?",
+            (QUEUED, job_id, owner),
+        )
+
+    def get(self, job_id):
+        row = self._connection().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise JobNotFound(job_id)
+        job = dict(row)
+        job["source"] = json.loads(job["source"])
+        return job
+
+    def chunk_results(self, job_id, chunk):
+        """Résultats d'un paquet, None s'il n'est pas encore traité"""
+        row = self._connection().execute(
+            "SELECT results FROM job_chunks WHERE job_id = ? AND chunk = ?", (job_id, chunk)
+        ).fetchone()
+        return None if row is None else json.loads(row["results"])
+
+    def delete(self, job_id):
+        """Supprime un travail (en cours ou non), ses résultats et ses fichiers d'entrée"""
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            deleted = connection.execute("DELETE FROM jobs WHERE id = ?", (job_id,)).rowcount
+            connection.execute("DELETE FROM job_chunks WHERE job_id = ?", (job_id,))
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        shutil.rmtree(self.job_dir(job_id), ignore_errors=True)
+        if not deleted:
+            raise JobNotFound(job_id)
+
+    def stats(self):
+        rows = self._connection().execute("SELECT state, COUNT(*) AS n FROM jobs GROUP BY state").fetchall()
+        counts = {state: 0 for state in (QUEUED, RUNNING, DONE, FAILED)}
+        counts.update({row["state"]: row["n"] for row in rows})
+        return counts
+
+
+class JobRunner:
+    """
+    Threads de traitement des travaux d'un processus. run_job(job, premier
+    paquet) produit les résultats des paquets restants, un par un; chaque
+    paquet est enregistré avant de calculer le suivant.
+    """
+
+    def __init__(self, store, run_job, workers=1, poll_interval_s=1.0, lease_s=30.0, retry_on=()):
+        self.store = store
+        self.run_job = run_job
+        self.workers = workers
+        self.poll_interval_s = poll_interval_s
+        self.lease_s = lease_s
+        self.retry_on = tuple(retry_on)
+        self._wake = threading.Event()
+        self._started_pid = None
+
+    def start(self):
+        """Démarre les threads (une fois par processus, après le fork sous gunicorn)"""
+        if self.workers <= 0 or self._started_pid == os.getpid():
+            return
+        self._started_pid = os.getpid()
+        for index in range(self.workers):
+            owner = f"{socket.gethostname()}:{os.getpid()}:{index}"
+            threading.Thread(target=self._loop, args=(owner,), name=f"job-runner-{index}", daemon=True).start()
+
+    def notify(self):
+        """Réveille les threads en attente (nouveau travail soumis dans ce processus)"""
+        self._wake.set()
+
+    def _loop(self, owner):
+        while True:
+            try:
+                job = self.store.claim(owner, self.lease_s)
+            except sqlite3.Error as e:
+                logger.error(f"Erreur de lecture de la file des travaux: {e}")
+                job = None
+            if job is None:
+                self._wake.wait(self.poll_interval_s)
+                self._wake.clear()
+                continue
+            self._run(job, owner)
+
+    def _run(self, job, owner):
+        chunk = job["chunks_done"]
+        try:
+            for results in self.run_job(job, chunk):
+                succeeded = sum(1 for result in results if result.get("status") == "success")
+                if not self.store.save_chunk(job["id"], owner, chunk, results, succeeded, self.lease_s):
+                    logger.info(f"Travail {job['id']} supprimé ou repris ailleurs, arrêt")
+                    return
+                chunk += 1
+        except self.retry_on as e:
+            logger.warning(f"Travail {job['id']} remis en file au paquet {chunk}: {e or type(e).__name__}")
+            self.store.release(job["id"], owner)
+            time.sleep(self.poll_interval_s)
+            return
+        except Exception as e:
+            logger.error(f"Échec du travail {job['id']} au paquet {chunk}: {e}")
+            self.store.finish(job["id"], owner, error=str(e))
+            return
+        self.store.finish(job["id"], owner)
+        logger.info(f"Travail {job['id']} terminé: {job['total']} éléments")
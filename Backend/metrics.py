@@ -0,0 +1,215 @@
+"""
+Métriques du chemin critique au format d'exposition Prometheus.
+
+Implémentation minimale (compteurs, jauges, histogrammes à buckets fixes)
+sans dépendance: une observation coûte un appel à perf_counter et une mise à
+jour sous verrou, ce qui permet de la laisser active en production.
+Les métriques sont propres à chaque processus (un worker gunicorn = une série).
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Buckets de latence en secondes (de 0,1 ms à 10 s)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+# Buckets de taille de lot
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1000)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names, label_values, extra=None):
+    pairs = list(zip(label_names, label_values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        super().__init__(name, documentation, label_names)
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = self.header()
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.label_names, key, ("le", _format_value(float(bound))))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+                lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Ensemble des métriques exposées sur /metrics"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, label_names=()):
+        return self.register(Counter(name, documentation, label_names))
+
+    def gauge(self, name, documentation, label_names=()):
+        return self.register(Gauge(name, documentation, label_names))
+
+    def histogram(self, name, documentation, label_names=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, label_names, buckets))
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "api_request_duration_seconds", "Durée totale des requêtes HTTP", ("endpoint",)
+)
+REQUESTS = registry.counter(
+    "api_requests_total", "Requêtes HTTP par endpoint et code de statut", ("endpoint", "status")
+)
+STAGE_DURATION = registry.histogram(
+    "api_stage_duration_seconds",
+    "Durée de chaque étape du chemin critique (parse, prepare, scaler, model, inverse_transform, jsonify)",
+    ("stage",),
+)
+PREDICTIONS = registry.counter(
+    "api_predictions_total", "Prédictions servies par endpoint et famille de maladie", ("endpoint", "disease")
+)
+PREDICTION_ERRORS = registry.counter(
+    "api_prediction_errors_total",
+    "Erreurs de prédiction par endpoint, famille de maladie et type",
+    ("endpoint", "disease", "type"),
+)
+REQUEST_BATCH_SIZE = registry.histogram(
+    "api_request_batch_size", "Nombre de séquences par requête", ("endpoint",), BATCH_SIZE_BUCKETS
+)
+INFERENCE_BATCH_SIZE = registry.histogram(
+    "api_inference_batch_size", "Nombre de séquences par passe avant du modèle", (), BATCH_SIZE_BUCKETS
+)
+UNCERTAINTY_DURATION = registry.histogram(
+    "api_uncertainty_duration_seconds",
+    "Durée des passes stochastiques groupées d'une requête, par nombre de passes K",
+    ("samples",),
+)
+MODEL_LOAD_SECONDS = registry.gauge(
+    "api_model_load_seconds", "Durée de chargement et de préchauffage de la version active", ()
+)
+MODEL_INFO = registry.gauge(
+    "api_model_info", "Version et moteur d'inférence actifs", ("version", "backend")
+)
+
+
+# Étapes de la requête profilée par le thread courant (voir profiling.py)
+stage_log = threading.local()
+
+
+@contextmanager
+def _logged_stage(name, stages):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - started
+        STAGE_DURATION.observe(duration, stage=name)
+        stages.append((name, duration))
+
+
+def stage(name):
+    """Chronomètre une étape du chemin critique"""
+    stages = getattr(stage_log, "stages", None)
+    if stages is not None:
+        return _logged_stage(name, stages)
+    return STAGE_DURATION.time(stage=name)
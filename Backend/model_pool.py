@@ -0,0 +1,172 @@
+"""
+Modèles dédiés par maladie (famille ou variante), chargés à la demande.
+
+models/diseases.json associe un libellé de maladie à un dossier d'artefacts
+de models/diseases/, organisé comme models/ (model.keras ou autres artefacts
+de backends.py, scalers, VERSION):
+
+    {"MonkeyPox": "monkeypox", "Influenza": "influenza", "Influenza-H5N1": "influenza_h5n1"}
+
+Une variante ("MonkeyPox-Virulent") est servie par son propre modèle s'il est
+déclaré, sinon par celui de sa famille, sinon par le modèle principal
+(COVID-19) avec les facteurs de correction de l'API.
+
+Un modèle est chargé au premier usage. Quand la mémoire estimée des modèles
+chargés dépasse le budget, les moins récemment utilisés sont déchargés; une
+requête en cours garde sa référence au modèle jusqu'au bout. L'estimation est
+la taille des artefacts sur disque: la mémoire réelle d'un modèle chargé
+(graphe, noyaux, tampons de l'allocateur) est plus grande, et l'allocateur ne
+rend pas toujours au système la mémoire d'un modèle déchargé. Le budget est
+donc approximatif.
+"""
+import gc
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from registry import DISEASE_MODELS_DIR, DISEASE_MODELS_FILE, load_version
+
+logger = logging.getLogger(__name__)
+
+
+def artifact_bytes(path):
+    """Mémoire estimée d'un modèle: taille de ses artefacts sur disque"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+class ModelPool:
+    """Modèles dédiés chargés, du moins au plus récemment utilisé, sous un budget mémoire"""
+
+    def __init__(self, models_dir, backend_name, input_shape, memory_budget_bytes, family=None):
+        self.models_dir = models_dir
+        self.backend_name = backend_name
+        self.input_shape = input_shape
+        self.memory_budget_bytes = memory_budget_bytes
+        self.family = family or (lambda disease: disease)
+        self.mapping = {}
+        self.errors = {}
+        self.loads = 0
+        self.evictions = 0
+        self._models = OrderedDict()  # nom -> (ModelVersion, octets estimés)
+        self._lock = threading.Lock()
+        # Un verrou par nom, conservé entre les rechargements: un chargement en
+        # cours et un chargement après reload() ne peuvent pas se chevaucher
+        self._load_locks = {}
+        # Incrémenté par reload(): un modèle chargé avant n'est pas conservé
+        self._generation = 0
+        self.reload()
+
+    def reload(self):
+        """Relit diseases.json et décharge tous les modèles dédiés (rechargés au prochain usage)"""
+        path = os.path.join(self.models_dir, DISEASE_MODELS_FILE)
+        mapping = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    mapping = {str(disease): str(name) for disease, name in json.load(f).items()}
+            except (OSError, ValueError, AttributeError) as e:
+                logger.error(f"{path} invalide, modèles dédiés désactivés: {e}")
+        with self._lock:
+            self.mapping = mapping
+            self.errors = {}
+            unloaded = [version for version, _ in self._models.values()]
+            self._models.clear()
+            self._generation += 1
+        self._release(unloaded)
+        if mapping:
+            logger.info(f"Modèles dédiés déclarés: {len(set(mapping.values()))} pour {len(mapping)} maladies")
+
+    def resolve(self, disease):
+        """Nom du modèle dédié d'une maladie (variante, sinon famille), None s'il n'y en a pas"""
+        mapping = self.mapping
+        return mapping.get(disease) or mapping.get(self.family(disease))
+
+    def model_for(self, disease):
+        """Modèle dédié de la maladie (chargé si besoin); None: servir avec le modèle principal"""
+        name = self.resolve(disease)
+        if name is None or name in self.errors:
+            return None
+        return self.get(name)
+
+    def get(self, name):
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is not None:
+                self._models.move_to_end(name)
+                return entry[0]
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        # Un seul chargement par modèle, sans bloquer les requêtes des autres modèles
+        with load_lock:
+            with self._lock:
+                entry = self._models.get(name)
+                if entry is not None:
+                    self._models.move_to_end(name)
+                    return entry[0]
+                generation = self._generation
+            path = os.path.join(self.models_dir, DISEASE_MODELS_DIR, name)
+            try:
+                version = load_version(path, self.backend_name, self.input_shape)
+            except Exception as e:
+                logger.error(f"Échec du chargement du modèle dédié {name}, modèle principal utilisé: {e}")
+                with self._lock:
+                    if generation == self._generation:
+                        self.errors[name] = str(e)
+                return None
+            version.version = f"{name}/{version.version}"
+            version.dedicated_to = name
+            size = artifact_bytes(path)
+            evicted = []
+            with self._lock:
+                # Rechargé entre-temps: le modèle sert cette requête sans être conservé
+                if generation == self._generation:
+                    self._models[name] = (version, size)
+                    self.loads += 1
+                    evicted = self._evict(keep=name)
+            self._release(evicted)
+            return version
+
+    def _evict(self, keep):
+        """Retire les modèles les moins récemment utilisés au-delà du budget (jamais `keep`) et les renvoie"""
+        evicted = []
+        while self._used_bytes() > self.memory_budget_bytes and len(self._models) > 1:
+            name = next(iter(self._models))
+            if name == keep:
+                break
+            evicted.append(self._models.pop(name)[0])
+            self.evictions += 1
+            logger.info(f"Modèle dédié {name} déchargé (budget mémoire des modèles atteint)")
+        return evicted
+
+    @staticmethod
+    def _release(versions):
+        """Libère l'état global des moteurs déchargés, hors du verrou du pool"""
+        if not versions:
+            return
+        for version in versions:
+            version.model.release()
+        # Les modèles Keras forment des cycles de références: collectés tout de suite
+        gc.collect()
+
+    def _used_bytes(self):
+        return sum(size for _, size in self._models.values())
+
+    def describe(self):
+        with self._lock:
+            return {
+                "mapping": dict(self.mapping),
+                "loaded": [
+                    {"name": name, "version": version.version, "estimated_mb": round(size / 2**20, 2)}
+                    for name, (version, size) in self._models.items()
+                ],
+                "memory_budget_mb": round(self.memory_budget_bytes / 2**20, 1),
+                "memory_used_mb": round(self._used_bytes() / 2**20, 2),
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "errors": dict(self.errors),
+            }
@@ -0,0 +1,229 @@
+"""
+Moteur d'inférence LSTM en NumPy pur.
+
+Lit l'architecture (config.json) et les poids (model.weights.h5) directement
+dans l'archive .keras et exécute la passe avant LSTM/Dense en NumPy, par lots.
+Permet de servir le modèle sans importer TensorFlow.
+
+Avec un générateur aléatoire (predict(..., rng=...)), les dropouts sont
+actifs comme à l'entraînement (MC dropout): masques d'entrée et récurrent de
+la LSTM tirés une fois par séquence et par porte (comme tf.keras, dont la
+LSTM avec recurrent_dropout utilise implementation=1), puis couches Dropout.
+
+Vérification de l'équivalence avec Keras (nécessite TensorFlow) :
+    python numpy_lstm.py --check models/model.keras
+"""
+import argparse
+import io
+import json
+import zipfile
+
+import h5py
+import numpy as np
+
+# Tolérance par défaut de la comparaison avec Keras (sorties normalisées)
+DEFAULT_TOLERANCE = 1e-4
+
+SUPPORTED_ACTIVATIONS = {
+    "linear": lambda x: x,
+    "relu": lambda x: np.maximum(x, 0),
+    "tanh": np.tanh,
+    # Forme stable de la sigmoïde (pas de débordement de exp)
+    "sigmoid": lambda x: 0.5 * (np.tanh(0.5 * x) + 1.0),
+}
+
+
+def _dropout_mask(rng, shape, rate):
+    """Masque de dropout mis à l'échelle (1 / (1 - rate)), comme Keras à l'entraînement"""
+    return (rng.random(shape) >= rate).astype(np.float32) / np.float32(1.0 - rate)
+
+
+def _activation(name):
+    if name not in SUPPORTED_ACTIVATIONS:
+        raise ValueError(f"Activation non supportée par le moteur NumPy: {name}")
+    return SUPPORTED_ACTIVATIONS[name]
+
+
+class _LSTMLayer:
+    def __init__(self, config, kernel, recurrent_kernel, bias):
+        self.units = config["units"]
+        self.return_sequences = config.get("return_sequences", False)
+        self.go_backwards = config.get("go_backwards", False)
+        self.activation = _activation(config.get("activation", "tanh"))
+        self.recurrent_activation = _activation(config.get("recurrent_activation", "sigmoid"))
+        self.dropout = float(config.get("dropout", 0.0))
+        self.recurrent_dropout = float(config.get("recurrent_dropout", 0.0))
+        self.kernel = kernel
+        self.recurrent_kernel = recurrent_kernel
+        self.bias = bias if bias is not None else np.zeros(4 * self.units, dtype=np.float32)
+
+    def __call__(self, inputs, rng=None):
+        n_samples, n_steps, n_features = inputs.shape
+        units = self.units
+        if self.go_backwards:
+            inputs = inputs[:, ::-1]
+
+        # Dropouts actifs: un masque par porte et par séquence, le même à chaque pas de temps
+        recurrent_mask = None
+        if rng is not None and self.dropout > 0:
+            mask = _dropout_mask(rng, (4, n_samples, 1, n_features), self.dropout)
+            kernels = self.kernel.reshape(n_features, 4, units).transpose(1, 0, 2)[:, np.newaxis]
+            # (4, N, T, units) -> (N, T, 4 * units), portes dans l'ordre de Keras
+            projected = np.matmul(inputs[np.newaxis] * mask, kernels)
+            projected = projected.transpose(1, 2, 0, 3).reshape(n_samples, n_steps, 4 * units) + self.bias
+        else:
+            # Projection des entrées pour tous les pas de temps en une seule multiplication
+            projected = inputs @ self.kernel + self.bias
+        if rng is not None and self.recurrent_dropout > 0:
+            recurrent_mask = _dropout_mask(rng, (4, n_samples, units), self.recurrent_dropout)
+            recurrent_kernels = self.recurrent_kernel.reshape(units, 4, units).transpose(1, 0, 2)
+
+        h = np.zeros((n_samples, units), dtype=np.float32)
+        c = np.zeros((n_samples, units), dtype=np.float32)
+        outputs = []
+        for step in range(n_steps):
+            if recurrent_mask is None:
+                z = projected[:, step] + h @ self.recurrent_kernel
+            else:
+                recurrent = np.matmul(h * recurrent_mask, recurrent_kernels)
+                z = projected[:, step] + recurrent.transpose(1, 0, 2).reshape(n_samples, 4 * units)
+            # Ordre des portes Keras: entrée, oubli, cellule, sortie
+            i = self.recurrent_activation(z[:, :units])
+            f = self.recurrent_activation(z[:, units:2 * units])
+            g = self.activation(z[:, 2 * units:3 * units])
+            o = self.recurrent_activation(z[:, 3 * units:])
+            c = f * c + i * g
+            h = o * self.activation(c)
+            if self.return_sequences:
+                outputs.append(h)
+
+        if self.return_sequences:
+            return np.stack(outputs, axis=1)
+        return h
+
+    @property
+    def stochastic(self):
+        return self.dropout > 0 or self.recurrent_dropout > 0
+
+
+class _DenseLayer:
+    def __init__(self, config, kernel, bias):
+        self.activation = _activation(config.get("activation", "linear"))
+        self.kernel = kernel
+        self.bias = bias
+
+    stochastic = False
+
+    def __call__(self, inputs, rng=None):
+        outputs = inputs @ self.kernel
+        if self.bias is not None:
+            outputs = outputs + self.bias
+        return self.activation(outputs)
+
+
+class _DropoutLayer:
+    """Sans effet en inférence; actif seulement pour les passes stochastiques"""
+
+    stochastic = True
+
+    def __init__(self, config):
+        self.rate = float(config["rate"])
+
+    def __call__(self, inputs, rng=None):
+        if rng is None or self.rate <= 0:
+            return inputs
+        return inputs * _dropout_mask(rng, inputs.shape, self.rate)
+
+
+def _layer_vars(weights_file, name, sub_path="vars"):
+    group = weights_file[f"layers/{name}/{sub_path}"]
+    return [np.asarray(group[str(i)], dtype=np.float32) for i in range(len(group))]
+
+
+class NumpyLSTMModel:
+    """Modèle Sequential LSTM/Dense/Dropout exécuté en NumPy"""
+
+    def __init__(self, layers, input_shape):
+        self.layers = layers
+        self.input_shape = input_shape
+
+    @classmethod
+    def from_keras_archive(cls, path):
+        """Charge un modèle Sequential depuis une archive .keras"""
+        with zipfile.ZipFile(path) as archive:
+            config = json.loads(archive.read("config.json"))
+            weights_bytes = archive.read("model.weights.h5")
+
+        if config.get("class_name") != "Sequential":
+            raise ValueError(f"Seuls les modèles Sequential sont supportés: {config.get('class_name')}")
+
+        layers = []
+        input_shape = None
+        with h5py.File(io.BytesIO(weights_bytes), "r") as weights_file:
+            for layer in config["config"]["layers"]:
+                class_name = layer["class_name"]
+                layer_config = layer["config"]
+                name = layer_config["name"]
+                if class_name == "InputLayer":
+                    input_shape = tuple(layer_config["batch_input_shape"][1:])
+                elif class_name == "LSTM":
+                    variables = _layer_vars(weights_file, name, "cell/vars")
+                    bias = variables[2] if layer_config.get("use_bias", True) else None
+                    layers.append(_LSTMLayer(layer_config, variables[0], variables[1], bias))
+                elif class_name == "Dense":
+                    variables = _layer_vars(weights_file, name)
+                    bias = variables[1] if layer_config.get("use_bias", True) else None
+                    layers.append(_DenseLayer(layer_config, variables[0], bias))
+                elif class_name == "Dropout":
+                    layers.append(_DropoutLayer(layer_config))
+                else:
+                    raise ValueError(f"Couche non supportée par le moteur NumPy: {class_name}")
+
+        return cls(layers, input_shape)
+
+    @property
+    def has_dropout(self):
+        return any(layer.stochastic for layer in self.layers)
+
+    def predict(self, sequences, verbose=0, batch_size=None, rng=None):
+        """
+        Même signature que tf.keras.Model.predict pour un usage interchangeable;
+        avec `rng` (np.random.Generator), passe stochastique (dropouts actifs)
+        """
+        outputs = np.asarray(sequences, dtype=np.float32)
+        for layer in self.layers:
+            outputs = layer(outputs, rng)
+        return outputs
+
+
+def check_against_keras(model_path, n_samples=256, tolerance=DEFAULT_TOLERANCE, seed=0):
+    """Compare les sorties NumPy et Keras sur des entrées aléatoires"""
+    import tensorflow as tf
+
+    numpy_model = NumpyLSTMModel.from_keras_archive(model_path)
+    keras_model = tf.keras.models.load_model(model_path)
+
+    rng = np.random.default_rng(seed)
+    sequences = rng.normal(size=(n_samples, *numpy_model.input_shape)).astype(np.float32)
+
+    expected = keras_model.predict(sequences, verbose=0)
+    actual = numpy_model.predict(sequences)
+    max_error = float(np.max(np.abs(expected - actual)))
+    return max_error <= tolerance, max_error
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Moteur d'inférence LSTM NumPy")
+    parser.add_argument("model_path", nargs="?", default="models/model.keras")
+    parser.add_argument("--check", action="store_true", help="Comparer avec Keras")
+    parser.add_argument("--samples", type=int, default=256)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    if args.check:
+        ok, max_error = check_against_keras(args.model_path, args.samples, args.tolerance)
+        print(f"Écart maximal NumPy/Keras: {max_error:.2e} (tolérance {args.tolerance:.0e})")
+        raise SystemExit(0 if ok else 1)
+
+    model = NumpyLSTMModel.from_keras_archive(args.model_path)
+    print(f"Modèle chargé: {len(model.layers)} couches, entrée {model.input_shape}")
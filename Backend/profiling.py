@@ -0,0 +1,145 @@
+"""
+Profilage à la demande d'un processus de l'API, sans redémarrage.
+
+- Profil d'une requête: durée de chaque étape du chemin critique (celles de
+  metrics.stage) et résumé cProfile de l'appel, pour le thread qui la sert.
+- Profil par échantillonnage: les piles de tous les threads du processus
+  sont relevées toutes les interval_s pendant `seconds`, et renvoyées au
+  format « piles repliées » (une ligne `cadre;cadre;cadre N` par pile) lu
+  par flamegraph.pl, speedscope ou inferno.
+
+Rien n'est actif hors profilage: metrics.stage ne fait qu'une lecture
+d'attribut de thread, et le thread d'échantillonnage n'existe que pendant
+un profil.
+"""
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+import metrics
+
+
+class ProfilerBusy(RuntimeError):
+    """Un profil par échantillonnage est déjà en cours dans ce processus"""
+
+
+class RequestProfile:
+    """Étapes chronométrées et profil cProfile d'une requête"""
+
+    def __init__(self):
+        self.stages = []
+        self.profile = cProfile.Profile()
+        self.duration = None
+
+    def summary(self, top=20):
+        """Étapes dans l'ordre d'exécution et fonctions les plus coûteuses (temps cumulé)"""
+        stats = pstats.Stats(self.profile)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE)
+        functions = []
+        for function in stats.fcn_list[:top]:
+            calls, primitive_calls, total_time, cumulative_time, _ = stats.stats[function]
+            filename, line, name = function
+            functions.append(
+                {
+                    "function": f"{os.path.basename(filename)}:{line}({name})" if line else name,
+                    "calls": calls,
+                    "tottime_ms": round(total_time * 1000, 3),
+                    "cumtime_ms": round(cumulative_time * 1000, 3),
+                }
+            )
+        return {
+            "total_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "stages": [{"stage": name, "duration_ms": round(duration * 1000, 3)} for name, duration in self.stages],
+            "cprofile": functions,
+        }
+
+
+def active():
+    """Profil de la requête servie par le thread courant, None hors profilage"""
+    return getattr(metrics.stage_log, "profile", None)
+
+
+@contextmanager
+def profile_request():
+    """Profile le bloc (thread courant): étapes de metrics.stage et cProfile"""
+    profile = RequestProfile()
+    metrics.stage_log.stages = profile.stages
+    metrics.stage_log.profile = profile
+    started = time.perf_counter()
+    profile.profile.enable()
+    try:
+        yield profile
+    finally:
+        profile.profile.disable()
+        profile.duration = time.perf_counter() - started
+        metrics.stage_log.stages = None
+        metrics.stage_log.profile = None
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+def _collapse(frame, thread_name):
+    """Pile d'un thread, de la racine à la feuille, préfixée par le nom du thread"""
+    labels = []
+    while frame is not None:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    labels.append(thread_name)
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Profil par échantillonnage des piles de tous les threads (un seul à la fois par processus)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def sample(self, seconds, interval_s=0.005, exclude=()):
+        """
+        Relève les piles pendant `seconds` (bloquant). Renvoie un Counter
+        {pile repliée: nombre d'échantillons} et le nombre de relevés.
+        Les threads d'identifiant `exclude` (le thread appelant) sont ignorés.
+        """
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusy("Un profil par échantillonnage est déjà en cours")
+        try:
+            ignored = set(exclude) | {threading.get_ident()}
+            stacks = Counter()
+            samples = 0
+            deadline = time.perf_counter() + seconds
+            while time.perf_counter() < deadline:
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+                for ident, frame in sys._current_frames().items():
+                    if ident not in ignored:
+                        stacks[_collapse(frame, names.get(ident, f"thread-{ident}"))] += 1
+                samples += 1
+                time.sleep(interval_s)
+            return stacks, samples
+        finally:
+            self._lock.release()
+
+
+def render_collapsed(stacks):
+    """Piles repliées, une par ligne, des plus fréquentes aux plus rares"""
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+@contextmanager
+def tensorflow_trace(logdir):
+    """Trace des opérations TensorFlow (TensorBoard, onglet Profile) écrite dans logdir"""
+    import tensorflow as tf
+
+    os.makedirs(logdir, exist_ok=True)
+    tf.profiler.experimental.start(logdir)
+    try:
+        yield logdir
+    finally:
+        tf.profiler.experimental.stop()
@@ -0,0 +1,330 @@
+"""
+Variantes quantifiées de models/model.keras et rapport précision / latence.
+
+Produit dans le dossier des modèles :
+- model_float16.tflite      : poids en float16, calcul en float32
+- model_int8_dynamic.tflite : poids int8, activations quantifiées à la volée (dynamic range)
+- model_int8.tflite         : entièrement entier (poids, activations, entrée et sortie int8),
+                              calibré sur des fenêtres du feature store
+- quantization_report.json  : pour le modèle float32 et chaque variante, MAE par cible sur
+                              les séquences de test, écart aux prédictions float32,
+                              latence (lot de 1 et de N) et taille de l'artefact
+
+Les séquences de test sont les 15 % dernières de sequences_metadata.pkl
+(split temporel de LSTM.ipynb), reconstruites depuis le feature store. Si
+aucune n'y figure (feature store construit sans ces localisations), le
+script s'arrête, sauf avec --allow-store-windows: les 15 % dernières
+fenêtres du feature store sont alors utilisées et le rapport l'indique.
+
+Une variante est acceptée d'après son écart aux prédictions du modèle
+float32 (erreur de quantification seule), pas d'après sa MAE face aux
+cibles: l'écart moyen absolu, rapporté à la MAE de test de l'entraînement
+(final_results.txt, sinon MAE float32 mesurée), est la « deviation » du
+rapport. Avec INFERENCE_BACKEND=auto, l'API ne retient une variante que si
+sa deviation reste sous QUANTIZATION_MAX_DEVIATION (5 % par défaut), puis
+charge le moteur le plus rapide (backends.resolve_backend_name).
+
+Utilisation :
+    python quantize.py --models-dir models
+    python quantize.py --models-dir models --feature-store feature_store --batch-sizes 1,64
+"""
+import argparse
+import json
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from backends import (
+    ARTIFACTS,
+    BACKENDS,
+    MAX_DEVIATION,
+    NUM_FEATURES,
+    QUANTIZATION_REPORT,
+    QUANTIZED_BACKENDS,
+    SEQUENCE_LENGTH,
+    benchmark_backend,
+)
+from export_model import tflite_converter
+from feature_store import CLIPPED_FEATURES, FeatureStore, FeatureStoreError
+from registry import SCALER_FEATURES_FILE, SCALER_TARGETS_FILE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PREDICTION_HORIZON = 4
+# Fraction finale des séquences réservée au test (split 70/15/15 de LSTM.ipynb)
+TEST_FRACTION = 0.15
+TARGET_NAMES = ["mortality_rate", "transmission_rate", "spatial_spread"]
+# Moteurs float32 de référence, mesurés s'ils sont disponibles
+REFERENCE_BACKENDS = ["keras", "tflite"]
+
+
+def inference_model(model):
+    """
+    Copie du modèle sans dropout, aux mêmes poids: passe avant identique en
+    inférence, mais la LSTM devient fusionnable en un seul opérateur TFLite,
+    ce que la quantification entière exige
+    """
+    import tensorflow as tf
+
+    config = model.get_config()
+    for layer in config["layers"]:
+        layer_config = layer["config"]
+        for key in ("dropout", "recurrent_dropout", "rate"):
+            if key in layer_config:
+                layer_config[key] = 0.0
+    clone = tf.keras.Sequential.from_config(config)
+    clone.set_weights(model.get_weights())
+    return clone
+
+
+def export_variant(model, variant, output_path, calibration_sequences, batch_size=1):
+    """Convertit et écrit une variante quantifiée"""
+    import tensorflow as tf
+
+    if variant == "float16":
+        # La conversion float16 de la LSTM fusionnée ne se termine pas (TF 2.15): graphe d'origine
+        converter = tflite_converter(model, batch_size)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        converter = tflite_converter(inference_model(model), batch_size)
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == "int8":
+        def representative_dataset():
+            for start in range(0, len(calibration_sequences) - batch_size + 1, batch_size):
+                yield [calibration_sequences[start:start + batch_size]]
+
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+    with open(output_path, "wb") as f:
+        f.write(converter.convert())
+
+
+def store_windows(store, targets, disease):
+    """Fenêtres (12 semaines + 4 semaines d'horizon) des séries d'une maladie, dans l'ordre des séries"""
+    ends = []
+    for (series_disease, _), (start_row, n_weeks, _) in store.series.items():
+        if series_disease == disease:
+            first_end = start_row + SEQUENCE_LENGTH - 1
+            ends.append(np.arange(first_end, start_row + n_weeks - PREDICTION_HORIZON))
+    ends = np.concatenate(ends) if ends else np.empty(0, dtype=np.intp)
+    return window_arrays(store, targets, ends)
+
+
+def window_arrays(store, targets, ends):
+    """
+    Séquences brutes (N, 12, 29), taux de croissance capés comme à
+    l'entraînement, et cibles (N, 3): moyenne des 4 semaines suivant chaque
+    fin de fenêtre
+    """
+    ends = np.asarray(ends, dtype=np.intp)
+    sequences = store.clip(store.features[ends[:, np.newaxis] + np.arange(1 - SEQUENCE_LENGTH, 1)])
+    horizon = targets[ends[:, np.newaxis] + np.arange(1, PREDICTION_HORIZON + 1)]
+    return np.asarray(sequences, dtype=np.float64), np.asarray(horizon, dtype=np.float64).mean(axis=1)
+
+
+def heldout_windows(store, targets, metadata_path, disease):
+    """
+    Séquences de test de sequences_metadata.pkl (location, week_start =
+    première semaine prédite) trouvées dans le feature store. Renvoie les
+    fins de fenêtre et le nombre de séquences de test absentes.
+    """
+    metadata = pd.read_pickle(metadata_path)
+    heldout = metadata.iloc[int((1 - TEST_FRACTION) * len(metadata)):]
+    ends, missing = [], 0
+    for location, week_start in zip(heldout["location"], heldout["week_start"]):
+        try:
+            end = store.end_row(disease, location, week_start.date() - timedelta(weeks=1))
+        except FeatureStoreError:
+            missing += 1
+            continue
+        start_row, n_weeks, _ = store.series[(disease, location)]
+        if end + PREDICTION_HORIZON >= start_row + n_weeks:
+            missing += 1
+            continue
+        ends.append(end)
+    return ends, len(heldout), missing
+
+
+def evaluate(backend, sequences, truth, scaler_targets):
+    """Prédictions dénormalisées et MAE par cible (et moyenne des cibles)"""
+    predictions = scaler_targets.inverse_transform(backend.predict(sequences))
+    mae = np.abs(predictions - truth).mean(axis=0)
+    return predictions, {**{name: float(value) for name, value in zip(TARGET_NAMES, mae)}, "global": float(mae.mean())}
+
+
+def read_reference_mae(path):
+    """MAE de test déclarée dans final_results.txt (LSTM.ipynb ou train.py)"""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        match = re.search(r"MAE Test:\s*([0-9.]+)", f.read())
+    return float(match.group(1)) if match else None
+
+
+def artifact_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Variantes quantifiées du modèle et rapport précision / latence")
+    parser.add_argument("--models-dir", default="models")
+    parser.add_argument("--feature-store", default="feature_store", help="Feature store (etl.py) des séquences")
+    parser.add_argument("--metadata", default=os.path.join("..", "ML", "Model", "sequences_metadata.pkl"),
+                        help="Séquences du notebook, dont les 15 %% dernières servent de test")
+    parser.add_argument("--final-results", default=os.path.join("..", "ML", "Model", "final_results.txt"),
+                        help="MAE de test déclarée à l'entraînement (référence de la deviation)")
+    parser.add_argument("--disease", default="COVID-19", help="Maladie des séries évaluées")
+    parser.add_argument("--variants", default=",".join(QUANTIZED_BACKENDS.values()))
+    parser.add_argument("--calibration-samples", type=int, default=500, help="Fenêtres de calibration int8")
+    parser.add_argument("--batch-sizes", default="1,32", help="Tailles de lot mesurées")
+    parser.add_argument("--repeats", type=int, default=50)
+    parser.add_argument("--tflite-batch-size", type=int, default=1, help="Taille de lot figée des variantes")
+    parser.add_argument("--max-deviation", type=float, default=MAX_DEVIATION,
+                        help="Écart aux prédictions float32, relatif à la MAE de référence, accepté")
+    parser.add_argument("--allow-store-windows", action="store_true",
+                        help="Évaluer sur la fin du feature store si les séquences de test en sont absentes")
+    parser.add_argument("--skip-export", action="store_true", help="Évaluation et benchmark seulement")
+    args = parser.parse_args()
+    variants = args.variants.split(",")
+    backend_names = {variant: name for name, variant in QUANTIZED_BACKENDS.items()}
+    unknown = [variant for variant in variants if variant not in backend_names]
+    if unknown:
+        parser.error(f"variantes inconnues: {', '.join(unknown)}")
+
+    scaler_features = joblib.load(os.path.join(args.models_dir, SCALER_FEATURES_FILE))
+    scaler_targets = joblib.load(os.path.join(args.models_dir, SCALER_TARGETS_FILE))
+    with open(os.path.join(args.feature_store, "manifest.json"), encoding="utf-8") as f:
+        feature_order = json.load(f)["feature_order"]
+    store = FeatureStore(args.feature_store, feature_order, SEQUENCE_LENGTH, CLIPPED_FEATURES)
+    targets = np.load(os.path.join(args.feature_store, "targets.npy"), mmap_mode="r")
+
+    def normalize(sequences):
+        flat = scaler_features.transform(sequences.reshape(-1, NUM_FEATURES))
+        return flat.reshape(-1, SEQUENCE_LENGTH, NUM_FEATURES).astype(np.float32)
+
+    # Séquences de test: celles du notebook si le feature store les contient, sinon fin du feature store
+    all_sequences, all_truth = store_windows(store, targets, args.disease)
+    if not len(all_sequences):
+        raise SystemExit(f"Aucune fenêtre de 16 semaines pour {args.disease} dans {args.feature_store}")
+    test_start = int((1 - TEST_FRACTION) * len(all_sequences))
+    evaluation = {"disease": args.disease}
+    ends, heldout, missing = heldout_windows(store, targets, args.metadata, args.disease)
+    if ends:
+        test_sequences, test_truth = window_arrays(store, targets, ends)
+        evaluation.update(source="sequences_metadata", heldout=heldout, missing=missing)
+    elif args.allow_store_windows:
+        test_sequences, test_truth = all_sequences[test_start:], all_truth[test_start:]
+        evaluation.update(source="feature_store", heldout=heldout, missing=missing)
+        logger.warning(
+            f"Aucune des {heldout} séquences de test de {args.metadata} n'est dans le feature store: "
+            f"évaluation sur les {len(test_sequences)} dernières fenêtres du feature store"
+        )
+    else:
+        raise SystemExit(
+            f"Aucune des {heldout} séquences de test de {args.metadata} n'est dans {args.feature_store} "
+            f"(feature store à reconstruire depuis le CSV OWID complet avec ML/Model/etl.py, "
+            f"ou --allow-store-windows pour évaluer sur la fin du feature store)"
+        )
+    evaluation["sequences"] = len(test_sequences)
+    test_sequences = normalize(test_sequences)
+
+    if not args.skip_export:
+        import tensorflow as tf
+
+        model = tf.keras.models.load_model(os.path.join(args.models_dir, ARTIFACTS["keras"]))
+        # Calibration int8 sur des fenêtres hors test
+        rng = np.random.default_rng(0)
+        calibration = all_sequences[:test_start]
+        calibration = calibration[rng.permutation(len(calibration))[:args.calibration_samples]]
+        calibration = normalize(calibration)
+        for variant in variants:
+            logger.info(f"Conversion de la variante {variant}")
+            export_variant(
+                model, variant, os.path.join(args.models_dir, ARTIFACTS[backend_names[variant]]),
+                calibration, args.tflite_batch_size,
+            )
+
+    batch_sizes = tuple(int(size) for size in args.batch_sizes.split(","))
+    names = [name for name in REFERENCE_BACKENDS if os.path.exists(os.path.join(args.models_dir, ARTIFACTS[name]))]
+    names += [backend_names[variant] for variant in variants]
+    entries = []
+    baseline = None
+    for name in names:
+        path = os.path.join(args.models_dir, ARTIFACTS[name])
+        entry = {"backend": name, "variant": QUANTIZED_BACKENDS.get(name, "float32"), "artifact": ARTIFACTS[name]}
+        try:
+            backend = BACKENDS[name](path)
+            entry["size_bytes"] = artifact_size(path)
+            predictions, entry["mae"] = evaluate(backend, test_sequences, test_truth, scaler_targets)
+            if baseline is None:
+                baseline = {"backend": name, "predictions": predictions, "mae": entry["mae"], "size": entry["size_bytes"]}
+            entry["mae_degradation"] = round(entry["mae"]["global"] / baseline["mae"]["global"] - 1, 6)
+            differences = np.abs(predictions - baseline["predictions"])
+            entry["mae_vs_float32"] = {
+                **{target: float(value) for target, value in zip(TARGET_NAMES, differences.mean(axis=0))},
+                "global": float(differences.mean()),
+            }
+            entry["max_abs_diff"] = float(differences.max())
+            entry["size_ratio"] = round(entry["size_bytes"] / baseline["size"], 4)
+            entry["latency"] = benchmark_backend(backend, batch_sizes, args.repeats)
+            entry["selection_latency_ms"] = entry["latency"][str(min(batch_sizes))]["p50_ms"]
+        except Exception as e:
+            logger.error(f"Échec de l'évaluation du moteur {name}: {str(e)}")
+            entry["error"] = str(e)
+        entries.append(entry)
+
+    # Référence de la deviation: erreur de test déclarée, sinon erreur float32 mesurée
+    reference_test_mae = read_reference_mae(args.final_results)
+    if reference_test_mae:
+        reference = {"source": "final_results", "mae": reference_test_mae}
+    else:
+        reference = {"source": "evaluation", "mae": baseline["mae"]["global"] if baseline else None}
+    for entry in entries:
+        if "error" in entry:
+            continue
+        entry["deviation"] = round(entry["mae_vs_float32"]["global"] / reference["mae"], 6)
+        entry["accepted"] = entry["deviation"] <= args.max_deviation
+
+    accepted = [entry for entry in entries if entry.get("accepted")]
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "baseline": baseline["backend"] if baseline else None,
+        "reference_test_mae": reference_test_mae,
+        "deviation_reference": reference,
+        "evaluation": evaluation,
+        "batch_sizes": list(batch_sizes),
+        "repeats": args.repeats,
+        "max_deviation": args.max_deviation,
+        "backends": entries,
+        "recommended": min(accepted, key=lambda entry: entry["selection_latency_ms"])["backend"] if accepted else None,
+    }
+    with open(os.path.join(args.models_dir, QUANTIZATION_REPORT), "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(f"Évaluation sur {evaluation['sequences']} séquences ({evaluation['source']})")
+    for entry in entries:
+        if "error" in entry:
+            logger.info(f"  {entry['backend']:<20} erreur: {entry['error']}")
+            continue
+        latencies = ", ".join(f"lot {size}: {values['p50_ms']:.3f} ms" for size, values in entry["latency"].items())
+        logger.info(
+            f"  {entry['backend']:<20} MAE {entry['mae']['global']:.5f} ({entry['mae_degradation']:+.2%}), "
+            f"écart au float32 {entry['mae_vs_float32']['global']:.5f} (deviation {entry['deviation']:.2%}), "
+            f"{entry['size_bytes'] / 1024:.0f} Ko, {latencies}"
+        )
+    logger.info(f"Moteur recommandé: {report['recommended']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Registre versionné des modèles, avec rechargement à chaud sans interruption.
+
+Un rechargement charge et préchauffe la nouvelle version à côté de la version
+courante, puis la substitue de façon atomique. Chaque requête récupère la
+version courante au début de son traitement et la garde jusqu'au bout: les
+requêtes en cours se terminent donc sur l'ancienne version.
+
+Le rechargement est déclenché par l'endpoint d'administration ou par la
+surveillance périodique du dossier des modèles.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+
+from backends import ARTIFACTS, load_backend
+
+logger = logging.getLogger(__name__)
+
+SCALER_FEATURES_FILE = "scaler_features.pkl"
+SCALER_TARGETS_FILE = "scaler_targets.pkl"
+VERSION_FILE = "VERSION"
+# Association maladie -> modèle dédié et dossier de leurs artefacts (voir model_pool.py)
+DISEASE_MODELS_FILE = "diseases.json"
+DISEASE_MODELS_DIR = "diseases"
+# Longueur de l'empreinte du contenu ajoutée à la version déclarée
+CONTENT_HASH_LENGTH = 8
+# Nombre de versions précédentes conservées dans l'historique exposé
+HISTORY_SIZE = 5
+
+
+class ModelVersion:
+    """Une version chargée: moteur d'inférence et scalers associés"""
+
+    def __init__(self, version, model, scaler_features, scaler_targets, fingerprint, load_time, warmup_time=0.0):
+        self.version = version
+        # Maladie ou famille servie par un modèle dédié (None: modèle principal)
+        self.dedicated_to = None
+        self.model = model
+        self.scaler_features = scaler_features
+        self.scaler_targets = scaler_targets
+        self.fingerprint = fingerprint
+        self.load_time = load_time
+        self.warmup_time = warmup_time
+        self.loaded_at = datetime.now().isoformat()
+
+    def describe(self):
+        return {
+            "version": self.version,
+            "backend": self.model.name,
+            "loaded_at": self.loaded_at,
+            "load_time_s": round(self.load_time, 3),
+            "warmup_time_s": round(self.warmup_time, 3),
+        }
+
+
+def model_files(models_dir):
+    """
+    Fichiers dont la modification déclenche un rechargement, y compris tous
+    ceux des modèles dédiés (models/diseases/<nom>/...)
+    """
+    names = {SCALER_FEATURES_FILE, SCALER_TARGETS_FILE, VERSION_FILE, DISEASE_MODELS_FILE, *ARTIFACTS.values()}
+    paths = [os.path.join(models_dir, name) for name in names]
+    for root, _, files in os.walk(os.path.join(models_dir, DISEASE_MODELS_DIR)):
+        paths.extend(os.path.join(root, name) for name in files)
+    return sorted(paths)
+
+
+def directory_fingerprint(models_dir):
+    """Empreinte légère (taille, date de modification) des fichiers du modèle"""
+    fingerprint = []
+    for path in model_files(models_dir):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append((os.path.relpath(path, models_dir), stat.st_size, stat.st_mtime_ns))
+    return tuple(fingerprint)
+
+
+def content_hash(models_dir):
+    """Empreinte sha256 du contenu des artefacts et des scalers d'un dossier de modèle"""
+    digest = hashlib.sha256()
+    for name in sorted({SCALER_FEATURES_FILE, SCALER_TARGETS_FILE, *ARTIFACTS.values()}):
+        path = os.path.join(models_dir, name)
+        if not os.path.exists(path):
+            continue
+        digest.update(name.encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:CONTENT_HASH_LENGTH]
+
+
+def read_version(models_dir):
+    """
+    Version déclarée dans models/VERSION suivie de l'empreinte du contenu
+    ("1.0+3fa2c1d9"), sinon l'empreinte seule. Des artefacts remplacés sans
+    modifier VERSION donnent donc une autre version, et d'autres clés de cache.
+    """
+    version = ""
+    version_path = os.path.join(models_dir, VERSION_FILE)
+    if os.path.exists(version_path):
+        with open(version_path, encoding="utf-8") as f:
+            version = f.read().strip()
+    digest = content_hash(models_dir)
+    return f"{version}+{digest}" if version else digest
+
+
+def load_version(models_dir, backend_name, input_shape):
+    """Charge et préchauffe le moteur d'inférence et les scalers d'un dossier de modèle"""
+    started = time.perf_counter()
+    fingerprint = directory_fingerprint(models_dir)
+    version = read_version(models_dir)
+
+    logger.info(f"Chargement du modèle {models_dir} (version {version})")
+    model = load_backend(backend_name, models_dir)
+    logger.info(f"Moteur d'inférence: {model.name}")
+    logger.info("Chargement des scalers")
+    scaler_features = joblib.load(os.path.join(models_dir, SCALER_FEATURES_FILE))
+    scaler_targets = joblib.load(os.path.join(models_dir, SCALER_TARGETS_FILE))
+
+    # Préchauffage: la première passe avant (traçage du graphe, allocations)
+    # ne doit pas être payée par une requête
+    warmup_started = time.perf_counter()
+    model.predict(np.zeros((1, *input_shape), dtype=np.float32))
+    warmup_time = time.perf_counter() - warmup_started
+
+    return ModelVersion(
+        version, model, scaler_features, scaler_targets, fingerprint,
+        time.perf_counter() - started, warmup_time,
+    )
+
+
+class ModelRegistry:
+    """Version courante du modèle et substitution atomique lors des rechargements"""
+
+    def __init__(self, models_dir, backend_name, input_shape, on_swap=None):
+        self.models_dir = models_dir
+        self.backend_name = backend_name
+        self.input_shape = input_shape
+        self.on_swap = on_swap
+        self.current = None
+        self.history = []
+        self.last_error = None
+        self._failed_fingerprint = None
+        self._reload_lock = threading.Lock()
+        self._watcher = None
+        self._watch_interval = None
+
+    def load(self):
+        """Charge et préchauffe une nouvelle version puis la substitue à la version courante"""
+        with self._reload_lock:
+            try:
+                new_version = load_version(self.models_dir, self.backend_name, self.input_shape)
+            except Exception as e:
+                self.last_error = str(e)
+                self._failed_fingerprint = directory_fingerprint(self.models_dir)
+                logger.error(f" Erreur lors du chargement des modèles: {str(e)}")
+                return False
+
+            previous = self.current
+            # Substitution atomique: les requêtes en cours gardent leur référence
+            self.current = new_version
+            self.last_error = None
+            if previous is not None:
+                self.history = ([previous.describe()] + self.history)[:HISTORY_SIZE]
+            if self.on_swap is not None:
+                self.on_swap(previous, new_version)
+            logger.info(
+                f"Version {new_version.version} active "
+                f"(précédente: {previous.version if previous else 'aucune'})"
+            )
+            return True
+
+    def has_changed(self):
+        """Vrai si les fichiers ont changé depuis la version courante (hors échec déjà constaté)"""
+        fingerprint = directory_fingerprint(self.models_dir)
+        if fingerprint == self._failed_fingerprint:
+            return False
+        current = self.current
+        return current is None or fingerprint != current.fingerprint
+
+    def start_watcher(self, interval):
+        """Surveille le dossier des modèles et recharge à chaque modification"""
+        if interval <= 0 or (self._watcher is not None and self._watcher.is_alive()):
+            return
+        self._watch_interval = interval
+        self._watcher = threading.Thread(target=self._watch, name="model-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch(self):
+        while True:
+            time.sleep(self._watch_interval)
+            try:
+                if not self.has_changed():
+                    continue
+                # Attendre que la copie des fichiers soit terminée
+                fingerprint = directory_fingerprint(self.models_dir)
+                time.sleep(1.0)
+                if directory_fingerprint(self.models_dir) != fingerprint:
+                    continue
+                logger.info("Modification du dossier des modèles détectée")
+                self.load()
+            except Exception as e:
+                logger.error(f"Erreur de surveillance du dossier des modèles: {str(e)}")
+
+    def describe(self):
+        current = self.current
+        return {
+            "current": current.describe() if current is not None else None,
+            "previous": self.history,
+            "watch_interval_s": self._watch_interval,
+            "last_error": self.last_error,
+        }
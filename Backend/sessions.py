@@ -0,0 +1,229 @@
+"""
+Sessions de prédiction en continu: une fenêtre de 12 semaines par session,
+mise à jour une semaine à la fois.
+
+Chaque session garde un tampon circulaire (12, 29) des semaines brutes et
+le même tampon déjà normalisé par scaler_features: une nouvelle semaine ne
+demande que la normalisation d'une ligne, et l'historique n'est jamais
+renvoyé ni re-parsé. Le tampon normalisé est recalculé depuis les semaines
+brutes si la version du modèle (donc du scaler) a changé entre deux appels.
+
+Les sessions sont stockées dans une base SQLite (mode WAL) partagée par les
+workers gunicorn: deux appels successifs d'une même session peuvent être
+servis par des processus différents. Le nombre de sessions est borné et une
+session inactive depuis idle_timeout_s est supprimée.
+"""
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+
+class SessionNotFound(KeyError):
+    """Session inconnue, fermée ou expirée"""
+
+
+class SessionLimitReached(RuntimeError):
+    """Nombre maximal de sessions ouvertes atteint"""
+
+
+class RingWindow:
+    """
+    Tampon circulaire (12, 29) des semaines brutes et normalisées: head est
+    la position de la semaine la plus ancienne, remplacée par la prochaine
+    semaine poussée
+    """
+
+    def __init__(self, raw, normalized, version, head=0, weeks=None):
+        self.raw = raw
+        self.normalized = normalized
+        self.version = version
+        self.head = head
+        self.weeks = len(raw) if weeks is None else weeks
+
+    def push(self, raw_week, version, normalize):
+        """
+        Remplace la semaine la plus ancienne. normalize(matrice brute) est le
+        scaler de `version`: il n'est appliqué qu'à la nouvelle ligne, ou à
+        toute la fenêtre si le tampon a été normalisé par une autre version.
+        """
+        self.raw[self.head] = raw_week
+        if version == self.version:
+            self.normalized[self.head] = normalize(self.raw[self.head][np.newaxis, :])[0]
+        else:
+            self.normalized = normalize(self.raw)
+            self.version = version
+        self.head = (self.head + 1) % len(self.raw)
+        self.weeks += 1
+
+    def window(self):
+        """Fenêtre normalisée dans l'ordre chronologique"""
+        return np.roll(self.normalized, -self.head, axis=0)
+
+
+class SessionStore:
+    """Tampons circulaires des sessions, partagés entre processus via SQLite"""
+
+    def __init__(self, path, max_sessions=1000, idle_timeout_s=3600.0, window_shape=(12, 29)):
+        self.path = path
+        self.max_sessions = max_sessions
+        self.idle_timeout_s = idle_timeout_s
+        self.window_shape = window_shape
+        self._local = threading.local()
+        self._evictions = 0
+        self._rejected = 0
+        self._stats_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    disease TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    version TEXT NOT NULL,
+                    head INTEGER NOT NULL,
+                    weeks INTEGER NOT NULL,
+                    raw BLOB NOT NULL,
+                    normalized BLOB NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                )
+                """
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used)")
+
+    def _connection(self):
+        # Une connexion par thread et par processus (une connexion SQLite ne survit pas à un fork)
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=5.0, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def _to_array(self, blob):
+        return np.frombuffer(blob, dtype=np.float64).reshape(self.window_shape).copy()
+
+    def _purge_idle(self, connection, now):
+        deleted = connection.execute(
+            "DELETE FROM sessions WHERE last_used < ?", (now - self.idle_timeout_s,)
+        ).rowcount
+        if deleted:
+            with self._stats_lock:
+                self._evictions += deleted
+
+    def create(self, disease, location, raw_window, normalized_window, version):
+        """Ouvre une session sur une fenêtre brute et normalisée (12, 29); renvoie son identifiant"""
+        session_id = uuid.uuid4().hex
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            self._purge_idle(connection, now)
+            (count,) = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            if count >= self.max_sessions:
+                with self._stats_lock:
+                    self._rejected += 1
+                raise SessionLimitReached(f"Nombre maximal de sessions atteint ({self.max_sessions})")
+            connection.execute(
+                "INSERT INTO sessions VALUES (?, ?, ?, ?, 0, ?, ?, ?, ?, ?)",
+                (
+                    session_id, disease, location, version, len(raw_window),
+                    np.ascontiguousarray(raw_window, dtype=np.float64).tobytes(),
+                    np.ascontiguousarray(normalized_window, dtype=np.float64).tobytes(),
+                    now, now,
+                ),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return session_id
+
+    def push(self, session_id, raw_week, resolve):
+        """
+        Ajoute une semaine brute (29,) à la session (voir RingWindow.push) et
+        renvoie la maladie, la localisation et le tampon à jour. resolve(maladie)
+        renvoie (version, normalize) et est appelé dans la transaction: lecture,
+        choix du scaler et écriture forment un seul read-modify-write, et les
+        appels concurrents sur une même session sont sérialisés par SQLite.
+        """
+        now = time.time()
+        connection = self._connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._select(connection, session_id, now)
+            _, disease, location, session_version, head, weeks, raw_blob, normalized_blob = row
+            ring = RingWindow(self._to_array(raw_blob), self._to_array(normalized_blob), session_version, head, weeks)
+            ring.push(raw_week, *resolve(disease))
+            connection.execute(
+                "UPDATE sessions SET version = ?, head = ?, weeks = ?, raw = ?, normalized = ?, last_used = ? "
+                "WHERE id = ?",
+                (
+                    ring.version, ring.head, ring.weeks, ring.raw.tobytes(),
+                    np.ascontiguousarray(ring.normalized, dtype=np.float64).tobytes(), now, session_id,
+                ),
+            )
+            connection.execute("COMMIT")
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        return disease, location, ring
+
+    def _select(self, connection, session_id, now):
+        row = connection.execute(
+            "SELECT id, disease, location, version, head, weeks, raw, normalized, last_used FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            raise SessionNotFound(session_id)
+        if row[-1] < now - self.idle_timeout_s:
+            # Expirée: supprimée à la prochaine purge
+            raise SessionNotFound(session_id)
+        return row[:-1]
+
+    def get(self, session_id):
+        """Description d'une session (sans la fenêtre)"""
+        row = self._connection().execute(
+            "SELECT disease, location, version, weeks, created_at, last_used FROM sessions WHERE id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None or row[5] < time.time() - self.idle_timeout_s:
+            raise SessionNotFound(session_id)
+        disease, location, version, weeks, created_at, last_used = row
+        return {
+            "session_id": session_id,
+            "disease": disease,
+            "location": location,
+            "model_version": version,
+            "weeks": weeks,
+            "created_at": created_at,
+            "last_used": last_used,
+            "expires_at": last_used + self.idle_timeout_s,
+        }
+
+    def close(self, session_id):
+        deleted = self._connection().execute("DELETE FROM sessions WHERE id = ?", (session_id,)).rowcount
+        if not deleted:
+            raise SessionNotFound(session_id)
+
+    def stats(self):
+        connection = self._connection()
+        self._purge_idle(connection, time.time())
+        (count,) = connection.execute("SELECT COUNT(*) FROM sessions").fetchone()
+        with self._stats_lock:
+            return {
+                "sessions": count,
+                "max_sessions": self.max_sessions,
+                "idle_timeout_s": self.idle_timeout_s,
+                "evictions": self._evictions,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,108 @@
+"""
+Fenêtres du feature store et historiques envoyés par le client: mêmes
+taux de croissance capés à ±10 que LSTM.ipynb, donc même prédiction.
+
+    cd Backend && python -m pytest -q tests
+"""
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+os.chdir(BACKEND_DIR)
+sys.path.insert(0, BACKEND_DIR)
+_RUNTIME_DIR = tempfile.mkdtemp(prefix="api-tests-")
+os.environ.setdefault("INFERENCE_BACKEND", "numpy")
+os.environ.setdefault("SESSION_DB_PATH", os.path.join(_RUNTIME_DIR, "sessions.db"))
+os.environ.setdefault("JOB_DIR", os.path.join(_RUNTIME_DIR, "jobs"))
+
+import api  # noqa: E402
+from feature_store import FeatureStore  # noqa: E402
+
+WEEKS = 16
+FIRST_WEEK = "2022-01-03"
+
+
+def write_store(path, features, clipped_features=None):
+    """Feature store minimal (une série COVID-19 / Testland), au format de etl.py"""
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "features.npy"), features)
+    weeks = np.datetime64(FIRST_WEEK) + np.arange(len(features)) * np.timedelta64(7, "D")
+    np.save(os.path.join(path, "weeks.npy"), weeks)
+    with open(os.path.join(path, "index.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["disease", "location", "start_row", "n_weeks", "first_week", "last_week"])
+        writer.writerow(["COVID-19", "Testland", 0, len(features), FIRST_WEEK, str(weeks[-1])])
+    manifest = {"feature_order": api.FEATURE_ORDER}
+    if clipped_features:
+        manifest["clipped_features"] = clipped_features
+    with open(os.path.join(path, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+@pytest.fixture(scope="module")
+def client():
+    deadline = time.time() + 120
+    while api.model_registry.current is None and time.time() < deadline:
+        time.sleep(0.05)
+    assert api.model_registry.current is not None, api.model_registry.last_error
+    return api.app.test_client()
+
+
+@pytest.fixture
+def unclipped_store(tmp_path, monkeypatch):
+    """Feature store construit sans capage: taux de croissance de 94 et 396 dans la dernière fenêtre"""
+    rng = np.random.default_rng(0)
+    features = rng.uniform(0.0, 2.0, size=(WEEKS, len(api.FEATURE_ORDER)))
+    features[-3, api.FEATURE_ORDER.index("cases_growth_rate")] = 94.0
+    features[-2, api.FEATURE_ORDER.index("deaths_growth_rate")] = 396.45
+    write_store(tmp_path, features)
+    store = FeatureStore(str(tmp_path), api.FEATURE_ORDER, api.SEQUENCE_LENGTH, api.CLIPPED_FEATURES)
+    monkeypatch.setattr(api, "feature_store", store)
+    return features
+
+
+def test_store_window_is_clipped_like_training(client, unclipped_store):
+    as_of_week = str(np.datetime64(FIRST_WEEK) + np.timedelta64(7 * (WEEKS - 1), "D"))
+    from_store = client.post(
+        "/predict", json={"disease": "COVID-19", "location": "Testland", "as_of_week": as_of_week}
+    )
+    assert from_store.status_code == 200, from_store.json
+
+    history = unclipped_store[-api.SEQUENCE_LENGTH:].copy()
+    for feature, bound in api.CLIPPED_FEATURES.items():
+        column = api.FEATURE_ORDER.index(feature)
+        history[:, column] = np.clip(history[:, column], -bound, bound)
+    columns = {feature: history[:, i].tolist() for i, feature in enumerate(api.FEATURE_ORDER)}
+    from_history = client.post(
+        "/predict", json={"disease": "COVID-19", "location": "Testland", "history": columns}
+    )
+    assert from_history.status_code == 200, from_history.json
+    assert from_store.json["predictions"] == from_history.json["predictions"]
+
+    raw = client.post(
+        "/predict",
+        json={
+            "disease": "COVID-19",
+            "location": "Testland",
+            "history": {
+                feature: unclipped_store[-api.SEQUENCE_LENGTH:, i].tolist()
+                for i, feature in enumerate(api.FEATURE_ORDER)
+            },
+        },
+    )
+    assert raw.json["predictions"] != from_store.json["predictions"]
+
+
+def test_clipped_store_is_served_without_copy(tmp_path):
+    features = np.zeros((WEEKS, len(api.FEATURE_ORDER)))
+    write_store(tmp_path, features, clipped_features=api.CLIPPED_FEATURES)
+    store = FeatureStore(str(tmp_path), api.FEATURE_ORDER, api.SEQUENCE_LENGTH, api.CLIPPED_FEATURES)
+    window = store.window("COVID-19", "Testland", api.parse_week("2022-04-18"))
+    assert isinstance(window, np.memmap)
@@ -0,0 +1,98 @@
+"""
+Intervalles de prédiction par passes stochastiques groupées.
+
+Les K passes d'un lot (N, 12, 29) sont faites en un seul appel au modèle sur
+un tenseur (K·N, 12, 29): les K copies du lot sont empilées, puis chaque
+copie est rendue aléatoire par l'une des deux méthodes:
+
+- "dropout": dropouts actifs comme à l'entraînement (MC dropout), pour les
+  moteurs qui le permettent (keras, numpy);
+- "perturbation": bruit gaussien ajouté aux entrées normalisées, d'écart-type
+  `noise` en unités du scaler (RobustScaler: fraction de l'écart
+  interquartile de chaque feature), pour tous les moteurs.
+
+Les statistiques (moyenne, écart-type, quantiles) sont calculées par l'API
+sur les K échantillons dénormalisés (après scaler_targets.inverse_transform).
+"""
+import numpy as np
+
+METHODS = ("dropout", "perturbation")
+# Quantiles renvoyés: médiane et intervalle de prédiction à 90 %
+QUANTILES = (0.05, 0.5, 0.95)
+# Seuils du coefficient de variation (écart-type / |moyenne|) des niveaux de confiance
+CONFIDENCE_CV_THRESHOLDS = ((0.1, "high"), (0.25, "medium"))
+
+
+class UncertaintyRequest:
+    """Mode incertitude d'une requête: K passes, méthode demandée, durée cumulée des passes"""
+
+    def __init__(self, samples, method="auto"):
+        if method != "auto" and method not in METHODS:
+            raise ValueError(f"Méthode d'incertitude inconnue: '{method}' (attendu: auto, {', '.join(METHODS)})")
+        self.samples = samples
+        self.method = method
+        self.methods = set()
+        self.duration = 0.0
+        self.items = 0
+
+    def record(self, duration, n_items, methods):
+        self.duration += duration
+        self.items += n_items
+        self.methods.update(methods)
+
+    def describe(self):
+        """Paramètres et latence des passes (total, et par passe sur l'ensemble des éléments)"""
+        methods = sorted(self.methods)
+        return {
+            "samples": self.samples,
+            "method": methods[0] if len(methods) == 1 else methods or self.method,
+            "items": self.items,
+            "latency_ms": round(self.duration * 1000, 3),
+            "latency_per_sample_ms": round(self.duration * 1000 / self.samples, 3),
+        }
+
+
+def resolve_method(method, backend):
+    """Méthode effective: "auto" choisit le MC dropout si le moteur le permet"""
+    if method == "auto":
+        return "dropout" if backend.supports_dropout else "perturbation"
+    if method == "dropout" and not backend.supports_dropout:
+        raise ValueError(f"MC dropout impossible avec le moteur {backend.name} (utiliser method=perturbation)")
+    return method
+
+
+def stochastic_passes(backend, sequences, n_samples, method, noise=0.05, rng=None):
+    """
+    K passes stochastiques d'un lot normalisé (N, 12, 29) en un seul appel
+    au modèle. Renvoie les sorties normalisées (K·N, cibles), ordonnées par
+    passe puis par élément.
+    """
+    stacked = np.tile(np.asarray(sequences, dtype=np.float32), (n_samples, 1, 1))
+    if method == "dropout":
+        return backend.predict_stochastic(stacked)
+    rng = rng or np.random.default_rng()
+    stacked += rng.normal(0.0, noise, size=stacked.shape).astype(np.float32)
+    return backend.predict(stacked, verbose=0)
+
+
+def summarize(samples):
+    """
+    Statistiques par élément et par cible d'échantillons dénormalisés (K, N,
+    cibles): moyenne et écart-type (N, cibles), quantiles (Q, N, cibles)
+    """
+    return samples.mean(axis=0), samples.std(axis=0, ddof=1), np.quantile(samples, QUANTILES, axis=0)
+
+
+def confidence_levels(mean, std, in_domain):
+    """
+    Confiance tirée de la dispersion des passes: plus grand coefficient de
+    variation des cibles retenues (moyenne et écart-type (N, cibles)),
+    "low" hors domaine
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        spread = np.nanmax(np.where(np.abs(mean) > 0, std / np.abs(mean), np.inf), axis=1)
+    levels = np.full(len(mean), "low", dtype=object)
+    for threshold, level in reversed(CONFIDENCE_CV_THRESHOLDS):
+        levels[spread < threshold] = level
+    levels[~np.asarray(in_domain, dtype=bool)] = "low"
+    return levels
@@ -0,0 +1,465 @@
+"""
+ETL hebdomadaire: des CSV journaliers OWID au feature store du modèle.
+
+Reprend en script les étapes des notebooks ETL/Etl_01.ipynb,
+ETL/ETL_Outlier_02.ipynb et des cellules 3 à 5 de LSTM.ipynb (agrégation
+hebdomadaire, outliers, poids de régression, encodages, phases, indicateurs
+de valeurs manquantes, cibles), avec des opérations groupées vectorisées au
+lieu de boucles par pays.
+
+Le feature store est un dossier de tableaux .npy ouvrables avec
+np.load(..., mmap_mode="r"), une ligne par (maladie, localisation, semaine):
+- features.npy: (lignes, 29) dans l'ordre FEATURE_ORDER de l'API
+- targets.npy: (lignes, 3) dans l'ordre TARGET_ORDER
+- weeks.npy: lundi de chaque semaine (datetime64[D])
+- index.csv: première ligne et nombre de semaines de chaque (maladie, localisation)
+- manifest.json: ordre des colonnes, features capées, sources, durée de chaque étape
+- weekly.parquet (avec --parquet, pyarrow requis): la table hebdomadaire complète
+
+Les semaines de chaque localisation sont contiguës (les semaines sans donnée
+sont ajoutées), la ligne d'une semaine est donc start_row + (semaine -
+first_week) / 7 jours.
+
+Par défaut, le feature store est écrit dans Backend/feature_store, le dossier
+lu par l'API. Il n'est pas versionné: la CI le reconstruit avant de démarrer
+le backend.
+
+    python etl.py
+    python etl.py --source COVID-19=owid-covid-data.csv --output /tmp/feature_store
+"""
+import argparse
+import json
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from script import FEATURE_ORDER
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Dossier lu par l'API (FEATURE_STORE_DIR du backend)
+FEATURE_STORE_DIR = os.path.normpath(os.path.join(BASE_DIR, "..", "..", "Backend", "feature_store"))
+
+SOURCES = {
+    "COVID-19": os.path.join(BASE_DIR, "ProcessedData", "covid_aggregations_clean.csv"),
+    "MonkeyPox": os.path.join(BASE_DIR, "ProcessedData", "mpox_aggregations_clean.csv"),
+}
+
+TARGET_ORDER = ["target_mortality_rate", "target_transmission_rate", "target_spatial_spread"]
+
+# Types explicites des colonnes OWID utilisées (les autres colonnes ne sont pas lues)
+CSV_DTYPES = {
+    "iso_code": "category",
+    "continent": "category",
+    "location": "category",
+    "new_cases": "float64",
+    "total_cases": "float64",
+    "new_cases_smoothed": "float64",
+    "new_cases_per_million": "float64",
+    "new_deaths": "float64",
+    "total_deaths": "float64",
+    "new_deaths_smoothed": "float64",
+    "new_deaths_per_million": "float64",
+    "total_deaths_per_million": "float64",
+    "reproduction_rate": "float64",
+    "mortality_rate": "float64",
+    "stringency_index": "float64",
+    "population": "float64",
+    "population_density": "float64",
+    "latitude": "float64",
+    "longitude": "float64",
+}
+REQUIRED_COLUMNS = ["location", "date", "new_cases", "total_cases", "new_deaths", "total_deaths"]
+
+# Colonnes dont l'absence est signalée par <colonne>_was_missing avant imputation
+MISSING_INDICATORS = [
+    "avg_reproduction_rate", "deaths_growth_rate", "avg_stringency_index", "cases_growth_rate", "avg_mortality_rate",
+]
+# Imputées par pays (report avant puis arrière), puis par ces valeurs par défaut
+EPIDEMIO_DEFAULTS = {
+    "avg_reproduction_rate": 1.0,
+    "avg_mortality_rate": 0.0,
+    "avg_stringency_index": 0.0,
+    "cases_growth_rate": 0.0,
+    "deaths_growth_rate": 0.0,
+    "avg_daily_cases_smoothed": 0.0,
+    "avg_daily_deaths_smoothed": 0.0,
+    "avg_cases_per_million": 0.0,
+    "avg_deaths_per_million": 0.0,
+}
+PHASE_NAMES = ["pre_epidemic", "growth", "peak", "decline", "controlled", "resurgence"]
+# Taux de croissance capés avant l'écriture des features (LSTM.ipynb, cellule 5)
+GROWTH_RATE_FEATURES = ["cases_growth_rate", "deaths_growth_rate"]
+GROWTH_RATE_CLIP = 10
+
+EXTREME_QUANTILE = 0.999
+OUTLIER_ZSCORE = 5
+NEIGHBOR_RADIUS_KM = 1000
+EARTH_RADIUS_KM = 6371
+
+
+@contextmanager
+def timed_step(timings, name):
+    """Chronomètre une étape du pipeline et l'ajoute à timings"""
+    started = time.perf_counter()
+    yield
+    timings[name] = round(time.perf_counter() - started, 4)
+    print(f"⏱️  {name} : {timings[name]:.3f} s")
+
+
+def load_daily(path, disease):
+    """Lit un CSV journalier avec des types explicites; les colonnes optionnelles absentes valent NaN"""
+    available = pd.read_csv(path, nrows=0).columns
+    missing = [column for column in REQUIRED_COLUMNS if column not in available]
+    if missing:
+        raise ValueError(f"{path}: colonnes manquantes {missing}")
+    usecols = ["date"] + [column for column in CSV_DTYPES if column in available]
+    daily = pd.read_csv(
+        path, usecols=usecols, dtype={column: CSV_DTYPES[column] for column in usecols if column != "date"},
+        parse_dates=["date"],
+    )
+    for column, dtype in CSV_DTYPES.items():
+        if column not in daily:
+            daily[column] = pd.Series(np.nan, index=daily.index, dtype="category" if dtype == "category" else dtype)
+    daily["location"] = daily["location"].cat.remove_unused_categories()
+    return daily
+
+
+def clean_daily(daily, min_days=100):
+    """
+    Filtre les localisations avec moins de min_days jours renseignés, corrige
+    new_cases par la différence de total_cases quand ils divergent, marque
+    les valeurs extrêmes (au-delà du quantile 99,9 %) et calcule le lundi de
+    chaque semaine.
+    """
+    days_per_location = daily.groupby("location", observed=True)["new_cases"].transform("count")
+    daily = daily[days_per_location >= min_days]
+    # Tri par (localisation, date) sur les codes de catégorie: bien plus rapide que sort_values sur une catégorie
+    order = np.lexsort((daily["date"].to_numpy(), daily["location"].cat.codes.to_numpy()))
+    daily = daily.iloc[order].reset_index(drop=True)
+    daily["location"] = daily["location"].cat.remove_unused_categories()
+
+    calculated_new = daily.groupby("location", observed=True)["total_cases"].diff()
+    inconsistent = daily["new_cases"].notna() & calculated_new.notna() & ((daily["new_cases"] - calculated_new).abs() > 1)
+    daily.loc[inconsistent, "new_cases"] = calculated_new[inconsistent]
+
+    for column, flag in (("new_cases", "extreme_cases"), ("new_deaths", "extreme_deaths")):
+        positive = daily.loc[daily[column] > 0, column]
+        threshold = positive.quantile(EXTREME_QUANTILE) if len(positive) else np.inf
+        daily[flag] = daily[column] > threshold
+
+    daily["week_start"] = daily["date"] - pd.to_timedelta(daily["date"].dt.dayofweek, unit="D")
+    return daily
+
+
+def aggregate_weekly(daily):
+    """
+    Agrégats hebdomadaires par localisation, sur une grille de semaines
+    complète: une semaine sans donnée a des sommes nulles et days_with_data = 0.
+    """
+    weekly = daily.groupby(["location", "week_start"], observed=True, sort=True).agg(
+        iso_code=("iso_code", "first"),
+        continent=("continent", "first"),
+        total_cases=("total_cases", "last"),
+        total_deaths=("total_deaths", "last"),
+        weekly_cases=("new_cases", "sum"),
+        weekly_deaths=("new_deaths", "sum"),
+        avg_daily_cases_smoothed=("new_cases_smoothed", "mean"),
+        avg_daily_deaths_smoothed=("new_deaths_smoothed", "mean"),
+        avg_cases_per_million=("new_cases_per_million", "mean"),
+        avg_deaths_per_million=("new_deaths_per_million", "mean"),
+        total_deaths_per_million=("total_deaths_per_million", "last"),
+        avg_reproduction_rate=("reproduction_rate", "mean"),
+        avg_mortality_rate=("mortality_rate", "mean"),
+        avg_stringency_index=("stringency_index", "mean"),
+        population=("population", "first"),
+        population_density=("population_density", "first"),
+        latitude=("latitude", "first"),
+        longitude=("longitude", "first"),
+        extreme_cases=("extreme_cases", "max"),
+        extreme_deaths=("extreme_deaths", "max"),
+        days_with_data=("date", "count"),
+    )
+
+    # Grille complète: de la première à la dernière semaine de chaque localisation
+    bounds = weekly.reset_index().groupby("location", observed=True)["week_start"].agg(["min", "max"])
+    n_weeks = ((bounds["max"] - bounds["min"]).dt.days // 7 + 1).to_numpy()
+    starts = np.repeat(bounds["min"].to_numpy(), n_weeks)
+    offsets = np.arange(n_weeks.sum()) - np.repeat(np.cumsum(n_weeks) - n_weeks, n_weeks)
+    grid = pd.MultiIndex.from_arrays(
+        [pd.Categorical(np.repeat(bounds.index.to_numpy(), n_weeks), categories=daily["location"].cat.categories),
+         starts + offsets * np.timedelta64(7, "D")],
+        names=["location", "week_start"],
+    )
+    weekly = weekly.reindex(grid).reset_index()
+
+    group = weekly.groupby("location", observed=True, sort=False)
+    for column in ("iso_code", "continent", "population", "population_density", "latitude", "longitude"):
+        weekly[column] = group[column].transform("first")
+    weekly[["weekly_cases", "weekly_deaths", "days_with_data"]] = weekly[
+        ["weekly_cases", "weekly_deaths", "days_with_data"]
+    ].fillna(0)
+    weekly[["extreme_cases", "extreme_deaths"]] = weekly[["extreme_cases", "extreme_deaths"]].fillna(False).astype(bool)
+    weekly["week_end"] = weekly["week_start"] + pd.Timedelta(days=6)
+    iso = weekly["week_start"].dt.isocalendar()
+    weekly["year_week"] = iso["year"].astype(str) + "-" + iso["week"].astype(str).str.zfill(2)
+    return weekly
+
+
+def robust_zscore(values, group):
+    """Z-score robuste (médiane et MAD) par groupe; 0 pour un groupe de MAD nulle"""
+    median = values.groupby(group, observed=True).transform("median")
+    deviation = (values - median).abs()
+    mad = deviation.groupby(group, observed=True).transform("median")
+    zscore = (values - median) / (1.4826 * mad)
+    return zscore.where(mad != 0, 0.0)
+
+
+def growth_rate(values, group):
+    """Variation relative d'une semaine à l'autre; une croissance depuis 0 (infinie) est traitée comme manquante"""
+    previous = values.groupby(group, observed=True).shift()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rate = values / previous - 1
+    return rate.replace([np.inf, -np.inf], np.nan)
+
+
+def neighbor_counts(weekly):
+    """Nombre de localisations à moins de 1000 km (distance haversine), 0 sans coordonnées"""
+    coords = weekly.groupby("location", observed=True)[["latitude", "longitude"]].first().dropna()
+    if coords.empty:
+        return pd.Series(0, index=weekly.index, dtype="float64")
+    lat, lon = np.radians(coords["latitude"].to_numpy()), np.radians(coords["longitude"].to_numpy())
+    a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+         + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+    distances = 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    counts = ((distances < NEIGHBOR_RADIUS_KM) & (distances > 0)).sum(axis=1)
+    return weekly["location"].map(pd.Series(counts, index=coords.index)).astype("float64").fillna(0)
+
+
+def add_features(weekly):
+    """Features et cibles du modèle, calculées sur toute la table en opérations groupées par localisation"""
+    location = weekly["location"]
+    group = weekly.groupby("location", observed=True, sort=False)
+
+    # Comptes (les corrections de totaux peuvent rendre une semaine négative: ramenée à 0 pour le log)
+    weekly["log_weekly_cases"] = np.log1p(weekly["weekly_cases"].clip(lower=0))
+    weekly["log_weekly_deaths"] = np.log1p(weekly["weekly_deaths"].clip(lower=0))
+    weekly["cases_growth_rate"] = growth_rate(weekly["weekly_cases"], location)
+    weekly["deaths_growth_rate"] = growth_rate(weekly["weekly_deaths"], location)
+
+    # Qualité et poids de régression (ETL_Outlier_02)
+    weekly["zscore_cases"] = robust_zscore(weekly["weekly_cases"], location)
+    weekly["zscore_deaths"] = robust_zscore(weekly["weekly_deaths"], location)
+    weekly["is_extreme_outlier"] = (weekly["zscore_cases"].abs() > OUTLIER_ZSCORE) | (
+        weekly["zscore_deaths"].abs() > OUTLIER_ZSCORE
+    )
+    extreme = weekly["extreme_cases"] | weekly["extreme_deaths"]
+    incomplete = weekly["days_with_data"] < 3
+    weekly["data_quality"] = np.select([extreme, incomplete], ["extreme_values", "incomplete"], "good")
+    weekly["regression_weight_adjusted"] = np.select(
+        [weekly["is_extreme_outlier"], ~extreme & incomplete, extreme], [0.3, 0.5, 0.1], 1.0
+    )
+
+    # Temps: semaines depuis la première semaine de la localisation (LSTM.ipynb
+    # part du minimum global: la valeur d'une série dépendait alors des autres
+    # séries de la table) et encodages cycliques
+    weekly["weeks_since_start"] = (weekly["week_start"] - group["week_start"].transform("min")).dt.days / 7
+    week_of_year = weekly["week_start"].dt.isocalendar()["week"].to_numpy(dtype="float64")
+    month = weekly["week_start"].dt.month.to_numpy(dtype="float64")
+    weekly["week_sin"] = np.sin(2 * np.pi * week_of_year / 52)
+    weekly["week_cos"] = np.cos(2 * np.pi * week_of_year / 52)
+    weekly["month_sin"] = np.sin(2 * np.pi * month / 12)
+    weekly["month_cos"] = np.cos(2 * np.pi * month / 12)
+
+    # Géographie
+    weekly["neighbor_count_1000km"] = neighbor_counts(weekly)
+    continent_sizes = weekly.groupby("continent", observed=True)["location"].nunique()
+    weekly["continent_connectivity"] = weekly["continent"].map(continent_sizes).astype("float64").fillna(0)
+    weekly["population_density"] = weekly["population_density"].fillna(
+        weekly.groupby("continent", observed=True)["population_density"].transform("median")
+    ).fillna(0)
+
+    # Indicateurs de valeurs manquantes, puis imputation par localisation
+    for column in MISSING_INDICATORS:
+        weekly[f"{column}_was_missing"] = weekly[column].isna().astype("float64")
+    columns = list(EPIDEMIO_DEFAULTS)
+    weekly[columns] = group[columns].ffill()
+    weekly[columns] = weekly.groupby("location", observed=True, sort=False)[columns].bfill()
+    weekly[columns] = weekly[columns].fillna(EPIDEMIO_DEFAULTS)
+
+    add_targets(weekly)
+    add_phases(weekly)
+    # Cibles et phases utilisent les taux bruts; le modèle ne voit que les taux capés
+    weekly[GROWTH_RATE_FEATURES] = weekly[GROWTH_RATE_FEATURES].clip(-GROWTH_RATE_CLIP, GROWTH_RATE_CLIP)
+    return weekly
+
+
+def add_targets(weekly):
+    """Cibles normalisées de LSTM.ipynb (mortalité, transmission, propagation spatiale)"""
+    location = weekly["location"]
+    mortality = (weekly["log_weekly_deaths"] - weekly["log_weekly_cases"]).clip(-5, 0)
+    weekly["target_mortality_rate"] = (mortality + 5) / 5
+
+    ma_reproduction = rolling_mean(weekly["avg_reproduction_rate"], location, 4, center=False)
+    transmission = (weekly["avg_reproduction_rate"] - ma_reproduction).clip(-2, 2)
+    weekly["target_transmission_rate"] = (transmission + 2) / 4
+
+    regional_growth = weekly.groupby(["continent", "week_start"], observed=True, dropna=False)[
+        "cases_growth_rate"
+    ].transform("mean")
+    spread = (weekly["cases_growth_rate"] - regional_growth).clip(-1, 1)
+    weekly["target_spatial_spread"] = (spread + 1) / 2
+
+
+def rolling_mean(values, group, window, center):
+    """Moyenne glissante par groupe (min_periods=1), alignée sur values"""
+    rolled = values.groupby(group, observed=True, sort=False).rolling(window, center=center, min_periods=1).mean()
+    return rolled.reset_index(level=0, drop=True).reindex(values.index)
+
+
+def add_phases(weekly):
+    """
+    Phases épidémiques de LSTM.ipynb (detect_epidemic_phases), en one-hot.
+    Les cinq premières règles ne dépendent que des moyennes glissantes et sont
+    évaluées en bloc; seules les semaines restantes (résurgence ou report de
+    la phase précédente) sont parcourues dans l'ordre.
+    """
+    location = weekly["location"]
+    ma_cases = rolling_mean(weekly["log_weekly_cases"], location, 3, center=True).to_numpy()
+    ma_r0 = rolling_mean(weekly["avg_reproduction_rate"], location, 3, center=True).to_numpy()
+    ma_growth = rolling_mean(weekly["cases_growth_rate"], location, 3, center=True).to_numpy()
+
+    phases = np.select(
+        [
+            ma_cases < 1.0,
+            (ma_r0 > 1.5) & (ma_growth > 0.1),
+            (ma_r0 >= 0.8) & (ma_r0 <= 1.2) & (np.abs(ma_growth) < 0.1),
+            (ma_r0 < 0.8) | (ma_growth < -0.1),
+            (ma_cases < 3.0) & (np.abs(ma_growth) < 0.05),
+        ],
+        [0, 1, 2, 3, 4],
+        -1,
+    ).astype("float64")
+
+    sizes = weekly.groupby("location", observed=True, sort=False).size().to_numpy()
+    group_starts = np.repeat(np.cumsum(sizes) - sizes, sizes)
+    position = np.arange(len(weekly)) - group_starts
+    for row in np.flatnonzero(phases < 0):
+        if position[row] > 20 and phases[row - 10:row].mean() > 2 and ma_growth[row] > 0.1:
+            phases[row] = 5
+        else:
+            phases[row] = phases[row - 1] if position[row] > 0 else 1
+    # Pas de détection pour les localisations trop courtes (10 semaines ou moins)
+    phases[np.repeat(sizes, sizes) <= 10] = 0
+
+    weekly["epidemic_phase"] = phases.astype("int8")
+    for index, name in enumerate(PHASE_NAMES):
+        weekly[f"phase_{name}"] = (phases == index).astype("float64")
+
+
+def build_weekly(sources, min_days=100, timings=None):
+    """Table hebdomadaire de toutes les maladies, triée par (maladie, localisation, semaine)"""
+    timings = {} if timings is None else timings
+    tables = []
+    for disease, path in sources.items():
+        with timed_step(timings, f"{disease}: lecture"):
+            daily = load_daily(path, disease)
+        with timed_step(timings, f"{disease}: nettoyage"):
+            daily = clean_daily(daily, min_days)
+        with timed_step(timings, f"{disease}: agrégation hebdomadaire"):
+            weekly = aggregate_weekly(daily)
+        with timed_step(timings, f"{disease}: features"):
+            weekly = add_features(weekly)
+        weekly.insert(0, "disease", disease)
+        weekly["location"] = weekly["location"].astype(str)
+        print(f"   {disease}: {len(daily)} jours -> {len(weekly)} semaines, {weekly['location'].nunique()} localisations")
+        tables.append(weekly)
+    with timed_step(timings, "concaténation"):
+        weekly = pd.concat(tables, ignore_index=True)
+    return weekly
+
+
+def write_feature_store(weekly, output_dir, sources, timings, parquet=False):
+    """Écrit le feature store (voir la docstring du module)"""
+    os.makedirs(output_dir, exist_ok=True)
+    features = weekly[FEATURE_ORDER].to_numpy(dtype="float64")
+    if not np.isfinite(features).all():
+        raise ValueError("Le feature store contient des valeurs non finies")
+    np.save(os.path.join(output_dir, "features.npy"), features)
+    np.save(os.path.join(output_dir, "targets.npy"), weekly[TARGET_ORDER].to_numpy(dtype="float64"))
+    np.save(os.path.join(output_dir, "weeks.npy"), weekly["week_start"].to_numpy().astype("datetime64[D]"))
+
+    rows = np.arange(len(weekly))
+    index = (
+        weekly.assign(row=rows)
+        .groupby(["disease", "location"], sort=False)
+        .agg(start_row=("row", "first"), n_weeks=("row", "size"), first_week=("week_start", "min"),
+             last_week=("week_start", "max"))
+        .reset_index()
+    )
+    index["first_week"] = index["first_week"].dt.strftime("%Y-%m-%d")
+    index["last_week"] = index["last_week"].dt.strftime("%Y-%m-%d")
+    index.to_csv(os.path.join(output_dir, "index.csv"), index=False)
+
+    if parquet:
+        if pa is None:
+            raise RuntimeError("pyarrow est nécessaire pour l'export Parquet (pip install pyarrow)")
+        pq.write_table(pa.Table.from_pandas(weekly, preserve_index=False), os.path.join(output_dir, "weekly.parquet"))
+
+    manifest = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "rows": len(weekly),
+        "dtype": "float64",
+        "feature_order": FEATURE_ORDER,
+        "target_order": TARGET_ORDER,
+        "clipped_features": {column: GROWTH_RATE_CLIP for column in GROWTH_RATE_FEATURES},
+        "sources": {disease: os.path.relpath(path, output_dir) for disease, path in sources.items()},
+        "timings_s": timings,
+    }
+    with open(os.path.join(output_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return index
+
+
+def parse_source(value):
+    disease, separator, path = value.partition("=")
+    if not separator or not disease or not path:
+        raise argparse.ArgumentTypeError("format attendu: MALADIE=chemin.csv")
+    return disease, path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Construit le feature store hebdomadaire à partir des CSV OWID")
+    parser.add_argument("--source", action="append", type=parse_source,
+                        help="MALADIE=chemin.csv (répétable, défaut: agrégats COVID-19 et MonkeyPox de ProcessedData)")
+    parser.add_argument("--output", default=FEATURE_STORE_DIR, help="Dossier du feature store")
+    parser.add_argument("--min-days", type=int, default=100, help="Jours renseignés minimum par localisation")
+    parser.add_argument("--parquet", action="store_true", help="Écrit aussi la table complète en weekly.parquet")
+    args = parser.parse_args()
+    sources = dict(args.source) if args.source else SOURCES
+
+    print("Construction du feature store hebdomadaire...")
+    timings = {}
+    started = time.perf_counter()
+    weekly = build_weekly(sources, args.min_days, timings)
+    with timed_step(timings, "écriture"):
+        index = write_feature_store(weekly, args.output, sources, timings, args.parquet)
+    timings["total"] = round(time.perf_counter() - started, 4)
+
+    print(f"✅ Feature store écrit : {args.output}")
+    print(f"📊 Contenu : {len(weekly)} semaines, {len(index)} séries (maladie, localisation), "
+          f"{len(FEATURE_ORDER)} features")
+    print(f"⏱️  Total : {timings['total']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
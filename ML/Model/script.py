@@ -1,8 +1,195 @@
+import argparse
+import csv
+import hashlib
+import itertools
 import json
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta
 import math
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# Features attendues par le modèle, dans l'ordre exact (identique à FEATURE_ORDER de l'API)
+FEATURE_ORDER = [
+    "log_weekly_cases",
+    "log_weekly_deaths",
+    "avg_cases_per_million",
+    "avg_deaths_per_million",
+    "avg_reproduction_rate",
+    "avg_mortality_rate",
+    "cases_growth_rate",
+    "deaths_growth_rate",
+    "avg_stringency_index",
+    "weeks_since_start",
+    "week_sin",
+    "week_cos",
+    "month_sin",
+    "month_cos",
+    "phase_pre_epidemic",
+    "phase_growth",
+    "phase_peak",
+    "phase_decline",
+    "phase_controlled",
+    "phase_resurgence",
+    "population_density",
+    "neighbor_count_1000km",
+    "continent_connectivity",
+    "regression_weight_adjusted",
+    "avg_reproduction_rate_was_missing",
+    "deaths_growth_rate_was_missing",
+    "avg_stringency_index_was_missing",
+    "cases_growth_rate_was_missing",
+    "avg_mortality_rate_was_missing",
+]
+FEATURE_INDEX = {feature: column for column, feature in enumerate(FEATURE_ORDER)}
+
+# Features 0/1, écrites en entiers dans le format dict
+INTEGER_FEATURES = [
+    "avg_reproduction_rate_was_missing",
+    "deaths_growth_rate_was_missing",
+    "avg_stringency_index_was_missing",
+    "cases_growth_rate_was_missing",
+    "avg_mortality_rate_was_missing",
+    "phase_pre_epidemic",
+    "phase_growth",
+    "phase_peak",
+    "phase_decline",
+    "phase_controlled",
+    "phase_resurgence",
+]
+
+# Ordre des clés d'une semaine dans le format dict (voir calculate_features)
+HISTORY_KEYS = [
+    "week", "weeks_since_start", "week_sin", "week_cos", "month_sin", "month_cos",
+    "log_weekly_cases", "log_weekly_deaths", "avg_cases_per_million", "avg_deaths_per_million",
+    "avg_reproduction_rate", "avg_mortality_rate", "cases_growth_rate", "deaths_growth_rate",
+    "avg_stringency_index", "population_density", "neighbor_count_1000km", "continent_connectivity",
+    "regression_weight_adjusted", "avg_reproduction_rate_was_missing", "deaths_growth_rate_was_missing",
+    "avg_stringency_index_was_missing", "cases_growth_rate_was_missing", "avg_mortality_rate_was_missing",
+    "epidemic_phase", "epidemic_phase_numeric", "transmission_rate", "countries_affected_continent",
+    "phase_pre_epidemic", "phase_growth", "phase_peak", "phase_decline", "phase_controlled", "phase_resurgence",
+]
+
+# Phases épidémiques: (semaine de fin exclue, nom, facteur de croissance)
+EPIDEMIC_PHASES = [
+    (4, "pre_epidemic", 1.2),
+    (8, "growth", 1.5),
+    (12, "peak", 1.0),
+    (16, "decline", 0.7),
+    (None, "controlled", 0.5),
+]
+
+
+def week_phase(week_idx):
+    """Phase épidémique d'une semaine: (numéro, nom, facteur de croissance)"""
+    for number, (end, name, growth_factor) in enumerate(EPIDEMIC_PHASES):
+        if end is None or week_idx < end:
+            return number, name, growth_factor
+
+
+def exact_add(total, error, values):
+    """
+    Addition sans perte d'un cumul flottant: total + error représente la
+    somme entière exacte (comme un int Python), total en est l'arrondi.
+    Nécessaire car les cas cumulés dépassent 2**53 (et même int64).
+    """
+    partial = total + values
+    rounded_values = partial - total
+    partial_error = (total - (partial - rounded_values)) + (values - rounded_values)
+    correction = partial_error + error
+    new_total = partial + correction
+    return new_total, correction - (new_total - partial)
+
+
+# Au-delà, les entiers ne sont plus tous représentables en float64
+EXACT_FLOAT_LIMIT = 2 ** 53
+
+
+def integer_ratio(numerator, subtracted, denominator):
+    """
+    (numerator - subtracted) / (denominator + 1) pour des tableaux de
+    flottants à valeurs entières, arrondi comme la division d'int Python:
+    les éléments hors de la plage exacte du float64 sont calculés en entiers.
+    """
+    result = (numerator - subtracted) / (denominator + 1)
+    large = (
+        (numerator >= EXACT_FLOAT_LIMIT) | (subtracted >= EXACT_FLOAT_LIMIT)
+        | (denominator + 1 >= EXACT_FLOAT_LIMIT)
+    )
+    if large.any():
+        result[large] = [
+            (int(a) - int(b)) / (int(c) + 1)
+            for a, b, c in zip(numerator[large].tolist(), subtracted[large].tolist(), denominator[large].tolist())
+        ]
+    return result
+
+
+@lru_cache(maxsize=None)
+def stable_hash(name):
+    """Empreinte 64 bits d'un nom, identique d'un processus à l'autre (contrairement à hash())"""
+    return int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def scenario_rng(master_seed, disease, location, replica):
+    """
+    Generator propre à un scénario, dérivé de (graine maître, maladie,
+    localisation, replica): le tirage d'un scénario ne dépend ni de l'ordre
+    de génération ni du processus qui le calcule.
+    """
+    seed_sequence = np.random.SeedSequence(
+        master_seed, spawn_key=(stable_hash(disease), stable_hash(location), replica)
+    )
+    return np.random.Generator(np.random.PCG64(seed_sequence))
+
+
+def resolve_seeding(seed, seeding, workers):
+    """Graine maître du mode de tirage par scénario (tirée au hasard si seed est None)"""
+    if seeding not in ("stream", "scenario"):
+        raise ValueError(f"Mode de tirage inconnu: {seeding}")
+    if seeding == "stream":
+        if workers > 1:
+            raise ValueError("La génération parallèle nécessite seeding='scenario'")
+        return None
+    return seed if seed is not None else np.random.SeedSequence().entropy
+
+
+# Générateur utilisé par les processus de génération parallèle
+_worker_generator = None
+
+
+def _init_worker(generator):
+    global _worker_generator
+    _worker_generator = generator
+
+
+def _generate_chunk_in_worker(task):
+    return _worker_generator.generate_chunk(*task)
+
+
+def ordered_parallel_map(function, tasks, workers, initializer=None, initargs=()):
+    """
+    Exécute function sur chaque tâche dans un pool de processus et renvoie
+    les résultats dans l'ordre des tâches. Au plus 2 x workers tâches sont
+    en cours, pour que la mémoire reste bornée.
+    """
+    with ProcessPoolExecutor(workers, initializer=initializer, initargs=initargs) as executor:
+        pending = deque()
+        for task in tasks:
+            pending.append(executor.submit(function, task))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 
 class DiseaseDataGenerator:
     """Génère des données épidémiques complètes pour le modèle LSTM"""
@@ -150,8 +337,12 @@ class DiseaseDataGenerator:
         # Date de début de référence
         self.pandemic_start = datetime(2020, 1, 1)
         
-    def generate_epidemic_curve(self, disease, location, num_weeks=20):
-        """Génère une courbe épidémique réaliste"""
+    def generate_epidemic_curve(self, disease, location, num_weeks=20, rng=None):
+        """
+        Génère une courbe épidémique réaliste. rng (numpy.random.Generator)
+        rend le tirage reproductible; sans rng, l'état global np.random est utilisé.
+        """
+        uniform = rng.uniform if rng is not None else np.random.uniform
         profile = self.disease_profiles[disease]
         loc_profile = self.location_profiles[location]
         
@@ -192,7 +383,7 @@ class DiseaseDataGenerator:
             
             # Calcul des décès (avec délai)
             if week > 2:
-                weekly_deaths = int(cases[week-2] * profile["base_mortality"] * np.random.uniform(0.8, 1.2))
+                weekly_deaths = int(cases[week-2] * profile["base_mortality"] * uniform(0.8, 1.2))
             else:
                 weekly_deaths = 0
             
@@ -222,17 +413,9 @@ class DiseaseDataGenerator:
         log_cases  = math.log1p(cases[week_idx])
         log_deaths = math.log1p(deaths[week_idx])
         
-        # Calcul de la date
-        current_date = self.pandemic_start + timedelta(weeks=week_idx)
-        week_of_year = current_date.isocalendar()[1]
-        month = current_date.month
-        
         # Features temporelles
         weeks_since_start = week_idx
-        week_sin = np.sin(2 * np.pi * week_of_year / 52)
-        week_cos = np.cos(2 * np.pi * week_of_year / 52)
-        month_sin = np.sin(2 * np.pi * month / 12)
-        month_cos = np.cos(2 * np.pi * month / 12)
+        week_sin, week_cos, month_sin, month_cos = self.calendar_features(week_idx)
         
         # Taux de croissance
         if week_idx > 0:
@@ -327,10 +510,22 @@ class DiseaseDataGenerator:
         
         return features
     
-    def generate_disease_data(self, disease, location, num_weeks=20):
+    def calendar_features(self, week_idx):
+        """Encodage cyclique (sin/cos) de la semaine et du mois d'une semaine"""
+        current_date = self.pandemic_start + timedelta(weeks=week_idx)
+        week_of_year = current_date.isocalendar()[1]
+        month = current_date.month
+        return (
+            np.sin(2 * np.pi * week_of_year / 52),
+            np.cos(2 * np.pi * week_of_year / 52),
+            np.sin(2 * np.pi * month / 12),
+            np.cos(2 * np.pi * month / 12),
+        )
+    
+    def generate_disease_data(self, disease, location, num_weeks=20, rng=None):
         """Génère les données complètes pour une maladie/location"""
         # Génération de la courbe épidémique
-        cases, deaths, r0_values, stringency = self.generate_epidemic_curve(disease, location, num_weeks)
+        cases, deaths, r0_values, stringency = self.generate_epidemic_curve(disease, location, num_weeks, rng)
         
         # Génération des features pour chaque semaine
         history = []
@@ -348,42 +543,452 @@ class DiseaseDataGenerator:
             "history": history
         }
     
-    def generate_dataset(self, diseases=None, locations=None, num_weeks=20):
-        """Génère un dataset complet"""
+    def generate_dataset(self, diseases=None, locations=None, num_weeks=20, engine="python", seed=None, replicas=1,
+                         seeding="stream", workers=1):
+        """
+        Génère un dataset complet (maladies x localisations x replicas).
+        
+        engine="numpy" calcule les scénarios sous forme de tableaux (voir
+        generate_arrays) puis produit le même format dict.
+        Avec la même graine, les deux moteurs donnent des données identiques.
+        """
+        return [
+            scenario
+            for chunk in self.iter_dataset(diseases, locations, num_weeks, engine, seed, replicas,
+                                           seeding=seeding, workers=workers)
+            for scenario in chunk
+        ]
+    
+    def iter_scenarios(self, diseases=None, locations=None, replicas=1):
+        """Scénarios (maladie, localisation, replica), dans l'ordre du dataset"""
         if diseases is None:
             diseases = list(self.disease_profiles.keys())
         if locations is None:
             locations = list(self.location_profiles.keys())
+        return itertools.product(diseases, locations, range(replicas))
+    
+    def count_scenarios(self, diseases=None, locations=None, replicas=1):
+        diseases = self.disease_profiles if diseases is None else diseases
+        locations = self.location_profiles if locations is None else locations
+        return len(diseases) * len(locations) * replicas
+    
+    def iter_dataset(self, diseases=None, locations=None, num_weeks=20, engine="python", seed=None, replicas=1,
+                     chunk_size=1000, seeding="stream", workers=1):
+        """
+        Comme generate_dataset, mais produit les scénarios (format dict) par
+        paquets de chunk_size: la mémoire reste bornée quelle que soit la
+        taille du dataset. La concaténation des paquets est identique au
+        résultat de generate_dataset.
         
-        dataset = []
-        for disease in diseases:
-            for location in locations:
-                data = self.generate_disease_data(disease, location, num_weeks)
-                dataset.append(data)
+        seeding="stream": un seul Generator tiré dans l'ordre des scénarios.
+        seeding="scenario": un Generator par scénario (voir scenario_rng), ce
+        qui permet de répartir les paquets sur `workers` processus avec un
+        résultat identique quel que soit leur nombre.
+        """
+        if engine not in ("python", "numpy"):
+            raise ValueError(f"Moteur de génération inconnu: {engine}")
+        master_seed = resolve_seeding(seed, seeding, workers)
+        if master_seed is not None:
+            yield from self._iter_chunks(diseases, locations, num_weeks, replicas, chunk_size, master_seed, "dataset",
+                                         engine, workers)
+            return
+        if engine == "numpy":
+            for arrays in self.iter_arrays(diseases, locations, num_weeks, seed, replicas, chunk_size):
+                yield self.arrays_to_dataset(arrays)
+            return
+        if engine != "python":
+            raise ValueError(f"Moteur de génération inconnu: {engine}")
+        
+        rng = np.random.default_rng(seed) if seed is not None else None
+        scenarios = self.iter_scenarios(diseases, locations, replicas)
+        while True:
+            chunk = [
+                self.generate_disease_data(disease, location, num_weeks, rng)
+                for disease, location, _ in itertools.islice(scenarios, chunk_size)
+            ]
+            if not chunk:
+                return
+            yield chunk
+    
+    def iter_arrays(self, diseases=None, locations=None, num_weeks=20, seed=None, replicas=1, chunk_size=1000,
+                    seeding="stream", workers=1):
+        """
+        Moteur vectorisé par paquets de chunk_size scénarios (voir
+        generate_arrays). Les tirages se suivent d'un paquet à l'autre: le
+        résultat ne dépend pas de chunk_size. Avec seeding="scenario", les
+        paquets peuvent être calculés par `workers` processus (voir iter_dataset).
+        """
+        master_seed = resolve_seeding(seed, seeding, workers)
+        if master_seed is not None:
+            yield from self._iter_chunks(diseases, locations, num_weeks, replicas, chunk_size, master_seed, "arrays",
+                                         "numpy", workers)
+            return
+        rng = np.random.default_rng(seed)
+        scenarios = self.iter_scenarios(diseases, locations, replicas)
+        while True:
+            chunk = list(itertools.islice(scenarios, chunk_size))
+            if not chunk:
+                return
+            yield self.generate_scenario_arrays(chunk, num_weeks, rng)
+    
+    def _iter_chunks(self, diseases, locations, num_weeks, replicas, chunk_size, master_seed, output, engine, workers):
+        """Paquets générés avec un tirage par scénario, en parallèle si workers > 1, dans l'ordre"""
+        scenarios = self.iter_scenarios(diseases, locations, replicas)
+        tasks = iter(
+            lambda: (list(itertools.islice(scenarios, chunk_size)), num_weeks, master_seed, output, engine), None
+        )
+        tasks = itertools.takewhile(lambda task: task[0], tasks)
+        if workers <= 1:
+            for task in tasks:
+                yield self.generate_chunk(*task)
+            return
+        yield from ordered_parallel_map(_generate_chunk_in_worker, tasks, workers, _init_worker, (self,))
+    
+    def generate_chunk(self, scenarios, num_weeks, master_seed, output="arrays", engine="numpy"):
+        """Un paquet de scénarios tirés avec scenario_rng: tableaux ou format dict"""
+        if output == "arrays":
+            return self.generate_scenario_arrays(scenarios, num_weeks, master_seed=master_seed)
+        if engine == "numpy":
+            return self.arrays_to_dataset(self.generate_scenario_arrays(scenarios, num_weeks, master_seed=master_seed))
+        return [
+            self.generate_disease_data(disease, location, num_weeks, scenario_rng(master_seed, disease, location, replica))
+            for disease, location, replica in scenarios
+        ]
+    
+    def generate_arrays(self, diseases=None, locations=None, num_weeks=20, rng=None, replicas=1):
+        """
+        Moteur vectorisé: cas, décès, R0, restrictions et les 29 features de
+        tous les scénarios (maladie x localisation x replica) et de toutes les
+        semaines, sous forme de tableaux NumPy.
+        
+        Seule la récurrence sur les semaines (cas cumulés) reste une boucle,
+        de num_weeks itérations sur des tableaux de tous les scénarios.
+        Les tirages aléatoires suivent l'ordre des appels du moteur par
+        semaine: avec le même Generator, le résultat est identique.
+        
+        Renvoie un dict: diseases, locations, replicas (listes par scénario),
+        cases, deaths, r0 (scénario, semaine), stringency (semaine,) et
+        features (scénario, semaine, 29) dans l'ordre FEATURE_ORDER.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        scenarios = list(self.iter_scenarios(diseases, locations, replicas))
+        return self.generate_scenario_arrays(scenarios, num_weeks, rng)
+    
+    def generate_scenario_arrays(self, scenarios, num_weeks, rng=None, master_seed=None):
+        """
+        generate_arrays pour une liste explicite de scénarios (maladie,
+        localisation, replica). Avec master_seed, chaque scénario est tiré
+        avec son propre Generator (scenario_rng) au lieu de rng.
+        """
+        scenario_diseases = [disease for disease, _, _ in scenarios]
+        scenario_locations = [location for _, location, _ in scenarios]
+        n_scenarios = len(scenarios)
+        
+        def profile_column(profiles, names, key):
+            return np.array([profiles[name][key] for name in names], dtype=np.float64)
+        
+        base_r0 = profile_column(self.disease_profiles, scenario_diseases, "base_r0")
+        base_mortality = profile_column(self.disease_profiles, scenario_diseases, "base_mortality")
+        spread_speed = profile_column(self.disease_profiles, scenario_diseases, "spread_speed")
+        stringency_response = profile_column(self.disease_profiles, scenario_diseases, "stringency_response")
+        population = profile_column(self.location_profiles, scenario_locations, "population")
+        
+        # Bruit des décès, tiré dans l'ordre des appels du moteur par semaine
+        # (scénario par scénario, semaines 3 et suivantes)
+        noise_weeks = max(num_weeks - 3, 0)
+        if master_seed is None:
+            death_noise = rng.uniform(0.8, 1.2, size=(n_scenarios, noise_weeks))
+        else:
+            death_noise = np.empty((n_scenarios, noise_weeks))
+            for index, scenario in enumerate(scenarios):
+                death_noise[index] = scenario_rng(master_seed, *scenario).uniform(0.8, 1.2, size=noise_weeks)
+        
+        cases = np.empty((n_scenarios, num_weeks))
+        deaths = np.zeros((n_scenarios, num_weeks))
+        r0_values = np.empty((n_scenarios, num_weeks))
+        stringency = np.empty(num_weeks)
         
+        # Conditions initiales
+        cumulative_cases = np.full(n_scenarios, 100.0)
+        cumulative_error = np.zeros(n_scenarios)
+        current_r0 = base_r0.copy()
+        current_stringency = 0
+        
+        for week in range(num_weeks):
+            _, phase, growth_factor = week_phase(week)
+            
+            # Calcul des cas (int() d'un flottant positif = partie entière)
+            weekly_cases = np.floor(cumulative_cases * current_r0 * growth_factor * spread_speed)
+            np.maximum(weekly_cases, 10, out=weekly_cases)
+            cumulative_cases, cumulative_error = exact_add(cumulative_cases, cumulative_error, weekly_cases)
+            
+            # Calcul des décès (avec délai)
+            if week > 2:
+                deaths[:, week] = np.floor(cases[:, week - 2] * base_mortality * death_noise[:, week - 3])
+            
+            # Ajustement des restrictions (identique pour tous les scénarios)
+            if phase == "growth" and current_stringency < 70:
+                current_stringency += 10
+            elif phase == "decline":
+                current_stringency = max(30, current_stringency - 5)
+            
+            # Impact des mesures sur R0
+            stringency_effect = 1 - (current_stringency / 100 * stringency_response)
+            current_r0 = np.clip(base_r0 * stringency_effect, 0.5, 10.0)
+            
+            cases[:, week] = weekly_cases
+            r0_values[:, week] = current_r0
+            stringency[week] = current_stringency
+        
+        # Features identiques pour tous les scénarios (temporelles, phases,
+        # indicateurs de qualité): une matrice (semaine, 29) recopiée en une passe
+        week_template = np.zeros((num_weeks, len(FEATURE_ORDER)))
+        week_template[:, FEATURE_INDEX["weeks_since_start"]] = np.arange(num_weeks)
+        calendar = np.array([self.calendar_features(week) for week in range(num_weeks)]).reshape(num_weeks, 4)
+        for column, name in enumerate(["week_sin", "week_cos", "month_sin", "month_cos"]):
+            week_template[:, FEATURE_INDEX[name]] = calendar[:, column]
+        for week in range(num_weeks):
+            _, phase, _ = week_phase(week)
+            week_template[week, FEATURE_INDEX[f"phase_{phase}"]] = 1
+        week_template[:, FEATURE_INDEX["regression_weight_adjusted"]] = 0.8
+        week_template[:, FEATURE_INDEX["avg_stringency_index"]] = stringency
+        
+        features = np.empty((n_scenarios, num_weeks, len(FEATURE_ORDER)))
+        features[:] = week_template
+        
+        def set_feature(name, values):
+            features[:, :, FEATURE_INDEX[name]] = values
+        
+        def exact_log1p(values):
+            # math.log1p comme le moteur par semaine (np.log1p peut différer d'un ulp)
+            return np.fromiter(map(math.log1p, values.ravel().tolist()), np.float64, values.size).reshape(values.shape)
+        
+        # Features épidémiologiques
+        set_feature("log_weekly_cases", exact_log1p(cases))
+        set_feature("log_weekly_deaths", exact_log1p(deaths))
+        set_feature("avg_cases_per_million", cases / population[:, None] * 1000000)
+        set_feature("avg_deaths_per_million", deaths / population[:, None] * 1000000)
+        set_feature("avg_reproduction_rate", r0_values)
+        mortality_rate = integer_ratio(deaths, np.zeros_like(deaths), cases)
+        set_feature("avg_mortality_rate", np.minimum(mortality_rate, 0.2) * 100)
+        
+        # Taux de croissance (nuls la première semaine, et pour les décès après une semaine sans décès)
+        cases_growth = np.zeros((n_scenarios, num_weeks))
+        cases_growth[:, 1:] = integer_ratio(cases[:, 1:], cases[:, :-1], cases[:, :-1])
+        deaths_growth = np.zeros((n_scenarios, num_weeks))
+        deaths_growth[:, 1:] = np.where(
+            deaths[:, :-1] > 0, integer_ratio(deaths[:, 1:], deaths[:, :-1], deaths[:, :-1]), 0.0
+        )
+        set_feature("cases_growth_rate", np.clip(cases_growth, -10, 10))
+        set_feature("deaths_growth_rate", np.clip(deaths_growth, -10, 10))
+        
+        # Features géographiques
+        for key, name in [
+            ("density", "population_density"),
+            ("neighbor_count", "neighbor_count_1000km"),
+            ("continent_connectivity", "continent_connectivity"),
+        ]:
+            set_feature(name, profile_column(self.location_profiles, scenario_locations, key)[:, None])
+        
+        return {
+            "diseases": scenario_diseases,
+            "locations": scenario_locations,
+            "replicas": [replica for _, _, replica in scenarios],
+            "cases": cases,
+            "deaths": deaths,
+            "r0": r0_values,
+            "stringency": stringency,
+            "features": features,
+        }
+    
+    def arrays_to_dataset(self, arrays):
+        """Convertit la sortie de generate_arrays au format dict de generate_disease_data"""
+        num_weeks = arrays["features"].shape[1]
+        # Champs hors features, propres à chaque semaine
+        week_fields = []
+        for week_idx in range(num_weeks):
+            phase_number, phase, _ = week_phase(week_idx)
+            week_fields.append({
+                "week": week_idx + 1,
+                "epidemic_phase": phase,
+                "epidemic_phase_numeric": phase_number,
+                "countries_affected_continent": 30 + week_idx,
+            })
+        
+        features = arrays["features"].tolist()
+        r0_values = arrays["r0"].tolist()
+        dataset = []
+        for index, (disease, location) in enumerate(zip(arrays["diseases"], arrays["locations"])):
+            history = []
+            for week_idx in range(num_weeks):
+                week_data = dict(zip(FEATURE_ORDER, features[index][week_idx]))
+                for name in INTEGER_FEATURES:
+                    week_data[name] = int(week_data[name])
+                week_data.update(week_fields[week_idx])
+                week_data["transmission_rate"] = r0_values[index][week_idx] / 10
+                history.append({key: week_data[key] for key in HISTORY_KEYS})
+            dataset.append({
+                "disease": disease,
+                "location": location,
+                "location_info": self.location_profiles[location],
+                "history": history
+            })
         return dataset
+    
+    def arrays_to_columns(self, arrays, scenario_offset=0):
+        """
+        Sortie de generate_arrays au format long (une ligne par scénario et
+        par semaine), avec les mêmes champs que le format dict
+        """
+        n_scenarios, num_weeks = arrays["cases"].shape
+        phases = [week_phase(week_idx) for week_idx in range(num_weeks)]
+        columns = {
+            "scenario": np.repeat(np.arange(scenario_offset, scenario_offset + n_scenarios), num_weeks),
+            "disease": np.repeat(np.array(arrays["diseases"], dtype=object), num_weeks),
+            "location": np.repeat(np.array(arrays["locations"], dtype=object), num_weeks),
+            "replica": np.repeat(np.array(arrays["replicas"]), num_weeks),
+            "week": np.tile(np.arange(1, num_weeks + 1), n_scenarios),
+            "epidemic_phase": np.tile(np.array([name for _, name, _ in phases], dtype=object), n_scenarios),
+            "epidemic_phase_numeric": np.tile(np.array([number for number, _, _ in phases]), n_scenarios),
+            "transmission_rate": arrays["r0"].ravel() / 10,
+            "countries_affected_continent": np.tile(30 + np.arange(num_weeks), n_scenarios),
+        }
+        features = arrays["features"].reshape(n_scenarios * num_weeks, len(FEATURE_ORDER))
+        for name in FEATURE_ORDER:
+            columns[name] = features[:, FEATURE_INDEX[name]]
+        for name in INTEGER_FEATURES:
+            columns[name] = columns[name].astype(np.int64)
+        return {key: columns[key] for key in ["scenario", "disease", "location", "replica"] + HISTORY_KEYS}
 
-# Utilisation du générateur
-if __name__ == "__main__":
+
+def write_json(chunks, path):
+    """
+    Écrit des paquets de scénarios (format dict) dans un tableau JSON, au fil
+    de l'eau. Sortie identique à json.dump(dataset, f, ensure_ascii=False, indent=2).
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for chunk in chunks:
+            for scenario in chunk:
+                text = json.dumps(scenario, ensure_ascii=False, indent=2)
+                f.write(("\n  " if count == 0 else ",\n  ") + text.replace("\n", "\n  "))
+                count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def write_jsonl(chunks, path):
+    """Écrit des paquets de scénarios (format dict) en JSON Lines, un scénario par ligne"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            for scenario in chunk:
+                f.write(json.dumps(scenario, ensure_ascii=False) + "\n")
+                count += 1
+    return count
+
+
+def write_npy(array_chunks, path, n_scenarios, num_weeks, dtype=np.float32):
+    """
+    Écrit les features dans un tableau .npy (scénario, semaine, 29), dans
+    l'ordre FEATURE_ORDER, lisible avec np.load(path, mmap_mode="r").
+    Les paquets sont écrits à la suite (la mémoire ne dépend pas du nombre de
+    scénarios). Les scénarios (maladie, localisation, replica) sont décrits
+    dans <nom>_scenarios.csv.
+    """
+    dtype = np.dtype(dtype)
+    header = {
+        "descr": np.lib.format.dtype_to_descr(dtype),
+        "fortran_order": False,
+        "shape": (n_scenarios, num_weeks, len(FEATURE_ORDER)),
+    }
+    index_path = os.path.splitext(path)[0] + "_scenarios.csv"
+    count = 0
+    with open(path, "wb") as f, open(index_path, "w", newline="", encoding="utf-8") as index_file:
+        np.lib.format.write_array_header_2_0(f, header)
+        writer = csv.writer(index_file)
+        writer.writerow(["scenario", "disease", "location", "replica"])
+        for arrays in array_chunks:
+            size = len(arrays["diseases"])
+            f.write(np.ascontiguousarray(arrays["features"], dtype=dtype).tobytes())
+            writer.writerows(zip(range(count, count + size), arrays["diseases"], arrays["locations"], arrays["replicas"]))
+            count += size
+    if count != n_scenarios:
+        raise ValueError(f"{count} scénarios écrits, {n_scenarios} annoncés dans l'en-tête .npy")
+    return count
+
+
+def write_parquet(array_chunks, path, generator):
+    """Écrit les scénarios en Parquet (format long, un groupe de lignes par paquet)"""
+    if pa is None:
+        raise RuntimeError("pyarrow est nécessaire pour l'export Parquet (pip install pyarrow)")
+    count = 0
+    writer = None
+    try:
+        for arrays in array_chunks:
+            table = pa.table(generator.arrays_to_columns(arrays, count))
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+            count += len(arrays["diseases"])
+    finally:
+        if writer is not None:
+            writer.close()
+    return count
+
+
+OUTPUT_FORMATS = {".json": "json", ".jsonl": "jsonl", ".npy": "npy", ".parquet": "parquet"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Génération des scénarios épidémiques synthétiques")
+    parser.add_argument("--output", default="disease.json")
+    parser.add_argument("--format", choices=sorted(set(OUTPUT_FORMATS.values())),
+                        help="Format de sortie (défaut: d'après l'extension de --output)")
+    parser.add_argument("--engine", choices=["python", "numpy"], default="python",
+                        help="Moteur des formats json/jsonl (npy et parquet utilisent toujours numpy)")
+    parser.add_argument("--seed", type=int, help="Graine du tirage (défaut: état global np.random)")
+    parser.add_argument("--num-weeks", type=int, default=20, help="Au moins 12 semaines nécessaires pour le modèle")
+    parser.add_argument("--replicas", type=int, default=1, help="Tirages par couple maladie/localisation")
+    parser.add_argument("--locations", default="France,China,USA,Brazil")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Scénarios générés et écrits par paquet")
+    parser.add_argument("--dtype", default="float32", help="Type des features du .npy")
+    parser.add_argument("--workers", type=int, default=1, help="Processus de génération (tirage par scénario)")
+    parser.add_argument("--seeding", choices=["stream", "scenario"],
+                        help="Tirage: un flux unique ou un Generator par scénario (défaut: scenario si --workers > 1)")
+    args = parser.parse_args()
+    seeding = args.seeding or ("scenario" if args.workers > 1 else "stream")
+    output_format = args.format or OUTPUT_FORMATS.get(os.path.splitext(args.output)[1], "json")
+    
     # Créer le générateur
     generator = DiseaseDataGenerator()
+    locations = args.locations.split(",")
     
-    # Générer les données
+    # Générer et écrire les données paquet par paquet
     print("Génération des données épidémiques...")
-    dataset = generator.generate_dataset(
-        diseases=None,  # Utilise toutes les maladies (15 au total)
-        locations=["France", "China", "USA", "Brazil"],
-        num_weeks=20  # Au moins 12 semaines nécessaires pour le modèle
-    )
-    
-    # Sauvegarder en JSON
-    with open('disease.json', 'w', encoding='utf-8') as f:
-        json.dump(dataset, f, ensure_ascii=False, indent=2)
+    if output_format in ("json", "jsonl"):
+        chunks = generator.iter_dataset(
+            None, locations, args.num_weeks, args.engine, args.seed, args.replicas, args.chunk_size, seeding, args.workers
+        )
+        write = write_json if output_format == "json" else write_jsonl
+        count = write(chunks, args.output)
+    else:
+        array_chunks = generator.iter_arrays(
+            None, locations, args.num_weeks, args.seed, args.replicas, args.chunk_size, seeding, args.workers
+        )
+        if output_format == "npy":
+            n_scenarios = generator.count_scenarios(None, locations, args.replicas)
+            count = write_npy(array_chunks, args.output, n_scenarios, args.num_weeks, args.dtype)
+        else:
+            count = write_parquet(array_chunks, args.output, generator)
     
-    print(f"✅ Fichier généré : disease.json")
-    print(f"📊 Contenu : {len(dataset)} scénarios épidémiques")
+    print(f"✅ Fichier généré : {args.output}")
+    print(f"📊 Contenu : {count} scénarios épidémiques")
     print(f"🦠 Nombre de maladies : {len(generator.disease_profiles)}")
-    print(f"📈 Features par semaine : {len(dataset[0]['history'][0])} features")
+    features_per_week = len(FEATURE_ORDER) if output_format == "npy" else len(HISTORY_KEYS)
+    print(f"📈 Features par semaine : {features_per_week} features")
     
     # Afficher un résumé des maladies
     print("\n🔍 Résumé des maladies générées :")
@@ -400,4 +1005,9 @@ if __name__ == "__main__":
     print("\nInfluenza (5 variantes):")
     for disease, profile in generator.disease_profiles.items():
         if "Influenza" in disease:
-            print(f"  - {disease}: R0={profile['base_r0']}, Mortalité={profile['base_mortality']*100:.2f}%")
\ No newline at end of file
+            print(f"  - {disease}: R0={profile['base_r0']}, Mortalité={profile['base_mortality']*100:.2f}%")
+
+
+# Utilisation du générateur
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+"""
+Entraînement du LSTM en script, à partir du feature store (etl.py) ou des
+scénarios du générateur (script.py --output scenarios.npy).
+
+Reprend la recette de LSTM.ipynb: fenêtres de 12 semaines, cible = moyenne
+des 4 semaines suivantes, RobustScaler(5, 95) ajusté sur les semaines de
+poids >= 0,5, StandardScaler des cibles, split 70/15/15, même architecture,
+même compilation et mêmes callbacks. Les séquences ne sont jamais chargées
+en mémoire:
+- les tableaux sont ouverts avec np.load(..., mmap_mode="r");
+- les scalers sont ajustés en une passe, par paquets de lignes (les quantiles
+  du RobustScaler sont calculés sur un échantillon réservoir, exact tant que
+  les semaines retenues tiennent dans --scaler-sample);
+- un pipeline tf.data construit les fenêtres par lots, en parallèle, à partir
+  de la seule ligne de départ de chaque fenêtre, les met en cache (mémoire ou
+  fichiers sur disque), les mélange et prépare le lot suivant pendant le pas
+  d'entraînement en cours.
+
+Produit un artefact versionné, déployable tel quel dans Backend/models:
+    <output>/<version>/
+        model.keras, scaler_features.pkl, scaler_targets.pkl, VERSION
+        metrics.json        MAE/RMSE pondérés par cible (train, validation, test), dénormalisés
+        final_results.txt   même format que LSTM.ipynb
+        history.json        historique Keras, durée et débit de chaque epoch
+        manifest.json       source, split, hyperparamètres, durée de chaque étape
+
+    python train.py
+    python train.py --source scenarios.npy --epochs 30 --cache /tmp/train_cache
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from sklearn.preprocessing import RobustScaler, StandardScaler
+
+from etl import FEATURE_STORE_DIR, GROWTH_RATE_CLIP, TARGET_ORDER, timed_step
+from script import FEATURE_INDEX, FEATURE_ORDER
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SEQUENCE_LENGTH = 12
+PREDICTION_HORIZON = 4
+WINDOW = SEQUENCE_LENGTH + PREDICTION_HORIZON
+
+# Préparation des features de LSTM.ipynb: taux de croissance capés avant normalisation
+# (déjà fait par etl.py pour le feature store, nécessaire pour les .npy du générateur)
+GROWTH_RATE_COLUMNS = [FEATURE_INDEX["cases_growth_rate"], FEATURE_INDEX["deaths_growth_rate"]]
+WEIGHT_COLUMN = FEATURE_INDEX["regression_weight_adjusted"]
+# Semaines retenues pour l'ajustement du scaler des features
+HIGH_QUALITY_WEIGHT = 0.5
+# Poids d'un échantillon dont le poids minimum sur la fenêtre est nul
+MIN_SAMPLE_WEIGHT = 0.1
+# Fractions train / validation (le reste pour le test)
+SPLIT_FRACTIONS = (0.7, 0.15)
+SPLIT_NAMES = ("train", "validation", "test")
+TARGET_NAMES = ["mortality_rate", "transmission_rate", "spatial_spread"]
+
+
+class WindowSource:
+    """
+    Semaines (lignes, 29) et cibles (lignes, 3) ouvertes sans copie, et
+    séries de semaines contiguës (start_row, n_weeks) dans lesquelles les
+    fenêtres sont découpées
+    """
+
+    def __init__(self, kind, path, features, targets, series, week_keys):
+        self.kind = kind
+        self.path = path
+        self.features = features
+        self.targets = targets
+        self.series = series
+        # Position temporelle de chaque ligne (jours ou rang de la semaine), pour --split week
+        self.week_keys = week_keys
+
+    def window_starts(self):
+        """Ligne de départ de chaque fenêtre, série par série et dans l'ordre des semaines"""
+        counts = np.maximum(self.series["n_weeks"].to_numpy() - WINDOW + 1, 0)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        return np.repeat(self.series["start_row"].to_numpy(), counts) + offsets
+
+    def describe(self):
+        return {
+            "kind": self.kind,
+            "path": os.path.abspath(self.path),
+            "rows": len(self.features),
+            "series": len(self.series),
+        }
+
+
+def open_feature_store(path):
+    """Feature store écrit par etl.py"""
+    features = np.load(os.path.join(path, "features.npy"), mmap_mode="r")
+    targets = np.load(os.path.join(path, "targets.npy"), mmap_mode="r")
+    weeks = np.load(os.path.join(path, "weeks.npy"), mmap_mode="r")
+    series = pd.read_csv(os.path.join(path, "index.csv"))
+    return WindowSource("feature_store", path, features, targets, series, weeks.view("int64"))
+
+
+def open_generator_output(path, chunk_size):
+    """
+    Scénarios (scénario, semaine, 29) écrits par script.py. Le générateur ne
+    fournit pas de cibles: elles sont dérivées des features (derive_targets)
+    et écrites une fois dans <nom>_targets.npy.
+    """
+    scenarios = np.load(path, mmap_mode="r")
+    n_scenarios, num_weeks, _ = scenarios.shape
+    stem = os.path.splitext(path)[0]
+    series = pd.read_csv(stem + "_scenarios.csv")
+    targets_path = stem + "_targets.npy"
+    if not os.path.exists(targets_path) or os.path.getmtime(targets_path) < os.path.getmtime(path):
+        derive_targets(scenarios, series["disease"].to_numpy(), targets_path, chunk_size)
+    series["start_row"] = np.arange(n_scenarios) * num_weeks
+    series["n_weeks"] = num_weeks
+    return WindowSource(
+        "generator",
+        path,
+        scenarios.reshape(n_scenarios * num_weeks, len(FEATURE_ORDER)),
+        np.load(targets_path, mmap_mode="r"),
+        series,
+        np.tile(np.arange(num_weeks), n_scenarios),
+    )
+
+
+def derive_targets(scenarios, diseases, path, chunk_size):
+    """
+    Cibles de etl.add_targets calculées sur les scénarios du générateur, par
+    paquets de scénarios. Le générateur n'a pas de continent: la croissance
+    régionale de la propagation spatiale est la moyenne de la maladie sur
+    toutes les localisations, semaine par semaine (première passe).
+    """
+    n_scenarios, num_weeks, _ = scenarios.shape
+    codes, disease_index = np.unique(diseases, return_inverse=True)
+    growth_column = FEATURE_INDEX["cases_growth_rate"]
+    growth_sums = np.zeros((len(codes), num_weeks))
+    for start in range(0, n_scenarios, chunk_size):
+        np.add.at(growth_sums, disease_index[start:start + chunk_size], scenarios[start:start + chunk_size, :, growth_column])
+    regional_growth = growth_sums / np.bincount(disease_index, minlength=len(codes))[:, None]
+
+    targets = np.lib.format.open_memmap(path, mode="w+", dtype=np.float64, shape=(n_scenarios * num_weeks, 3))
+    ma_length = np.minimum(np.arange(1, num_weeks + 1), 4)
+    for start in range(0, n_scenarios, chunk_size):
+        chunk = np.asarray(scenarios[start:start + chunk_size], dtype=np.float64)
+        mortality = np.clip(chunk[:, :, FEATURE_INDEX["log_weekly_deaths"]] - chunk[:, :, FEATURE_INDEX["log_weekly_cases"]], -5, 0)
+        reproduction = chunk[:, :, FEATURE_INDEX["avg_reproduction_rate"]]
+        cumulative = np.cumsum(reproduction, axis=1)
+        ma_reproduction = cumulative.copy()
+        ma_reproduction[:, 4:] -= cumulative[:, :-4]
+        transmission = np.clip(reproduction - ma_reproduction / ma_length, -2, 2)
+        spread = np.clip(chunk[:, :, growth_column] - regional_growth[disease_index[start:start + chunk_size]], -1, 1)
+        block = np.stack([(mortality + 5) / 5, (transmission + 2) / 4, (spread + 1) / 2], axis=-1)
+        targets[start * num_weeks:start * num_weeks + block.shape[0] * num_weeks] = block.reshape(-1, 3)
+    targets.flush()
+    del targets
+
+
+def open_source(path, chunk_size):
+    if os.path.isdir(path):
+        return open_feature_store(path)
+    if path.endswith(".npy"):
+        return open_generator_output(path, chunk_size)
+    raise ValueError(f"Source non reconnue: {path} (dossier du feature store ou .npy du générateur)")
+
+
+def prepare_features(features):
+    """Features brutes (..., 29) -> float64, taux de croissance capés comme dans LSTM.ipynb"""
+    features = np.array(features, dtype=np.float64)
+    features[..., GROWTH_RATE_COLUMNS] = np.clip(features[..., GROWTH_RATE_COLUMNS], -GROWTH_RATE_CLIP, GROWTH_RATE_CLIP)
+    return features
+
+
+def fit_scalers(source, chunk_rows, sample_size, rng):
+    """
+    Ajuste les deux scalers en une passe par paquets de lignes. Les quantiles
+    du RobustScaler viennent d'un échantillon réservoir des semaines de poids
+    >= 0,5 (toutes, tant qu'elles sont moins de sample_size); le
+    StandardScaler des cibles est exact (partial_fit).
+    """
+    scaler_targets = StandardScaler()
+    reservoir = np.empty((0, len(FEATURE_ORDER)))
+    keys = np.empty(0)
+    for start in range(0, len(source.features), chunk_rows):
+        features = prepare_features(source.features[start:start + chunk_rows])
+        targets = np.asarray(source.targets[start:start + chunk_rows], dtype=np.float64)
+        if not (np.isfinite(features).all() and np.isfinite(targets).all()):
+            raise ValueError(f"Valeurs non finies dans les lignes {start} à {start + len(features) - 1}")
+        kept = features[features[:, WEIGHT_COLUMN] >= HIGH_QUALITY_WEIGHT]
+        reservoir = np.concatenate([reservoir, kept])
+        keys = np.concatenate([keys, rng.random(len(kept))])
+        if len(keys) > sample_size:
+            selected = np.argpartition(keys, sample_size)[:sample_size]
+            reservoir, keys = reservoir[selected], keys[selected]
+        scaler_targets.partial_fit(pd.DataFrame(targets, columns=TARGET_ORDER))
+    if not len(reservoir):
+        raise ValueError(f"Aucune semaine de poids >= {HIGH_QUALITY_WEIGHT} pour ajuster le scaler des features")
+    scaler_features = RobustScaler(quantile_range=(5, 95)).fit(pd.DataFrame(reservoir, columns=FEATURE_ORDER))
+    return scaler_features, scaler_targets, len(reservoir)
+
+
+def split_windows(source, starts, method):
+    """
+    Split 70/15/15 des fenêtres. "order": dans l'ordre des séries, comme
+    LSTM.ipynb; "week": selon la première semaine prédite, toutes séries
+    confondues (test = semaines les plus récentes).
+    """
+    if method == "week":
+        starts = starts[np.argsort(source.week_keys[starts + SEQUENCE_LENGTH], kind="stable")]
+    train_end = int(SPLIT_FRACTIONS[0] * len(starts))
+    val_end = int(sum(SPLIT_FRACTIONS) * len(starts))
+    return dict(zip(SPLIT_NAMES, (starts[:train_end], starts[train_end:val_end], starts[val_end:])))
+
+
+def window_loader(source, scaler_features, scaler_targets):
+    """
+    Fonction numpy qui construit un lot de fenêtres à partir de leurs lignes
+    de départ: séquences normalisées (B, 12, 29), cibles normalisées (B, 3)
+    et poids d'échantillon (B,)
+    """
+    center, scale = scaler_features.center_, scaler_features.scale_
+    target_mean, target_scale = scaler_targets.mean_, scaler_targets.scale_
+    steps = np.arange(WINDOW)
+
+    def load(starts):
+        rows = starts[:, None] + steps
+        features = prepare_features(source.features[rows])
+        sequences = ((features[:, :SEQUENCE_LENGTH] - center) / scale).astype(np.float32)
+        targets = np.asarray(source.targets[rows[:, SEQUENCE_LENGTH:]]).mean(axis=1)
+        targets = ((targets - target_mean) / target_scale).astype(np.float32)
+        # Poids de régression minimum sur la séquence et l'horizon
+        weights = np.abs(features[:, :, WEIGHT_COLUMN].min(axis=1))
+        weights[weights == 0] = MIN_SAMPLE_WEIGHT
+        return sequences, targets, weights.astype(np.float32)
+
+    return load
+
+
+def make_dataset(starts, load, batch_size, window_batch, cache=None, shuffle_buffer=0, seed=None):
+    """
+    Pipeline tf.data: lignes de départ -> fenêtres construites par lots en
+    parallèle -> cache (None: aucun, "": mémoire, sinon préfixe de fichiers)
+    -> mélange -> lots -> préchargement
+    """
+
+    def load_batch(batch_starts):
+        sequences, targets, weights = tf.numpy_function(
+            load, [batch_starts], (tf.float32, tf.float32, tf.float32), stateful=False
+        )
+        sequences.set_shape([None, SEQUENCE_LENGTH, len(FEATURE_ORDER)])
+        targets.set_shape([None, len(TARGET_ORDER)])
+        weights.set_shape([None])
+        return sequences, targets, weights
+
+    dataset = tf.data.Dataset.from_tensor_slices(starts).batch(window_batch)
+    dataset = dataset.map(load_batch, num_parallel_calls=tf.data.AUTOTUNE).unbatch()
+    dataset = dataset.apply(tf.data.experimental.assert_cardinality(len(starts)))
+    if cache is not None:
+        dataset = dataset.cache(cache)
+    if shuffle_buffer:
+        dataset = dataset.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+    return dataset.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+
+
+def build_model(learning_rate):
+    """Architecture et compilation de LSTM.ipynb"""
+    model = tf.keras.Sequential([
+        tf.keras.layers.LSTM(
+            64, input_shape=(SEQUENCE_LENGTH, len(FEATURE_ORDER)), dropout=0.2, recurrent_dropout=0.1
+        ),
+        tf.keras.layers.Dense(32, activation="relu"),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.Dense(len(TARGET_ORDER), activation="linear"),
+    ])
+    model.compile(
+        optimizer=tf.keras.optimizers.Adam(learning_rate=learning_rate),
+        loss="mse",
+        metrics=["mae"],
+        weighted_metrics=["mae"],
+    )
+    return model
+
+
+class EpochTimer(tf.keras.callbacks.Callback):
+    """Durée de chaque epoch et débit d'entraînement (échantillons/s, validation exclue), ajoutés à l'historique"""
+
+    def __init__(self, n_samples):
+        super().__init__()
+        self.n_samples = n_samples
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.started = time.perf_counter()
+        self.train_time = None
+
+    def on_test_begin(self, logs=None):
+        if self.train_time is None:
+            self.train_time = time.perf_counter() - self.started
+
+    def on_epoch_end(self, epoch, logs=None):
+        duration = time.perf_counter() - self.started
+        train_time = self.train_time or duration
+        samples_per_s = self.n_samples / train_time
+        if logs is not None:
+            logs["epoch_time_s"] = duration
+            logs["samples_per_s"] = samples_per_s
+        print(f"⏱️  epoch {epoch + 1} : {duration:.2f} s ({train_time:.2f} s d'entraînement), "
+              f"{samples_per_s:.0f} échantillons/s")
+
+
+def evaluate(model, dataset, scaler_targets):
+    """
+    MSE, MAE et RMSE pondérés par les poids d'échantillon, sur les valeurs
+    dénormalisées, globaux (moyenne des cibles) et par cible, comme
+    calculate_metrics de LSTM.ipynb, accumulés lot par lot
+    """
+    absolute = np.zeros(len(TARGET_ORDER))
+    squared = np.zeros(len(TARGET_ORDER))
+    total_weight = 0.0
+    for sequences, targets, weights in dataset:
+        predictions = model.predict_on_batch(sequences)
+        errors = (predictions - targets.numpy()) * scaler_targets.scale_
+        weights = weights.numpy()[:, None]
+        absolute += (weights * np.abs(errors)).sum(axis=0)
+        squared += (weights * errors ** 2).sum(axis=0)
+        total_weight += weights.sum()
+    mae, mse = absolute / total_weight, squared / total_weight
+    metrics = {"mse": float(mse.mean()), "mae": float(mae.mean()), "rmse": float(np.sqrt(mse.mean()))}
+    for index, name in enumerate(TARGET_NAMES):
+        metrics[f"{name}_mae"] = float(mae[index])
+        metrics[f"{name}_rmse"] = float(np.sqrt(mse[index]))
+    return metrics
+
+
+def write_final_results(path, test_metrics):
+    """final_results.txt au format de LSTM.ipynb"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"MAE Test: {test_metrics['mae']:.4f}\n")
+        f.write(f"Mortality Rate MAE: {test_metrics['mortality_rate_mae']:.4f}\n")
+        f.write(f"Transmission Rate MAE: {test_metrics['transmission_rate_mae']:.4f}\n")
+        f.write(f"Spatial Spread MAE: {test_metrics['spatial_spread_mae']:.4f}\n")
+
+
+def write_json(path, data):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Entraîne le LSTM et écrit un artefact versionné")
+    parser.add_argument("--source", default=FEATURE_STORE_DIR,
+                        help="Dossier du feature store (etl.py) ou .npy du générateur (script.py)")
+    parser.add_argument("--output", default=os.path.join(BASE_DIR, "artifacts"), help="Dossier des artefacts")
+    parser.add_argument("--version", help="Version de l'artefact (défaut: date et heure)")
+    parser.add_argument("--epochs", type=int, default=30)
+    parser.add_argument("--batch-size", type=int, default=128)
+    parser.add_argument("--learning-rate", type=float, default=0.001)
+    parser.add_argument("--patience", type=int, default=20, help="Patience de l'arrêt anticipé (val_loss)")
+    parser.add_argument("--split", choices=["order", "week"], default="order",
+                        help="Split 70/15/15: ordre des séries (LSTM.ipynb) ou semaine prédite")
+    parser.add_argument("--cache", default="memory",
+                        help="Cache des fenêtres: memory, none ou dossier (jeux plus grands que la RAM)")
+    parser.add_argument("--shuffle-buffer", type=int, default=10000, help="Fenêtres mélangées à la fois")
+    parser.add_argument("--window-batch", type=int, default=1024, help="Fenêtres construites par appel")
+    parser.add_argument("--chunk-rows", type=int, default=100000, help="Lignes lues par paquet (scalers, cibles)")
+    parser.add_argument("--scaler-sample", type=int, default=1000000,
+                        help="Taille de l'échantillon réservoir des quantiles du RobustScaler")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    version = args.version or datetime.now().strftime("%Y%m%d-%H%M%S")
+    artifact_dir = os.path.join(args.output, version)
+    if os.path.exists(artifact_dir) and os.listdir(artifact_dir):
+        parser.error(f"l'artefact {artifact_dir} existe déjà")
+    os.makedirs(artifact_dir, exist_ok=True)
+    tf.keras.utils.set_random_seed(args.seed)
+    rng = np.random.default_rng(args.seed)
+
+    print(f"Entraînement du modèle, version {version}...")
+    timings = {}
+    started = time.perf_counter()
+    with timed_step(timings, "ouverture de la source"):
+        source = open_source(args.source, max(args.chunk_rows // WINDOW, 1))
+    with timed_step(timings, "ajustement des scalers"):
+        scaler_features, scaler_targets, scaler_rows = fit_scalers(source, args.chunk_rows, args.scaler_sample, rng)
+    splits = split_windows(source, source.window_starts(), args.split)
+    print(f"📊 Fenêtres : " + ", ".join(f"{name} {len(starts)}" for name, starts in splits.items()))
+    if not all(len(starts) for starts in splits.values()):
+        raise ValueError("Pas assez de fenêtres de 16 semaines pour le split 70/15/15")
+
+    # Fenêtres d'entraînement mélangées une fois (le cache garde cet ordre), puis par le tampon à chaque epoch
+    train_starts = rng.permutation(splits["train"])
+    load = window_loader(source, scaler_features, scaler_targets)
+    cache_dir = None if args.cache in ("memory", "none") else os.path.join(args.cache, version)
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def cache_for(name):
+        if args.cache == "none":
+            return None
+        return os.path.join(cache_dir, name) if cache_dir else ""
+
+    train_dataset = make_dataset(
+        train_starts, load, args.batch_size, args.window_batch, cache_for("train"), args.shuffle_buffer, args.seed
+    )
+    validation_dataset = make_dataset(splits["validation"], load, args.batch_size, args.window_batch, cache_for("validation"))
+
+    model_path = os.path.join(artifact_dir, "model.keras")
+    timer = EpochTimer(len(train_starts))
+    callbacks = [
+        tf.keras.callbacks.EarlyStopping(monitor="val_loss", patience=args.patience, restore_best_weights=True, verbose=1),
+        tf.keras.callbacks.ReduceLROnPlateau(monitor="val_loss", factor=0.5, patience=10, min_lr=1e-6, verbose=1),
+        tf.keras.callbacks.ModelCheckpoint(model_path, monitor="val_loss", save_best_only=True, verbose=1),
+        timer,
+    ]
+    model = build_model(args.learning_rate)
+    with timed_step(timings, "entraînement"):
+        history = model.fit(
+            train_dataset, validation_data=validation_dataset, epochs=args.epochs, callbacks=callbacks, verbose=2
+        )
+    if cache_dir:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    # Évaluation du modèle sauvegardé (meilleure val_loss), celui qui sera déployé
+    with timed_step(timings, "évaluation"):
+        best_model = tf.keras.models.load_model(model_path)
+        metrics = {
+            name: evaluate(best_model, make_dataset(starts, load, 1024, args.window_batch), scaler_targets)
+            for name, starts in splits.items()
+        }
+
+    with timed_step(timings, "écriture"):
+        joblib.dump(scaler_features, os.path.join(artifact_dir, "scaler_features.pkl"))
+        joblib.dump(scaler_targets, os.path.join(artifact_dir, "scaler_targets.pkl"))
+        with open(os.path.join(artifact_dir, "VERSION"), "w", encoding="utf-8") as f:
+            f.write(version + "\n")
+        write_json(os.path.join(artifact_dir, "metrics.json"), metrics)
+        write_final_results(os.path.join(artifact_dir, "final_results.txt"), metrics["test"])
+        write_json(
+            os.path.join(artifact_dir, "history.json"),
+            {key: [float(value) for value in values] for key, values in history.history.items()},
+        )
+    timings["total"] = round(time.perf_counter() - started, 4)
+    epoch_times = history.history["epoch_time_s"]
+    write_json(os.path.join(artifact_dir, "manifest.json"), {
+        "version": version,
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "source": source.describe(),
+        "sequence_length": SEQUENCE_LENGTH,
+        "prediction_horizon": PREDICTION_HORIZON,
+        "feature_order": FEATURE_ORDER,
+        "target_order": TARGET_ORDER,
+        "split": {"method": args.split, **{name: len(starts) for name, starts in splits.items()}},
+        "scaler_features_rows": scaler_rows,
+        "hyperparameters": {
+            "epochs": args.epochs, "epochs_run": len(epoch_times), "batch_size": args.batch_size,
+            "learning_rate": args.learning_rate, "patience": args.patience, "seed": args.seed,
+        },
+        "tensorflow": tf.__version__,
+        "mean_epoch_time_s": round(float(np.mean(epoch_times)), 4),
+        "mean_samples_per_s": round(float(np.mean(history.history["samples_per_s"])), 1),
+        "timings_s": timings,
+    })
+
+    print(f"✅ Artefact écrit : {artifact_dir}")
+    print(f"📈 MAE test : {metrics['test']['mae']:.4f} (validation {metrics['validation']['mae']:.4f}) — "
+          + ", ".join(f"{name} {metrics['test'][f'{name}_mae']:.4f}" for name in TARGET_NAMES))
+    print(f"⏱️  {len(epoch_times)} epochs, {np.mean(epoch_times):.2f} s/epoch, "
+          f"{np.mean(history.history['samples_per_s']):.0f} échantillons/s")
+    print(f"⏱️  Total : {timings['total']:.3f} s")
+
+
+if __name__ == "__main__":
+    main()